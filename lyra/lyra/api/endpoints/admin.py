@@ -1,4 +1,4 @@
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
 import pandas
 from fastapi import APIRouter, Request
@@ -6,7 +6,7 @@ from fastapi.responses import HTMLResponse, ORJSONResponse
 from sqlalchemy import desc, inspect, select, sql, text
 
 from lyra.connections import database
-from lyra.core import cache
+from lyra.core import cache, metrics
 from lyra.models.response_models import ForegroundTaskJSONResponse
 from lyra.site.style import render_in_jupyter_notebook_css_style
 
@@ -66,15 +66,21 @@ async def get_table_content(
 
 
 @router.get("/clear_cache", response_model=ForegroundTaskJSONResponse)
-async def clear_cache() -> Dict:  # pragma: no cover
+async def clear_cache(source: Optional[str] = None) -> Dict:  # pragma: no cover
+    """clear the whole cache, or only the values that depend on the data `source`;
+    one of `lyra.core.cache.DATA_SOURCES`.
+    """
     cleared = False
     try:
-        cache.flush()
+        if source is None:
+            cache.flush()
+        else:
+            cache.bump_version(source)
         cleared = True
     except Exception as e:
         pass
 
-    return {"data": {"cleared": cleared}}
+    return {"data": {"cleared": cleared, "source": source}}
 
 
 @router.get("/toggle_cache", response_model=ForegroundTaskJSONResponse)
@@ -82,3 +88,19 @@ async def toggle_cache(enabled: bool = True) -> Dict:
     cache.use_cache(enabled)
 
     return {"data": {"ENABLE_REDIS_CACHE": enabled}}
+
+
+@router.get("/cache_stats", response_model=ForegroundTaskJSONResponse)
+async def cache_stats() -> Dict:
+    """counters shared by all processes are under 'redis'. The counters and
+    latency histograms under 'process' are only for the process that served
+    this request.
+    """
+    return {"data": {"redis": cache.get_stats(), "process": metrics.registry.to_dict()}}
+
+
+@router.get("/cache_keys", response_model=ForegroundTaskJSONResponse)
+async def cache_keys(
+    top: int = 10, namespace: Optional[str] = None, max_keys: int = 10000
+) -> Dict:
+    return {"data": cache.inspect_keys(top=top, namespace=namespace, max_keys=max_keys)}
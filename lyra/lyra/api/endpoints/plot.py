@@ -4,6 +4,7 @@ from typing import Dict, List, Optional, Union
 import orjson
 from altair.utils.data import MaxRowsError
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
@@ -56,7 +57,7 @@ def timeseries_schema_query(
 
 
 @router.get("/timeseries", response_model=ChartJSONResponse)
-def plot_timeseries_with_GET(
+async def plot_timeseries_with_GET(
     request: Request,
     req: MultiVarSchema = Depends(timeseries_schema_query),
     f: ResponseFormat = Query("json"),
@@ -66,14 +67,16 @@ def plot_timeseries_with_GET(
     msg = []
 
     try:
-        ts = multi_variable.make_timeseries(jsonable_encoder(req.timeseries))
-        source = multi_variable.make_source(ts)
+        ts = await multi_variable.make_timeseries_async(
+            jsonable_encoder(req.timeseries)
+        )
+        source = await run_in_threadpool(multi_variable.make_source, ts)
 
         warnings = ["\n".join(t.kwargs.get("warnings", [])) for t in ts]
         msg += [w for w in warnings if w]
 
         chart = multi_variable.make_plot(source)
-        chart_spec = chart.to_dict()
+        chart_spec = await run_in_threadpool(chart.to_dict)
         chart_status = "SUCCESS"
 
     except HydstraIOError as e:
@@ -101,7 +104,7 @@ def plot_timeseries_with_GET(
 
 
 @router.post("/timeseries", response_model=ChartJSONResponse)
-def plot_timeseries_with_POST(
+async def plot_timeseries_with_POST(
     request: Request,
     f: ResponseFormat = Query("json"),
     timeseries: ListTimeseriesSchema = Body(
@@ -180,8 +183,10 @@ def plot_timeseries_with_POST(
     msg = []
 
     try:
-        ts = multi_variable.make_timeseries(jsonable_encoder(timeseries.timeseries))
-        source = multi_variable.make_source(ts)
+        ts = await multi_variable.make_timeseries_async(
+            jsonable_encoder(timeseries.timeseries)
+        )
+        source = await run_in_threadpool(multi_variable.make_source, ts)
         warnings = ["\n".join(t.warnings) for t in ts]
         msg += [w for w in warnings if w]
 
@@ -189,7 +194,7 @@ def plot_timeseries_with_POST(
             msg.append("Warning: No data to display.")
 
         chart = multi_variable.make_plot(source)
-        chart_spec = chart.to_dict()
+        chart_spec = await run_in_threadpool(chart.to_dict)
         chart_status = "SUCCESS"
 
     except HydstraIOError as e:
@@ -252,7 +257,7 @@ def multi_var_schema_query(
 @router.get(
     "/multi_variable", response_model=ChartJSONResponse,
 )
-def plot_multi_variable(
+async def plot_multi_variable(
     request: Request,
     req: MultiVarSchema = Depends(multi_var_schema_query),
     f: ResponseFormat = Query("json"),
@@ -278,11 +283,13 @@ def plot_multi_variable(
 
     try:  # pragma: no branch
         hyd_start = time.perf_counter()
-        ts = multi_variable.make_timeseries(jsonable_encoder(req.timeseries))
+        ts = await multi_variable.make_timeseries_async(
+            jsonable_encoder(req.timeseries)
+        )
         hyd_end = time.perf_counter()
 
         source_start = time.perf_counter()
-        source = multi_variable.make_source(ts)
+        source = await run_in_threadpool(multi_variable.make_source, ts)
         source_end = time.perf_counter()
 
         warnings = ["\n".join(t.warnings) for t in ts]
@@ -296,7 +303,7 @@ def plot_multi_variable(
             plot_end = time.perf_counter()
 
             chart_spec_start = time.perf_counter()
-            chart_spec = chart.to_dict()
+            chart_spec = await run_in_threadpool(chart.to_dict)
             chart_status = "SUCCESS"
             chart_spec_end = time.perf_counter()
 
@@ -337,24 +344,28 @@ def plot_multi_variable(
 
 
 @router.get("/multi_variable/data")
-def plot_multi_variable_data(
+async def plot_multi_variable_data(
     req: MultiVarSchema = Depends(multi_var_schema_query),
     f: ResponseDataFormat = Query("json", description="Data format of the response"),
 ) -> Union[ORJSONResponse, PlainTextResponse]:
 
     try:  # pragma: no branch
-        ts = multi_variable.make_timeseries(jsonable_encoder(req.timeseries))
-        source = multi_variable.make_source(ts)
+        ts = await multi_variable.make_timeseries_async(
+            jsonable_encoder(req.timeseries)
+        )
+        source = await run_in_threadpool(multi_variable.make_source, ts)
         # warnings = ["\n".join(t.warnings) for t in ts]
 
     except HydstraIOError as e:
         return ORJSONResponse({"error": str(e)})
 
     if f == "csv":
-        csv = multi_variable.make_source_csv(source)
+        csv = await run_in_threadpool(multi_variable.make_source_csv, source)
         return PlainTextResponse(csv)
     else:
-        _json = jsonable_encoder(multi_variable.make_source_json(source))
+        _json = await run_in_threadpool(
+            lambda: jsonable_encoder(multi_variable.make_source_json(source))
+        )
         return ORJSONResponse(_json)
 
 
@@ -391,7 +402,7 @@ def regression_schema_query(
 @router.get(
     "/regression", response_model=ChartJSONResponse,
 )
-def plot_regression(
+async def plot_regression(
     request: Request,
     req: RegressionSchema = Depends(regression_schema_query),
     f: ResponseFormat = Query("json"),
@@ -411,8 +422,10 @@ def plot_regression(
     msg = []
 
     try:  # pragma: no branch
-        ts = regression.make_timeseries(**jsonable_encoder(req))
-        source = regression.make_source(ts, method=req.regression_method)
+        ts = await regression.make_timeseries_async(**jsonable_encoder(req))
+        source = await run_in_threadpool(
+            regression.make_source, ts, method=req.regression_method
+        )
         warnings = ["\n".join(t.warnings) for t in ts]
         msg += [w for w in warnings if w]
 
@@ -423,7 +436,7 @@ def plot_regression(
             )
         else:
             chart = regression.make_plot(source, method=req.regression_method)
-            chart_spec = chart.to_dict()
+            chart_spec = await run_in_threadpool(chart.to_dict)
             chart_status = "SUCCESS"
 
     except HydstraIOError as e:
@@ -452,23 +465,27 @@ def plot_regression(
 
 
 @router.get("/regression/data")
-def plot_regression_data(
+async def plot_regression_data(
     req: RegressionSchema = Depends(regression_schema_query),
     f: ResponseDataFormat = Query("json", description="Data format of the response"),
 ) -> Union[ORJSONResponse, PlainTextResponse]:
     try:  # pragma: no branch
-        ts = regression.make_timeseries(**jsonable_encoder(req))
-        source = regression.make_source(ts, method=req.regression_method)
+        ts = await regression.make_timeseries_async(**jsonable_encoder(req))
+        source = await run_in_threadpool(
+            regression.make_source, ts, method=req.regression_method
+        )
         # warnings = ["\n".join(t.warnings) for t in ts]
 
     except HydstraIOError as e:
         return ORJSONResponse({"error": str(e)})
 
     if f == "csv":
-        csv = regression.make_source_csv(source)
+        csv = await run_in_threadpool(regression.make_source_csv, source)
         return PlainTextResponse(csv)
     else:
-        _json = jsonable_encoder(regression.make_source_json(source))
+        _json = await run_in_threadpool(
+            lambda: jsonable_encoder(regression.make_source_json(source))
+        )
         return ORJSONResponse(_json)
 
 
@@ -512,7 +529,7 @@ def diversion_scenario_schema_query(
 @router.get(
     "/diversion_scenario", response_model=ChartJSONResponse,
 )
-def plot_diversion_scenario(
+async def plot_diversion_scenario(
     request: Request,
     req: DiversionScenarioSchema = Depends(diversion_scenario_schema_query),
     f: ResponseFormat = Query("json"),
@@ -527,17 +544,19 @@ def plot_diversion_scenario(
 
     try:  # pragma: no branch
         # ts = multi_variable.make_timeseries(jsonable_encoder(req.timeseries))
-        source = diversion_scenario.make_source(**jsonable_encoder(req))
+        source = await diversion_scenario.make_source_async(**jsonable_encoder(req))
         # warnings = ["\n".join(t.warnings) for t in ts]
         # msg += warnings
 
         if source.empty:  # pragma: no cover
             msg.append("Warning: No data to display.")
         else:
-            table = diversion_scenario.make_summary_table(source)
+            table = await run_in_threadpool(
+                diversion_scenario.make_summary_table, source
+            )
 
             chart = diversion_scenario.make_plot(source)
-            chart_spec = chart.to_dict()
+            chart_spec = await run_in_threadpool(chart.to_dict)
             chart_status = "SUCCESS"
 
     except HydstraIOError as e:
@@ -567,22 +586,24 @@ def plot_diversion_scenario(
 
 
 @router.get("/diversion_scenario/data")
-def plot_diversion_scenario_data(
+async def plot_diversion_scenario_data(
     req: DiversionScenarioSchema = Depends(diversion_scenario_schema_query),
     f: ResponseDataFormat = Query("json", description="Data format of the response"),
 ) -> Union[ORJSONResponse, PlainTextResponse]:
 
     try:  # pragma: no branch
         # ts = multi_variable.make_timeseries(jsonable_encoder(req.timeseries))
-        source = diversion_scenario.make_source(**jsonable_encoder(req))
+        source = await diversion_scenario.make_source_async(**jsonable_encoder(req))
         # warnings = ["\n".join(t.warnings) for t in ts]
 
     except HydstraIOError as e:
         return ORJSONResponse({"error": str(e)})
 
     if f == "csv":
-        csv = diversion_scenario.make_source_csv(source)
+        csv = await run_in_threadpool(diversion_scenario.make_source_csv, source)
         return PlainTextResponse(csv)
     else:
-        _json = jsonable_encoder(diversion_scenario.make_source_json(source))
+        _json = await run_in_threadpool(
+            lambda: jsonable_encoder(diversion_scenario.make_source_json(source))
+        )
         return ORJSONResponse(_json)
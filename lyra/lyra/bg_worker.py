@@ -2,10 +2,10 @@ import asyncio
 import logging
 
 from lyra.connections.database import writer_engine
-from lyra.core.cache import flush
+from lyra.core.cache import flush, refresh_cached_function
 from lyra.core.celery_app import celery_app
 from lyra.ops import startup
-from lyra.src.hydstra.tasks import save_site_geojson_info
+from lyra.src.hydstra.tasks import save_site_geojson_info, sync_hydstra_store
 from lyra.src.mnwd.tasks import (
     dt_metrics_response,
     rsb_data_response,
@@ -48,6 +48,13 @@ def background_refresh_cache():  # pragma: no cover
     return result
 
 
+@celery_app.task(acks_late=True, track_started=True)
+def background_refresh_cached_function(module, name, args, kwargs):  # pragma: no cover
+    refresh_cached_function(module, name, args, kwargs)
+    result = dict(taskname="refresh_cached_function", succeeded="succeeded")
+    return result
+
+
 @celery_app.task(acks_late=True, track_started=True)
 def background_rsb_json_response(**kwargs):  # pragma: no cover
     result = rsb_spatial_response(**kwargs)
@@ -91,7 +98,12 @@ def background_rsb_downstream_trace_response(**kwargs):  # pragma: no cover
 @celery_app.task(acks_late=True, track_started=True)
 def background_update_hydstra_site_info(**kwargs):  # pragma: no cover
 
-    asyncio.run(save_site_geojson_info())
-    flush()
+    asyncio.run(save_site_geojson_info())  # bumps the hydstra_sites data version
 
     return {"status": "success"}
+
+
+@celery_app.task(acks_late=True, track_started=True)
+def background_sync_hydstra_store(**kwargs):  # pragma: no cover
+    result = asyncio.run(sync_hydstra_store(**kwargs))
+    return dict(taskname="sync_hydstra_store", succeeded="succeeded", **result)
@@ -15,4 +15,5 @@ github: https://github.com/iamsinghrajat/async-cache
 
 """
 from .async_lru import AsyncLRU as async_lru
+from .async_redis_ttl import AsyncRedisTTL as async_redis_ttl
 from .async_ttl import AsyncTTL as async_ttl
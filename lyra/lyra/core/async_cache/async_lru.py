@@ -1,3 +1,8 @@
+import time
+
+from lyra.core.metrics import registry as metrics
+
+from .inflight import InFlight
 from .key import KEY
 from .lru import LRU
 
@@ -8,16 +13,24 @@ class AsyncLRU:
         :param maxsize: Use maxsize as None for unlimited size cache
         """
         self.lru = LRU(maxsize=maxsize)
+        self.inflight = InFlight()
 
     def __call__(self, func):
         async def wrapper(*args, **kwargs):
             key = KEY(args, kwargs)
             if key in self.lru:
+                metrics.incr(func.__name__, "hits")
                 return self.lru[key]
-            else:
+
+            async def _call():
+                start = time.perf_counter()
                 self.lru[key] = await func(*args, **kwargs)
+                metrics.observe(func.__name__, time.perf_counter() - start)
+                metrics.incr(func.__name__, "misses")
                 return self.lru[key]
 
+            return await self.inflight.run(key, _call, name=func.__name__)
+
         wrapper.__name__ += func.__name__
 
         return wrapper
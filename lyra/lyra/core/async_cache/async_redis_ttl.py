@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from lyra.core import codecs
+from lyra.core.metrics import registry as metrics
+
+from .async_ttl import AsyncTTL
+from .key import KEY
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRedisTTL(AsyncTTL):
+    """AsyncTTL that shares entries across processes through redis.
+
+    Entries are first looked up in the in-process TTL cache, then in redis.
+    After redis fails to respond, it is skipped for `retry_seconds`, so while it
+    is unavailable a miss costs about as much as with AsyncTTL. Return values
+    must be json serializable to be shared; others are only cached locally.
+    """
+
+    def __init__(
+        self,
+        time_to_live: float = 60,
+        maxsize: float = 1024,
+        skip_args: int = 0,
+        namespace: Optional[str] = None,
+        redis_kwargs: Optional[Dict[str, Any]] = None,
+        retry_seconds: float = 30,
+    ) -> None:
+        """
+        :param time_to_live: Use time_to_live as None for non expiring cache
+        :param maxsize: Use maxsize as None for unlimited size local cache
+        :param skip_args: Use `1` to skip first arg of func in determining cache key
+        :param namespace: prefix for the redis keys. Defaults to the function name
+        :param redis_kwargs: passed to `redis.asyncio.Redis`
+        :param retry_seconds: how long to skip redis after it fails to respond
+        """
+        super().__init__(
+            time_to_live=time_to_live, maxsize=maxsize, skip_args=skip_args
+        )
+        self.time_to_live = time_to_live
+        self.namespace = namespace
+        self.redis_kwargs = redis_kwargs or dict(
+            host="redis", port=6379, db=9, socket_timeout=1, socket_connect_timeout=1,
+        )
+        # redis.asyncio connections belong to the loop that opened them, and each
+        # `asyncio.run` makes a new loop.
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.retry_seconds = retry_seconds
+        self._skip_until = 0.0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._skip_until
+
+    def _unavailable(self, e: Exception) -> None:
+        logger.warning(
+            f"async redis cache unavailable, skipping it for "
+            f"{self.retry_seconds}s: {e!r}"
+        )
+        metrics.incr("async_redis_ttl", "unavailable")
+        self._skip_until = time.monotonic() + self.retry_seconds
+
+    def _client(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = aioredis.Redis(**self.redis_kwargs)
+        return client
+
+    def _redis_key(self, namespace: str, key: KEY) -> str:
+        return f"async_ttl:{namespace}:{key.digest}"
+
+    async def _redis_get(self, rkey: str) -> Tuple[Any, Optional[float]]:
+        if not self._available():
+            return None, None
+        try:
+            async with self._client().pipeline(transaction=False) as pipe:
+                pipe.get(rkey)
+                pipe.pttl(rkey)
+                raw, pttl = await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._unavailable(e)
+            return None, None
+
+        if raw is None:
+            return None, None
+
+        ttl = pttl / 1000 if pttl and pttl > 0 else None
+        return orjson.loads(codecs.decode(raw)), ttl
+
+    async def _redis_set(self, rkey: str, value: Any) -> None:
+        if not self._available():
+            return
+        try:
+            data = orjson.dumps(value)
+        except TypeError:  # pragma: no cover
+            return
+
+        px = None if self.time_to_live is None else int(self.time_to_live * 1000)
+        try:
+            await self._client().set(
+                rkey, codecs.encode(data, min_size=1024 * 16), px=px
+            )
+        except (RedisError, OSError) as e:
+            self._unavailable(e)
+
+    def __call__(self, func):
+        namespace = self.namespace or f"{func.__module__}.{func.__name__}"
+
+        async def wrapper(*args, **kwargs):
+            key = KEY(args[self.skip_args :], kwargs)
+            if key in self.ttl:
+                logger.info(f"cache hit key: {key}")
+                metrics.incr(func.__name__, "hits")
+                return self.ttl[key]
+
+            async def _call():
+                rkey = self._redis_key(namespace, key)
+                val, ttl = await self._redis_get(rkey)
+
+                if val is not None:
+                    logger.info(f"redis cache hit key: {key}")
+                    metrics.incr(func.__name__, "hits")
+                    metrics.incr(func.__name__, "redis_hits")
+                    self.ttl.set(key, val, time_to_live=ttl)
+                    return val
+
+                logger.info(f"cache miss key: {key}")
+                start = time.perf_counter()
+                val = await func(*args, **kwargs)
+                metrics.observe(func.__name__, time.perf_counter() - start)
+                metrics.incr(func.__name__, "misses")
+                self.ttl[key] = val
+                if val is not None:
+                    await self._redis_set(rkey, val)
+
+                return val
+
+            return await self.inflight.run(key, _call, name=func.__name__)
+
+        wrapper.__name__ += func.__name__
+
+        return wrapper
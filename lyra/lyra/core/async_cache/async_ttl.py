@@ -1,6 +1,10 @@
 import datetime
 import logging
+import time
 
+from lyra.core.metrics import registry as metrics
+
+from .inflight import InFlight
 from .key import KEY
 from .lru import LRU
 
@@ -41,6 +45,16 @@ class AsyncTTL:
             )
             super().__setitem__(key, (value, ttl_value))
 
+        def set(self, key, value, time_to_live=None):
+            """set an entry with its own time to live in seconds."""
+            if time_to_live is None:
+                self[key] = value
+            else:
+                ttl_value = datetime.datetime.now() + datetime.timedelta(
+                    seconds=time_to_live
+                )
+                super().__setitem__(key, (value, ttl_value))
+
     def __init__(
         self, time_to_live: float = 60, maxsize: float = 1024, skip_args: int = 0
     ) -> None:
@@ -51,19 +65,25 @@ class AsyncTTL:
         """
         self.ttl = self._TTL(time_to_live=time_to_live, maxsize=maxsize)
         self.skip_args = skip_args
+        self.inflight = InFlight()
 
     def __call__(self, func):
         async def wrapper(*args, **kwargs):
             key = KEY(args[self.skip_args :], kwargs)
             if key in self.ttl:
                 logger.info(f"cache hit key: {key}")
-                val = self.ttl[key]
-            else:
+                metrics.incr(func.__name__, "hits")
+                return self.ttl[key]
+
+            async def _call():
                 logger.info(f"cache miss key: {key}")
+                start = time.perf_counter()
                 self.ttl[key] = await func(*args, **kwargs)
-                val = self.ttl[key]
+                metrics.observe(func.__name__, time.perf_counter() - start)
+                metrics.incr(func.__name__, "misses")
+                return self.ttl[key]
 
-            return val
+            return await self.inflight.run(key, _call, name=func.__name__)
 
         wrapper.__name__ += func.__name__
 
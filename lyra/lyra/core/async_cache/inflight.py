@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from lyra.core.metrics import registry as metrics
+
+
+class InFlight:
+    """Coalesce concurrent calls for the same key onto one shared future.
+
+    The first caller for a key runs the coroutine; everyone who arrives while
+    it is running awaits its result. Exceptions are raised to every waiter and
+    nothing is remembered once the call finishes, so failures are never cached.
+    """
+
+    def __init__(self) -> None:
+        # futures belong to a loop, and sync routes may each be running their own
+        # loop in the threadpool, so calls are only coalesced within a loop.
+        self._futures: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], Any] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    async def run(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[Any]],
+        name: Optional[str] = None,
+    ) -> Any:
+        """
+        :param name: function name to count coalesced calls against in the metrics
+        """
+        loop = asyncio.get_running_loop()
+        k = (loop, key)
+
+        fut = self._futures.get(k)
+        if fut is not None:
+            self.coalesced += 1
+            if name is not None:
+                metrics.incr(name, "coalesced")
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if fut.cancelled():  # the leader was cancelled, not us.
+                    return await self.run(key, call, name)
+                raise
+
+        fut = loop.create_future()
+        self._futures[k] = fut
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark as retrieved in case no one else was waiting.
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            del self._futures[k]
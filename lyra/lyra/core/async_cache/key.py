@@ -1,23 +1,25 @@
+import hashlib
+
+from lyra.core.keys import canonical_bytes
+
+
 class KEY:
     def __init__(self, *args, **kwargs):
         self.args = args
         self.kwargs = kwargs
+        # a stable, canonical form of the arguments so that equal keys are
+        # really equal rather than merely sharing a hash.
+        self._canonical = canonical_bytes(args, kwargs)
 
     def __eq__(self, obj):
-        return hash(self) == hash(obj)
+        return isinstance(obj, KEY) and self._canonical == obj._canonical
 
     def __hash__(self):
-        def _hash(param):
-            if isinstance(param, tuple):
-                return tuple(map(_hash, param))
-            if isinstance(param, dict):
-                return tuple(map(_hash, param.items()))
-            elif hasattr(param, "__dict__"):
-                return str(vars(param))
-            else:
-                return str(param)
+        return hash(self._canonical)
 
-        return hash(_hash(self.args) + _hash(self.kwargs))
+    @property
+    def digest(self):
+        return hashlib.sha256(self._canonical).hexdigest()
 
     def __repr__(self):
         return f"KEY({self.args}, {self.kwargs})"
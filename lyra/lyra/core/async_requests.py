@@ -1,15 +1,229 @@
-from typing import Any, Dict
+"""Pooled http requests.
+
+Every request in a process goes through one `aiohttp.ClientSession` that lives
+on its own event loop in a background thread. Callers may be on any loop (each
+`asyncio.run` makes a new one), and they all share the same keep-alive
+connections and dns cache instead of paying for a new connection every call.
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+from typing import Any, Callable, Coroutine, Dict, Optional
 
 import aiohttp
 import orjson
+from tenacity import (
+    AsyncRetrying,
+    before_sleep_log,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from lyra.core.breaker import CircuitBreaker
+from lyra.core.config import settings
+from lyra.core.limiter import AIMDLimiter
+
+logger = logging.getLogger(__name__)
+
+
+_pool: Dict[str, Any] = {"pid": None, "loop": None, "thread": None, "session": None}
+_pool_lock = threading.Lock()
+
 
+async def _make_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=settings.HTTP_POOL_LIMIT,
+        limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.HTTP_TIMEOUT_TOTAL, connect=settings.HTTP_TIMEOUT_CONNECT
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        json_serialize=lambda x: orjson.dumps(x).decode(),
+    )
 
-async def send_request(url: str, payload: Dict, delay: float = None) -> Dict[str, Any]:
-    async with aiohttp.ClientSession(
-        json_serialize=lambda x: orjson.dumps(x).decode()
-    ) as session:
-        async with session.post(url, json=payload) as response:
-            result: Dict[str, Any] = await response.json(
-                loads=orjson.loads, content_type=None
+
+def _pool_loop() -> asyncio.AbstractEventLoop:
+    """start the pool's loop and session if this process doesn't have one yet."""
+
+    def _running():
+        thread = _pool["thread"]
+        return (
+            _pool["pid"] == os.getpid()  # we may have been forked by gunicorn
+            and thread is not None
+            and thread.is_alive()
+        )
+
+    if _running():
+        return _pool["loop"]
+
+    with _pool_lock:
+        if not _running():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="async_requests", daemon=True
             )
+            thread.start()
+            session = asyncio.run_coroutine_threadsafe(_make_session(), loop).result()
+            _pool.update(pid=os.getpid(), loop=loop, thread=thread, session=session)
+            logger.debug("started pooled http session")
+
+    return _pool["loop"]
+
+
+def close_pool(timeout: float = 5) -> None:
+    """close the pooled session and stop its loop. A later request starts a new one."""
+    with _pool_lock:
+        loop, thread, session = _pool["loop"], _pool["thread"], _pool["session"]
+        if _pool["pid"] != os.getpid() or thread is None or not thread.is_alive():
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout)
+        except Exception as e:  # pragma: no cover
+            logger.warning(f"unable to close pooled http session: {e!r}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():  # pragma: no branch
+            loop.close()
+        _pool.update(pid=None, loop=None, thread=None, session=None)
+        logger.debug("closed pooled http session")
+
+
+atexit.register(close_pool)
+
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    """run a coroutine on the pool's loop without waiting for it.
+
+    Unlike a task on the caller's loop, it isn't cancelled when an `asyncio.run`
+    that started it returns, e.g., for background refreshes of a cache.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _pool_loop())
+
+
+# responses worth retrying; the rest are returned as they are.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def is_transient(e: BaseException) -> bool:
+    """whether a failed request might succeed if it is tried again."""
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status in RETRY_STATUSES
+    return isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+# makes an object with `feed(chunk)` and `close() -> result` methods from the
+# response's content length, to decode a response as it arrives.
+Decoder = Callable[[Optional[int]], Any]
+
+STREAM_CHUNK_BYTES = 2 ** 16
+
+
+async def _post(
+    url: str,
+    payload: Dict,
+    timeout: Optional[float] = None,
+    decoder: Optional[Decoder] = None,
+) -> Dict[str, Any]:
+    kwargs = {} if timeout is None else {"timeout": aiohttp.ClientTimeout(timeout)}
+    async with _pool["session"].post(url, json=payload, **kwargs) as response:
+        if response.status in RETRY_STATUSES:
+            response.raise_for_status()
+
+        if decoder is not None:
+            stream = decoder(response.content_length)
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_BYTES):
+                stream.feed(chunk)
+            streamed: Dict[str, Any] = stream.close()
+            return streamed
+
+        result: Dict[str, Any] = await response.json(
+            loads=orjson.loads, content_type=None
+        )
     return result
+
+
+async def _send(
+    url: str,
+    payload: Dict,
+    limiter: Optional[AIMDLimiter],
+    attempts: int,
+    attempt_timeout: Optional[float],
+    decoder: Optional[Decoder],
+) -> Dict[str, Any]:
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(attempts),
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        retry=retry_if_exception(is_transient),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+    async for attempt in retrying:
+        with attempt:
+            if limiter is None:
+                return await _post(url, payload, attempt_timeout, decoder)
+            async with limiter.slot():
+                return await _post(url, payload, attempt_timeout, decoder)
+
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+async def _send_within(
+    deadline: Optional[float], breaker: Optional[CircuitBreaker], *args: Any
+) -> Dict[str, Any]:
+    coro = _send(*args)
+    if deadline is not None:
+        coro = asyncio.wait_for(coro, deadline)
+    if breaker is None:
+        return await coro
+
+    try:
+        result = await coro
+    except Exception as e:
+        if is_transient(e):
+            breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
+
+
+async def send_request(
+    url: str,
+    payload: Dict,
+    limiter: Optional[AIMDLimiter] = None,
+    attempts: int = 1,
+    attempt_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    decoder: Optional[Decoder] = None,
+) -> Dict[str, Any]:
+    """post `payload` to `url` and return the json response.
+
+    :param limiter: limits the concurrent requests to this service
+    :param attempts: tries for transient errors, with jittered exponential backoff
+    :param attempt_timeout: seconds allowed for each try
+    :param deadline: seconds allowed for the whole call, including the time spent
+        waiting on the limiter and between tries
+    :param breaker: fail fast with `CircuitOpenError` while this service is down
+    :param decoder: decode the response as it arrives instead of as json, e.g.,
+        `lyra.src.hydstra.stream.TraceDecoder`
+    """
+    if breaker is not None:
+        breaker.check()
+
+    coro = _send_within(
+        deadline, breaker, url, payload, limiter, attempts, attempt_timeout, decoder
+    )
+    future = asyncio.run_coroutine_threadsafe(coro, _pool_loop())
+    # cancelling the caller cancels the request on the pool's loop too.
+    return await asyncio.wrap_future(future)
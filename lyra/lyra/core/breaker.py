@@ -0,0 +1,110 @@
+"""Circuit breaker for a remote service.
+
+After `failure_threshold` calls in a row fail in a way that suggests the
+service is down, the breaker opens and calls fail fast with `CircuitOpenError`
+instead of waiting on their timeouts. While it is open, a background task
+calls `probe` every `probe_interval` seconds, and closes the breaker again as
+soon as a probe succeeds.
+
+Like `lyra.core.limiter`, a breaker passed to `lyra.core.async_requests`
+records its results from the pool's loop, which makes it process-wide.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from lyra.core.errors import CircuitOpenError
+from lyra.core.metrics import registry as metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN = "closed", "open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Awaitable[Any]],
+        failure_threshold: int = 5,
+        probe_interval: float = 30,
+    ):
+        """
+        :param name: name for the metrics and messages
+        :param probe: coroutine function that raises if the service is still down
+        :param failure_threshold: open after this many failures in a row
+        :param probe_interval: seconds between probes while open
+        """
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Future] = set()  # keep a reference until done
+        self._publish()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "open_seconds": None
+            if self.opened_at is None
+            else round(time.monotonic() - self.opened_at, 1),
+        }
+
+    def _publish(self) -> None:
+        for field, value in self.stats().items():
+            metrics.set(f"{self.name}_breaker", field, value)
+
+    def check(self) -> None:
+        """raise `CircuitOpenError` if calls should not be sent right now."""
+        if self.state == OPEN:
+            metrics.incr(f"{self.name}_breaker", "rejected")
+            raise CircuitOpenError(
+                f"{self.name} is unavailable", data=self.stats(),
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state == OPEN:
+                logger.warning(f"{self.name} circuit breaker closed")
+            self.state = CLOSED
+            self.opened_at = None
+        self._publish()
+
+    def record_failure(self) -> None:
+        """count a failure; this must be called from a running event loop."""
+        with self._lock:
+            self.failures += 1
+            trip = self.state == CLOSED and self.failures >= self.failure_threshold
+            if trip:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+        self._publish()
+
+        if trip:
+            logger.warning(
+                f"{self.name} circuit breaker opened after {self.failures} failures"
+            )
+            metrics.incr(f"{self.name}_breaker", "opened")
+            task = asyncio.ensure_future(self._probe_until_closed())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _probe_until_closed(self) -> None:
+        while self.state == OPEN:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                metrics.incr(f"{self.name}_breaker", "failed_probes")
+                logger.info(f"{self.name} probe failed: {e!r}")
+                self._publish()
+            else:
+                self.record_success()
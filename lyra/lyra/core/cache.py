@@ -1,10 +1,22 @@
 import functools
-import hashlib
+import heapq
+import importlib
 import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import orjson
 import redis
+from redis.exceptions import LockError
 
+from lyra.core import codecs, keys
+from lyra.core.config import settings
+from lyra.core.local_cache import LocalCache
+from lyra.core.metrics import registry as metrics
 from lyra.models.response_models import CachedJSONResponse
 
 logger = logging.getLogger(__name__)
@@ -13,13 +25,127 @@ logger = logging.getLogger(__name__)
 redis_cache = redis.Redis(host="redis", port=6379, db=9)
 _global_cache = {}
 
+# values cached by `mem_cache` when redis isn't available.
+_mem_cache = LocalCache(maxsize=None, maxbytes=settings.MEM_CACHE_MAXBYTES)
+
 CAN_CACHE = False
 
+# stale-while-revalidate refreshes run here unless they are sent to celery.
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rcache")
+
+# in-process (L1) caches are kept coherent across processes by publishing
+# invalidation messages on this channel.
+INVALIDATION_CHANNEL = "rcache:invalidate"
+_PROCESS_ID = uuid.uuid4().hex
+_l1_caches: List[LocalCache] = []
+_listener: Dict[str, Any] = {"pid": None, "thread": None}
+_listener_lock = threading.Lock()
+
+# local copy of the CACHE_ENDABLED flag so that every call isn't a round trip.
+_cache_enabled = LocalCache(maxsize=1, ttl=30)
+
+# the data sources that cached values may depend on. Cache keys are stamped with
+# the current version of each source they depend on, so bumping a version only
+# makes the dependent keys stale and the rest of the cache survives.
+DATA_SOURCES = ("drooltool", "rsb", "hydstra_sites")
+_versions = LocalCache(maxsize=None, ttl=30)
+_dependents: Dict[str, Set[str]] = {source: set() for source in DATA_SOURCES}
+
+
+def _clear_local_caches() -> None:
+    for l1 in _l1_caches:
+        l1.clear()
+    _cache_enabled.clear()
+    _mem_cache.clear()
+    _versions.clear()
+
+
+def _origin() -> str:
+    # processes forked after import (e.g., by celery or a preloading gunicorn)
+    # share _PROCESS_ID, but not their pid.
+    return f"{os.getpid()}:{_PROCESS_ID}"
+
+
+def _publish(**message: Any) -> None:
+    message["origin"] = _origin()
+    try:
+        redis_cache.publish(INVALIDATION_CHANNEL, orjson.dumps(message))
+    except redis.ConnectionError:  # pragma: no cover
+        pass
+
+
+def _on_invalidate(message: Dict[str, Any]) -> None:
+    msg = orjson.loads(message["data"])
+    op = msg.get("op")
+
+    if op == "flush":
+        _clear_local_caches()
+
+    elif op == "toggle":
+        _cache_enabled.set("CACHE_ENDABLED", msg["state"])
+
+    elif op == "version":
+        _versions.set(msg["source"], msg["version"])
+
+    elif op == "delete" and msg.get("origin") != _origin():
+        for l1 in _l1_caches:
+            l1.delete(msg["key"])
+
+
+def _listen_for_invalidations() -> bool:
+    """ensure this process is subscribed to cache invalidation messages.
+
+    Returns False if we can't subscribe, in which case the in-process caches
+    could serve stale data and must be bypassed.
+    """
+
+    def _listening():
+        thread = _listener["thread"]
+        return (
+            _listener["pid"] == os.getpid()  # we may have been forked by gunicorn
+            and thread is not None
+            and thread.is_alive()
+        )
+
+    if _listening():
+        return True
+
+    with _listener_lock:
+        if _listening():  # pragma: no cover
+            return True
+        try:
+            pubsub = redis_cache.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidate})
+            thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except redis.ConnectionError:  # pragma: no cover
+            return False
+
+        # anything cached before we were listening may have missed a message.
+        _clear_local_caches()
+        _listener.update(pid=os.getpid(), thread=thread)
+
+    return True
+
+
+def _is_cache_enabled() -> bool:
+    listening = _listen_for_invalidations()
+    if listening:
+        enabled = _cache_enabled.get("CACHE_ENDABLED")
+        if enabled is not None:
+            return enabled
+
+    enabled = orjson.loads(redis_cache.get("CACHE_ENDABLED") or b"true")
+    if listening:
+        _cache_enabled.set("CACHE_ENDABLED", enabled)
+    return enabled
+
 
 def flush():  # pragma: no cover
     try:
         if redis_cache.ping():
             redis_cache.flushdb()
+            _clear_local_caches()
+            _publish(op="flush")
             logger.debug("flushed redis function cache")
     except redis.ConnectionError:
         pass
@@ -30,12 +156,205 @@ def use_cache(state: bool = True) -> None:  # pragma: no cover
     try:
         if redis_cache.ping():
             redis_cache.set("CACHE_ENDABLED", orjson.dumps(state))
+            _cache_enabled.set("CACHE_ENDABLED", state)
+            _publish(op="toggle", state=state)
             logger.debug("flushed redis function cache")
     except redis.ConnectionError:
         _global_cache["CACHE_ENDABLED"] = orjson.dumps(state)
         pass
 
 
+def _version_key(source: str) -> str:
+    return f"rcache:version:{source}"
+
+
+def get_versions(sources: Iterable[str]) -> Dict[str, int]:
+    """fetch the current data version of each source. Sources that have never
+    been bumped are at version 0.
+    """
+    sources = sorted(sources)
+    listening = _listen_for_invalidations()
+    versions = {}
+    if listening:
+        versions = {s: _versions.get(s) for s in sources}
+        versions = {s: v for s, v in versions.items() if v is not None}
+
+    missing = [s for s in sources if s not in versions]
+    if missing:
+        values = redis_cache.mget([_version_key(s) for s in missing])
+        for source, value in zip(missing, values):
+            versions[source] = int(value or 0)
+            if listening:
+                _versions.set(source, versions[source])
+
+    return versions
+
+
+def _purge_namespace(namespace: str) -> int:
+    deleted = 0
+    batch: List[bytes] = []
+    for k in redis_cache.scan_iter(match=f"rcache:{namespace}:*", count=1000):
+        if not k.endswith(b":lock"):  # leave in-flight computations alone
+            batch.append(k)
+        if len(batch) >= 1000:
+            deleted += redis_cache.unlink(*batch)
+            batch = []
+    if batch:
+        deleted += redis_cache.unlink(*batch)
+    return deleted
+
+
+def bump_version(source: str, purge: bool = True) -> Optional[int]:
+    """mark every cached value that depends on `source` as stale.
+
+    :param purge: also delete the dependent values so they don't linger until
+        they expire, which for `ex=None` would be forever. Only the functions
+        imported by this process are known to depend on `source`.
+    """
+    if source not in DATA_SOURCES:
+        raise ValueError(f"unknown data source '{source}'. Use one of {DATA_SOURCES}")
+
+    try:
+        version: int = redis_cache.incr(_version_key(source))
+        _versions.set(source, version)
+        _publish(op="version", source=source, version=version)
+        logger.info(f"bumped {source} data version to {version}")
+
+        if purge:
+            for namespace in sorted(_dependents[source]):
+                deleted = _purge_namespace(namespace)
+                logger.debug(f"purged {deleted} keys from {namespace}")
+
+    except redis.ConnectionError:  # pragma: no cover
+        return None
+
+    return version
+
+
+def _incr_stat(name: str, field: str, amount: int = 1) -> None:
+    try:
+        redis_cache.hincrby(f"rcache:stats:{name}", field, amount)
+    except redis.ConnectionError:  # pragma: no cover
+        pass
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """fetch the per-function counters recorded by the redis cache decorator, and
+    the occupancy of this process's `mem_cache` fallback under 'mem_cache'.
+    """
+    stats: Dict[str, Dict[str, Any]] = {"mem_cache": _mem_cache.stats()}
+    try:
+        for stats_key in redis_cache.scan_iter("rcache:stats:*"):
+            name = stats_key.decode().split(":", 2)[-1]
+            stats[name] = {
+                k.decode() if isinstance(k, bytes) else k: int(v)
+                for k, v in redis_cache.hgetall(stats_key).items()
+            }
+            if stats[name].get("codec_stored_bytes"):
+                stats[name]["codec_compression_ratio"] = (
+                    stats[name]["codec_raw_bytes"] / stats[name]["codec_stored_bytes"]
+                )
+    except redis.ConnectionError:  # pragma: no cover
+        pass
+    return stats
+
+
+# suffixes of the bookkeeping keys that live next to each cached value.
+_AUX_SUFFIXES = (":lock", ":fresh", ":refresh")
+_META_PREFIXES = ("rcache:stats:", "rcache:version:")
+_KEY_PATTERNS = ("rcache:*", "async_ttl:*")
+
+
+def _split_key(key: str) -> Optional[List[str]]:
+    if key.startswith(_META_PREFIXES) or key.endswith(_AUX_SUFFIXES):
+        return None
+    namespace, _, digest = key.rpartition(":")
+    return [namespace, digest] if namespace else None
+
+
+def inspect_keys(
+    top: int = 10, namespace: Optional[str] = None, max_keys: int = 10000
+) -> Dict[str, Any]:
+    """summarize the cached values in redis per function namespace, including
+    the `top` largest values and their remaining ttl in seconds.
+
+    At most `max_keys` keys are scanned so that this is safe to call against a
+    large cache.
+    """
+    patterns: Tuple[str, ...] = _KEY_PATTERNS
+    if namespace is not None:
+        patterns = tuple(f"{p[:-1]}{namespace}:*" for p in _KEY_PATTERNS)
+
+    found: List[List[str]] = []
+    truncated = False
+    try:
+        for pattern in patterns:
+            for k in redis_cache.scan_iter(match=pattern, count=1000):
+                split = _split_key(k.decode())
+                if split is None:
+                    continue
+                if len(found) >= max_keys:
+                    truncated = True
+                    break
+                found.append(split)
+
+        with redis_cache.pipeline(transaction=False) as pipe:
+            for ns, digest in found:
+                pipe.strlen(f"{ns}:{digest}")
+                pipe.ttl(f"{ns}:{digest}")
+            sizes = pipe.execute()
+    except redis.ConnectionError:  # pragma: no cover
+        return {"scanned": 0, "truncated": False, "namespaces": {}}
+
+    entries: Dict[str, List[Dict[str, Any]]] = {}
+    for (ns, digest), size, ttl in zip(found, sizes[::2], sizes[1::2]):
+        entries.setdefault(ns, []).append(
+            {"key": digest, "bytes": size, "ttl": ttl if ttl >= 0 else None}
+        )
+
+    namespaces = {
+        ns: {
+            "keys": len(values),
+            "bytes": sum(v["bytes"] for v in values),
+            "top": heapq.nlargest(top, values, key=lambda v: v["bytes"]),
+        }
+        for ns, values in sorted(entries.items())
+    }
+
+    return {"scanned": len(found), "truncated": truncated, "namespaces": namespaces}
+
+
+def _to_bytes(result: Any) -> Any:
+    # redis returns bytes on a hit, so make sure a miss returns the same.
+    if isinstance(result, str):
+        return result.encode("utf-8")
+    return result
+
+
+def _wait_for_result(
+    cache: redis.Redis, key: str, lock_name: str, wait_timeout: float
+) -> Optional[bytes]:
+    """poll for a result that is being computed by the caller holding `lock_name`.
+
+    Returns None if the lock holder gives up without caching a result or if we
+    run out of patience, in which case the caller should compute it themselves.
+    """
+
+    t = 0.0
+    inc = 0.05  # check back every inc seconds, backing off up to 1 second
+    while t < wait_timeout:
+        result = cache.get(key)
+        if isinstance(result, bytes):
+            return codecs.decode(result)
+        if not cache.exists(lock_name):
+            result = cache.get(key)
+            return codecs.decode(result) if isinstance(result, bytes) else None
+        time.sleep(inc)
+        t += inc
+        inc = min(inc * 1.5, 1.0)
+    return None
+
+
 def _get_result(obj, ex, as_response, cache_enabled, *args, **kwargs):
     errors = None
     result = b"null"
@@ -58,92 +377,283 @@ def _get_result(obj, ex, as_response, cache_enabled, *args, **kwargs):
             raise e
 
     if as_response:
-        data = orjson.loads(result)
-        response = CachedJSONResponse(
-            process_type=process_type, data=data, expires_after=ex, errors=errors
-        ).dict()
-        result = orjson.dumps(response)
+        result = _as_response(result, ex, process_type)
 
     return result
 
 
+def _as_response(result, ex, process_type):
+    data = orjson.loads(result)
+    response = CachedJSONResponse(
+        process_type=process_type, data=data, expires_after=ex
+    ).dict()
+    return orjson.dumps(response)
+
+
+def _namespace(obj: Callable) -> str:
+    return f"{obj.__module__}.{obj.__qualname__}"
+
+
+def _make_key(
+    obj: Callable,
+    args: Tuple,
+    kwargs: Dict[str, Any],
+    unordered: Optional[Iterable[str]] = None,
+    versions: Optional[Dict[str, int]] = None,
+) -> str:
+    # hashing the key also keeps the server-side filepaths hidden. The prefix lets
+    # `inspect_keys` group the values by function.
+    namespace = _namespace(obj)
+    stamped = namespace
+    if versions:
+        stamped += "@" + ",".join(f"{s}={v}" for s, v in sorted(versions.items()))
+    return f"rcache:{namespace}:{keys.make_key(stamped, args, kwargs, unordered)}"
+
+
+def refresh_cached_function(module: str, name: str, args: list, kwargs: dict) -> None:
+    """recompute and re-cache a stale entry for the rcache decorated `module.name`"""
+    func = getattr(importlib.import_module(module), name)
+    func.refresh(*args, **kwargs)
+
+
 def rcache(**rkwargs):
     _24hrs = 3600 * 24
     ex = rkwargs.pop("ex", _24hrs)  # default expire within 24 hours
     as_response = rkwargs.pop("as_response", False)
 
+    # single flight: only one caller across all processes computes a missing key.
+    # The rest wait for it to land in redis rather than stampeding the source.
+    single_flight = rkwargs.pop("single_flight", True)
+    lock_timeout = rkwargs.pop("lock_timeout", 120)  # seconds
+    wait_timeout = rkwargs.pop("wait_timeout", lock_timeout)
+
+    # stale while revalidate: after `stale_after` seconds (the soft ttl) a hit is
+    # still served, but one refresh is scheduled to recompute it in the background.
+    # `ex` remains the hard ttl after which the entry is gone.
+    stale_after = rkwargs.pop("stale_after", None)
+    refresh_in = rkwargs.pop("refresh_in", "thread")  # or "celery"
+
+    # values at least `compress_min_bytes` long are compressed before they are
+    # sent to redis; see `lyra.core.codecs`.
+    codec = rkwargs.pop("codec", codecs.DEFAULT_CODEC)
+    compress_min_bytes = rkwargs.pop("compress_min_bytes", 1024 * 16)
+
+    # optional in-process (L1) cache in front of redis for small, hot keys.
+    l1_ttl = rkwargs.pop("l1_ttl", None)  # seconds; None disables the L1 cache
+    l1_maxsize = rkwargs.pop("l1_maxsize", 128)
+
+    # names of list kwargs whose order doesn't change the result, e.g., 'catchidns'
+    unordered = rkwargs.pop("unordered", None)
+
+    # the DATA_SOURCES whose version is stamped on each key; see `bump_version`.
+    depends_on = rkwargs.pop("depends_on", None) or []
+    unknown = set(depends_on) - set(DATA_SOURCES)
+    assert not unknown, f"unknown data sources {unknown}. Use any of {DATA_SOURCES}"
+
+    if l1_ttl is not None and ex is not None:
+        l1_ttl = min(l1_ttl, ex)
+
     def _rcache(obj):
         cache = redis_cache
 
+        for source in depends_on:
+            _dependents[source].add(_namespace(obj))
+
+        def _key(args: Tuple, kwargs: Dict[str, Any]) -> str:
+            versions = get_versions(depends_on) if depends_on else None
+            return _make_key(obj, args, kwargs, unordered, versions)
+
+        l1 = None
+        if l1_ttl is not None:
+            l1 = LocalCache(maxsize=l1_maxsize, ttl=l1_ttl)
+            _l1_caches.append(l1)
+
+        def _set(key: str, result: bytes) -> None:
+            encoded = codecs.encode(result, codec=codec, min_size=compress_min_bytes)
+            stats_key = f"rcache:stats:{obj.__name__}"
+            with cache.pipeline() as pipe:
+                pipe.set(key, encoded, ex=ex)
+                pipe.hincrby(stats_key, "codec_raw_bytes", len(result))
+                pipe.hincrby(stats_key, "codec_stored_bytes", len(encoded))
+                if stale_after is not None:
+                    pipe.set(f"{key}:fresh", b"1", ex=stale_after)
+                if l1 is not None:
+                    msg = orjson.dumps(dict(op="delete", key=key, origin=_PROCESS_ID))
+                    pipe.publish(INVALIDATION_CHANNEL, msg)
+                pipe.execute()
+
+        def _compute(key, cache_enabled, *args, **kwargs):
+            start = time.perf_counter()
+            result = _to_bytes(
+                _get_result(obj, ex, as_response, cache_enabled, *args, **kwargs)
+            )
+            metrics.observe(obj.__name__, time.perf_counter() - start)
+            metrics.incr(obj.__name__, "misses")
+            _set(key, result)
+            return result
+
+        def _hit(result, source):
+            metrics.incr(obj.__name__, "hits")
+            metrics.incr(obj.__name__, f"{source}_hits")
+            metrics.incr(obj.__name__, "bytes_served", len(result))
+            return result
+
+        def refresh(*args, **kwargs):
+            key = _key(args, kwargs)
+            try:
+                result = obj(*args, **kwargs)
+                if as_response:
+                    result = _as_response(result, ex, "cached")
+                # a failed refresh leaves the stale entry in place.
+                _set(key, _to_bytes(result))
+                _incr_stat(obj.__name__, "swr_refreshed")
+            except Exception as e:
+                logger.warning(f"redis cache refresh failed {key}: {e!r}")
+                _incr_stat(obj.__name__, "swr_refresh_failed")
+            finally:
+                cache.delete(f"{key}:refresh")
+
+        def _schedule_refresh(key, *args, **kwargs):
+            # only one refresh per stale key, across all processes.
+            if not cache.set(f"{key}:refresh", b"1", nx=True, ex=lock_timeout):
+                return
+
+            logger.debug(f"redis cache stale, scheduling refresh {key}")
+            _incr_stat(obj.__name__, "swr_stale_hit")
+
+            if refresh_in == "celery":
+                try:
+                    from lyra.bg_worker import background_refresh_cached_function
+
+                    background_refresh_cached_function.apply_async(
+                        args=(obj.__module__, obj.__name__, list(args), kwargs)
+                    )
+                    return
+                except Exception as e:  # pragma: no cover
+                    # e.g., the args aren't json serializable or the broker is down.
+                    logger.warning(f"unable to send refresh to celery: {e!r}")
+
+            _refresh_executor.submit(refresh, *args, **kwargs)
+
+        def _get_or_compute(key, cache_enabled, *args, **kwargs):
+            if stale_after is None:
+                result = cache.get(key)
+            else:
+                with cache.pipeline() as pipe:
+                    pipe.get(key)
+                    pipe.exists(f"{key}:fresh")
+                    result, is_fresh = pipe.execute()
+                if result is not None and not is_fresh:
+                    _schedule_refresh(key, *args, **kwargs)
+
+            if isinstance(result, bytes):
+                logger.debug(f"redis hit cache {key}")
+                return _hit(codecs.decode(result), "redis")
+
+            logger.debug(f"redis cache miss {key}")
+
+            if not single_flight:
+                return _compute(key, cache_enabled, *args, **kwargs)
+
+            lock_name = f"{key}:lock"
+            lock = cache.lock(lock_name, timeout=lock_timeout)
+
+            if lock.acquire(blocking=False):
+                _incr_stat(obj.__name__, "single_flight_leader")
+                try:
+                    return _compute(key, cache_enabled, *args, **kwargs)
+                finally:
+                    try:
+                        lock.release()
+                    except LockError:  # pragma: no cover
+                        # the lock timed out while we were computing.
+                        pass
+
+            logger.debug(f"redis cache waiting on single flight {key}")
+            _incr_stat(obj.__name__, "single_flight_waiter")
+
+            result = _wait_for_result(cache, key, lock_name, wait_timeout)
+
+            if result is not None:
+                _incr_stat(obj.__name__, "single_flight_coalesced")
+                return _hit(result, "redis")
+
+            # the leader failed or is taking too long, so compute it ourselves.
+            _incr_stat(obj.__name__, "single_flight_fallback")
+            return _compute(key, cache_enabled, *args, **kwargs)
+
         @functools.wraps(obj)
         def memoizer(*args, **kwargs):
-            cache_enabled = orjson.loads(cache.get("CACHE_ENDABLED") or b"true")
+            cache_enabled = _is_cache_enabled()
 
             if not cache_enabled:
+                metrics.incr(obj.__name__, "bypassed")
                 return _get_result(obj, ex, as_response, cache_enabled, *args, **kwargs)
 
-            sorted_kwargs = {k: kwargs[k] for k in sorted(kwargs.keys())}
+            key = _key(args, kwargs)
 
-            logger.info("cached call: " + obj.__name__ + str(args) + str(sorted_kwargs))
+            logger.info(f"cached call: {obj.__name__} {key}")
 
-            # hashing the key may not be necessary, but it keeps the server-side filepaths hidden
-            key = hashlib.sha256(
-                (obj.__name__ + str(args) + str(sorted_kwargs)).encode("utf-8")
-            ).hexdigest()
+            use_l1 = l1 is not None and _listen_for_invalidations()
+            if use_l1 and l1 is not None:
+                result = l1.get(key)
+                if result is not None:
+                    logger.debug(f"local hit cache {key}")
+                    return _hit(result, "l1")
 
-            if cache.get(key) is None:
-                logger.debug(f"redis cache miss {key}")
+            result = _get_or_compute(key, cache_enabled, *args, **kwargs)
 
-                result = _get_result(
-                    obj, ex, as_response, cache_enabled, *args, **kwargs
-                )
+            if use_l1 and l1 is not None:
+                l1.set(key, result)
 
-                cache.set(key, result, ex=ex)
+            return result
 
-            else:
-                logger.debug(f"redis hit cache {key}")
-
-            return cache.get(key)
+        memoizer.refresh = refresh  # type: ignore
 
         return memoizer
 
     return _rcache
 
 
-def mem_cache(**rkwargs):  # pragma: no cover
+def mem_cache(**rkwargs):
+    """in-process fallback for when redis is unavailable. Entries are shared by
+    every decorated function and bounded by `settings.MEM_CACHE_MAXBYTES`.
+    """
+    _24hrs = 3600 * 24
+    ex = rkwargs.pop("ex", _24hrs)  # default expire within 24 hours
     as_response = rkwargs.pop("as_response", False)
-    ex = None
+    unordered = rkwargs.pop("unordered", None)
 
     def _rcache(obj):
-        cache = _global_cache
+        cache = _mem_cache
 
         @functools.wraps(obj)
         def memoizer(*args, **kwargs):
-            cache_enabled = orjson.loads(cache.get("CACHE_ENDABLED") or b"true")
+            cache_enabled = orjson.loads(_global_cache.get("CACHE_ENDABLED") or b"true")
             if not cache_enabled:
                 return _get_result(obj, ex, as_response, cache_enabled, *args, **kwargs)
-            sorted_kwargs = {k: kwargs[k] for k in sorted(kwargs.keys())}
-
-            logger.info("cached call: " + obj.__name__ + str(args) + str(sorted_kwargs))
+            key = _make_key(obj, args, kwargs, unordered)
 
-            # hashing the key may not be necessary, but it keeps the server-side filepaths hidden
-            key = hashlib.sha256(
-                (obj.__name__ + str(args) + str(sorted_kwargs)).encode("utf-8")
-            ).hexdigest()
+            logger.info(f"cached call: {obj.__name__} {key}")
 
-            if cache.get(key) is None:
+            result = cache.get(key)
+            if result is None:
                 logger.debug(f"mem_cache cache miss {key}")
 
+                start = time.perf_counter()
                 result = _get_result(
                     obj, ex, as_response, cache_enabled, *args, **kwargs
                 )
+                metrics.observe(obj.__name__, time.perf_counter() - start)
+                metrics.incr(obj.__name__, "misses")
 
-                cache[key] = result
+                cache.set(key, result, ex=ex)
 
             else:
                 logger.debug(f"mem_cache hit cache {key}")
+                metrics.incr(obj.__name__, "hits")
 
-            return cache.get(key)
+            return result
 
         return memoizer
 
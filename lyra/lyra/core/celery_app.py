@@ -74,6 +74,11 @@ if settings.ENABLE_BEAT_SCHEDULE:
             # daily at 6am
             "schedule": crontab(0, "6"),
         },
+        "sync-hydstra-store": {
+            "task": "lyra.bg_worker.background_sync_hydstra_store",
+            # hourly, at a quarter past
+            "schedule": crontab(minute=15),
+        },
     }
 
 else:
@@ -0,0 +1,100 @@
+"""Codecs for values stored in the redis function cache.
+
+Every encoded value starts with a single header byte identifying the codec
+that wrote it. Values cached before codecs existed have no header; their
+first byte is never one of the (non-printable) codec ids, so they are
+passed through as-is and remain readable.
+"""
+import zlib
+from typing import Dict
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class Codec:
+    name: str = ""
+    header: bytes = b""
+
+    def compress(self, data: bytes) -> bytes:  # pragma: no cover
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:  # pragma: no cover
+        raise NotImplementedError
+
+
+class IdentityCodec(Codec):
+    name = "identity"
+    header = b"\x00"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCodec(Codec):
+    name = "zlib"
+    header = b"\x01"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class BrotliCodec(Codec):
+    name = "brotli"
+    header = b"\x02"
+
+    def __init__(self, quality: int = 5):
+        # quality 11 is brotli's default but is far too slow for a cache write.
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.quality)
+
+    def decompress(self, data: bytes) -> bytes:
+        return brotli.decompress(data)
+
+
+CODECS: Dict[str, Codec] = {}
+_BY_HEADER: Dict[bytes, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    assert len(codec.header) == 1, "codec headers must be a single byte."
+    existing = _BY_HEADER.get(codec.header)
+    assert existing is None or existing.name == codec.name, "header already in use."
+    CODECS[codec.name] = codec
+    _BY_HEADER[codec.header] = codec
+
+
+register_codec(IdentityCodec())
+register_codec(ZlibCodec())
+if brotli is not None:  # pragma: no branch
+    register_codec(BrotliCodec())
+
+DEFAULT_CODEC = "brotli" if "brotli" in CODECS else "zlib"
+
+
+def encode(data: bytes, codec: str = DEFAULT_CODEC, min_size: int = 0) -> bytes:
+    """compress `data` with `codec` if it is at least `min_size` bytes and
+    prefix it with the codec header.
+    """
+    _codec = CODECS["identity"] if len(data) < min_size else CODECS[codec]
+    return _codec.header + _codec.compress(data)
+
+
+def decode(data: bytes) -> bytes:
+    codec = _BY_HEADER.get(data[:1])
+    if codec is None:  # written before codecs, so no header
+        return data
+    return codec.decompress(data[1:])
@@ -53,6 +53,17 @@ class Settings(BaseSettings):
 
     HYDSTRA_BASE_URL: str = ""
 
+    # pooled http session used for hydstra requests; see `lyra.core.async_requests`
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_KEEPALIVE_TIMEOUT: float = 30
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_TIMEOUT_TOTAL: float = 120
+    HTTP_TIMEOUT_CONNECT: float = 10
+
+    # upper bound on the in-process fallback cache used when redis is unavailable
+    MEM_CACHE_MAXBYTES: int = 256 * 1024 * 1024
+
     # SERVER_NAME: str
     # SERVER_HOST: AnyHttpUrl
 
@@ -23,3 +23,15 @@ class HydstraIOError(Exception):
 
     def __str__(self):
         return ": ".join([self.message, str(self.data)])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a service that is failing"""
+
+    def __init__(self, message: str, data: dict):
+        super().__init__(message)
+        self.message = message
+        self.data = data
+
+    def __str__(self):
+        return ": ".join([self.message, str(self.data)])
@@ -0,0 +1,128 @@
+"""Hedged requests.
+
+A call that hasn't returned within the recent p95 (by default) latency of its
+kind gets a duplicate, and whichever of the two answers first wins. This cuts
+the tail latency caused by the odd slow request, for about 5% more requests.
+
+Hedges are paid for from a token bucket that every call adds `max_rate` tokens
+to, so there are never more than `max_rate` hedges per call (plus a small
+burst), even when the service is slow across the board.
+"""
+import asyncio
+import collections
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from lyra.core.metrics import registry as metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Hedger:
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 95,
+        max_rate: float = 0.05,
+        burst: float = 5,
+        min_samples: int = 50,
+        window: int = 500,
+    ):
+        """
+        :param name: name for the metrics
+        :param percentile: hedge calls slower than this percentile of recent calls
+        :param max_rate: most hedges per call
+        :param burst: most hedges that can be saved up
+        :param min_samples: don't hedge until this many calls have been timed
+        :param window: how many recent calls to time
+        """
+        self.name = name
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.burst = burst
+        self.min_samples = min_samples
+        self.tokens = 0.0
+        self.calls = 0
+        self.hedged = 0
+        self._latency: Deque[float] = collections.deque(maxlen=window)
+        self._lock = threading.Lock()  # calls may come from different loops
+
+    def delay(self) -> Optional[float]:
+        """seconds to wait before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latency) < self.min_samples:
+                return None
+            latency = sorted(self._latency)
+        return latency[int(self.percentile / 100 * (len(latency) - 1))]
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay()
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0,
+            "hedge_after_seconds": None if delay is None else round(delay, 4),
+        }
+
+    def _publish(self) -> None:
+        for field, value in self.stats().items():
+            metrics.set(f"{self.name}_hedge", field, value)
+
+    def _observe(self, seconds: float) -> None:
+        with self._lock:
+            self._latency.append(seconds)
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.hedged += 1
+            return True
+
+    async def _timed(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        result = await call()
+        self._observe(time.perf_counter() - start)
+        return result
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """await `call()`, and a duplicate of it if it's slow."""
+        with self._lock:
+            self.calls += 1
+            self.tokens = min(self.burst, self.tokens + self.max_rate)
+
+        delay = self.delay()
+        tasks = [asyncio.ensure_future(self._timed(call))]
+        try:
+            if delay is None:
+                return await tasks[0]
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._take_token():
+                return await tasks[0]
+
+            logger.debug(f"hedging {self.name} call after {delay:.3f}s")
+            tasks.append(asyncio.ensure_future(self._timed(call)))
+
+            # the first success wins; a failure only if both calls fail.
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            metrics.incr(f"{self.name}_hedge", "hedge_wins")
+                        return task.result()
+                if not pending:
+                    return task.result()
+
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            self._publish()
@@ -8,7 +8,10 @@ from lyra.core.cache import cache_decorator
 PathType = Union[Path, str]
 
 
-@cache_decorator(ex=3600 * 6)  # expires in 6 hours
+# files read through here may be derived from the hydstra site info, so depend on it.
+@cache_decorator(
+    ex=3600 * 6, l1_ttl=300, depends_on=["hydstra_sites"]
+)  # expires in 6 hours
 def _load_file(filepath: PathType) -> str:
     fp = Path(filepath)
     return fp.read_text(encoding="utf-8")
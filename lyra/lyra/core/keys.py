@@ -0,0 +1,130 @@
+"""Canonical cache keys.
+
+`canonical` reduces function arguments to a json-able structure that is the
+same for equal arguments in every process, regardless of `PYTHONHASHSEED`,
+kwarg order, or whether a sequence arrived as a list or a tuple. Large blobs,
+DataFrames and arrays are reduced to a content digest so that keys stay small
+and cheap to build.
+"""
+import datetime
+import enum
+import hashlib
+import sys
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import orjson
+
+# strings and bytes longer than this are replaced with their digest.
+BLOB_THRESHOLD = 1024
+
+# orjson only serializes 64 bit ints
+_MAX_INT = 2 ** 63
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _sort(items: Iterable[Any]) -> list:
+    return sorted(items, key=orjson.dumps)
+
+
+def _is_pandas(obj: Any) -> bool:
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(obj, (pandas.DataFrame, pandas.Series))
+
+
+def _numpy():
+    return sys.modules.get("numpy")
+
+
+def _pandas_digest(obj: Any) -> str:
+    import pandas
+
+    if isinstance(obj, pandas.DataFrame):
+        meta = [str(obj.shape), str(list(obj.columns)), str(list(obj.dtypes))]
+    else:
+        meta = [str(obj.shape), str(obj.name), str(obj.dtype)]
+    h = hashlib.sha256(orjson.dumps(meta))
+    h.update(pandas.util.hash_pandas_object(obj, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def canonical(obj: Any, unordered: bool = False) -> Any:
+    """reduce `obj` to a stable, json-able structure.
+
+    Each value is tagged with its kind so that, e.g., `1`, `1.0`, `True` and
+    `"1"` never collide.
+
+    :param unordered: treat sequences as sets, e.g., a list of catchidns.
+    """
+    if obj is None or isinstance(obj, bool):
+        return obj
+    if isinstance(obj, enum.Enum):
+        return ["enum", canonical(obj.value)]
+    if isinstance(obj, int):
+        return ["int", str(obj)]
+    if isinstance(obj, float):
+        return ["float", repr(obj)]
+    if isinstance(obj, str):
+        if len(obj) > BLOB_THRESHOLD:
+            return ["blob", _sha256(obj.encode("utf-8"))]
+        return obj
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        data = bytes(obj)
+        if len(data) > BLOB_THRESHOLD:
+            return ["blob", _sha256(data)]
+        return ["bytes", data.hex()]
+    if isinstance(obj, (list, tuple)):
+        # fast path for the common lists of ids, years and names.
+        if all(type(i) is int and -_MAX_INT < i < _MAX_INT for i in obj):
+            return ["ints", sorted(obj) if unordered else list(obj)]
+        if all(type(i) is str and len(i) <= BLOB_THRESHOLD for i in obj):
+            return ["strs", sorted(obj) if unordered else list(obj)]
+        items = [canonical(i, unordered) for i in obj]
+        return ["seq", _sort(items) if unordered else items]
+    if isinstance(obj, (set, frozenset)):
+        return ["seq", _sort(canonical(i, unordered) for i in obj)]
+    if isinstance(obj, dict):
+        items = [[canonical(k), canonical(v, unordered)] for k, v in obj.items()]
+        return ["map", _sort(items)]
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return ["dt", obj.isoformat()]
+    if _is_pandas(obj):
+        return ["frame", _pandas_digest(obj)]
+    numpy = _numpy()
+    if numpy is not None and isinstance(obj, numpy.generic):
+        return canonical(obj.item(), unordered)
+    if numpy is not None and isinstance(obj, numpy.ndarray):
+        meta = f"{obj.dtype}{obj.shape}".encode()
+        return ["array", _sha256(meta + obj.tobytes())]
+    if hasattr(obj, "url") and hasattr(obj, "dialect"):
+        # sqlalchemy engines; the url repr masks the password.
+        return ["engine", repr(obj.url)]
+    if hasattr(obj, "dict") and hasattr(obj, "__fields__"):
+        # pydantic models
+        return ["model", type(obj).__qualname__, canonical(obj.dict(), unordered)]
+
+    return ["repr", type(obj).__qualname__, repr(obj)]
+
+
+def canonical_bytes(
+    args: Tuple, kwargs: Dict[str, Any], unordered: Optional[Iterable[str]] = None
+) -> bytes:
+    unordered = set(unordered or [])
+    _kwargs = [[k, canonical(v, k in unordered)] for k, v in kwargs.items()]
+    return orjson.dumps([canonical(args), _sort(_kwargs)])
+
+
+def make_key(
+    namespace: str,
+    args: Tuple,
+    kwargs: Dict[str, Any],
+    unordered: Optional[Iterable[str]] = None,
+) -> str:
+    """build a stable digest for a call to the function named `namespace`.
+
+    :param unordered: names of kwargs whose order doesn't matter, e.g., 'catchidns'
+    """
+    data = canonical_bytes(args, kwargs, unordered)
+    return _sha256(namespace.encode("utf-8") + b"\x00" + data)
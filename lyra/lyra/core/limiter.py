@@ -0,0 +1,119 @@
+"""Adaptive (AIMD) concurrency limiter.
+
+The number of concurrent calls allowed grows by about one for every `limit`
+calls that succeed (additive increase) and halves every time a call fails in a
+way that suggests the service is overloaded (multiplicative decrease).
+
+A limiter must only be used from one event loop. `lyra.core.async_requests`
+sends every request from its own loop, which makes a limiter passed to
+`send_request` process-wide.
+"""
+import asyncio
+import collections
+import contextlib
+from typing import AsyncIterator, Callable, Deque, Dict, Optional
+
+from lyra.core.metrics import registry as metrics
+
+
+class AIMDLimiter:
+    def __init__(
+        self,
+        name: str,
+        initial: float = 4,
+        minimum: float = 1,
+        maximum: float = 16,
+        backoff: float = 0.5,
+        is_overload: Optional[Callable[[BaseException], bool]] = None,
+    ):
+        """
+        :param name: name for the metrics
+        :param initial: concurrent calls allowed at first
+        :param minimum: never allow fewer concurrent calls than this
+        :param maximum: never allow more concurrent calls than this
+        :param backoff: multiply the limit by this on overload
+        :param is_overload: whether a failed call should reduce the limit. By
+            default every exception does.
+        """
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.is_overload = is_overload or (lambda e: True)
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._publish()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+        }
+
+    def _publish(self) -> None:
+        for field, value in self.stats().items():
+            metrics.set(self.name, field, value)
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self._publish()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # we were handed a slot as we were cancelled
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            self._publish()
+
+    def release(self, ok: Optional[bool] = None) -> None:
+        """
+        :param ok: True if the call succeeded, False if the service looks
+            overloaded, and None to leave the limit as it is
+        """
+        self.in_flight -= 1
+        if ok is True:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif ok is False:
+            self.limit = max(self.minimum, self.limit * self.backoff)
+            metrics.incr(self.name, "throttled")
+        self._wake()
+        self._publish()
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except Exception as e:
+            self.release(False if self.is_overload(e) else None)
+            raise
+        else:
+            self.release(True)
@@ -0,0 +1,104 @@
+import sys
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from lyra.core.async_cache.lru import LRU
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class LocalCache:
+    """A bounded, ttl aware, thread-safe, in-process LRU cache.
+
+    Sync FastAPI routes run in a threadpool, so every access is guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = 128,
+        ttl: Optional[float] = None,
+        maxbytes: Optional[int] = None,
+    ):
+        """
+        :param maxsize: Use maxsize as None for an unlimited number of entries
+        :param ttl: default seconds to live for each entry. Use None to never expire
+        :param maxbytes: evict the least recently used entries once the values
+            take more than this many bytes. Use None for no limit
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lru = LRU(maxsize=None)  # evictions are counted here instead
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def _pop(self, key: Hashable) -> None:
+        _, _, nbytes = self._lru.pop(key)
+        self.nbytes -= nbytes
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._lru:
+                return None
+            value, expires_at, _ = self._lru[key]
+            if expires_at is not None and expires_at < time.monotonic():
+                self._pop(key)
+                self.expirations += 1
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ex: Optional[float] = None) -> None:
+        ttl = ex if ex is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        nbytes = _sizeof(value) if self.maxbytes is not None else 0
+
+        if self.maxbytes is not None and nbytes > self.maxbytes:
+            # it would evict everything else and then itself.
+            self.delete(key)
+            return
+
+        with self._lock:
+            if key in self._lru:
+                self._pop(key)
+            self._lru[key] = (value, expires_at, nbytes)
+            self.nbytes += nbytes
+
+            while (self.maxsize and len(self._lru) > self.maxsize) or (
+                self.maxbytes is not None and self.nbytes > self.maxbytes
+            ):
+                self._pop(next(iter(self._lru)))
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._lru:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._lru),
+                "bytes": self.nbytes,
+                "maxsize": self.maxsize,
+                "maxbytes": self.maxbytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
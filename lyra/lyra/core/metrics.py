@@ -0,0 +1,97 @@
+"""In-process counters, gauges and latency histograms, e.g., for the cache
+decorators and the hydstra request limiter.
+
+Each process keeps its own registry; counters that must be aggregated across
+processes (e.g., single flight coalescing) are kept in redis by `lyra.core.cache`.
+"""
+import bisect
+import os
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+# upper bounds in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1,
+    5,
+    10,
+    30,
+    60,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)  # the last is +inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        # cumulative, like prometheus buckets
+        cumulative: Dict[str, int] = {}
+        total = 0
+        for bound, n in zip([*self.buckets, "inf"], self.counts):
+            total += n
+            cumulative[f"le_{bound}"] = total
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "buckets": cumulative,
+        }
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+        self._latency: Dict[str, Histogram] = defaultdict(Histogram)
+
+    def incr(self, name: str, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name][field] += amount
+
+    def set(self, name: str, field: str, value: Any) -> None:
+        """record the current value of a gauge, e.g., a queue depth."""
+        with self._lock:
+            self._counters[name][field] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._latency[name].observe(seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._latency.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            names = sorted(set(self._counters) | set(self._latency))
+            functions = {
+                name: {
+                    **self._counters.get(name, {}),
+                    "compute_seconds": self._latency[name].to_dict()
+                    if name in self._latency
+                    else None,
+                }
+                for name in names
+            }
+
+        return {"pid": os.getpid(), "functions": functions}
+
+
+registry = Registry()
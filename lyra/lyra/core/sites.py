@@ -0,0 +1,120 @@
+"""Process-wide index of the swn sites in `cfg['site_path']`.
+
+The file is parsed once per version: every lookup checks the file's mtime and
+size, and only if they changed is the file read again. Only if its hash changed
+too is it re-parsed. The site properties are indexed by station, and the sets of
+valid stations and of the stations that have each variable are precomputed, so
+validating a request or building a `Timeseries` is a few dict lookups.
+
+Lookups return copies of the properties, so callers can't change the index.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from lyra.core.config import cfg
+from lyra.core.metrics import registry as metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Sites(NamedTuple):
+    version: str  # hash of the file's contents
+    stations: List[str]  # in the order of the file
+    props: Dict[str, Dict[str, Any]]
+    valid: FrozenSet[str]
+    has_variable: Dict[str, FrozenSet[str]]
+
+
+def _hash(contents: bytes) -> str:
+    return hashlib.blake2b(contents, digest_size=16).hexdigest()
+
+
+def parse(contents: bytes) -> Sites:
+    features = json.loads(contents)["features"]
+    props: Dict[str, Dict[str, Any]] = {}
+    duplicates = []
+    for f in features:
+        station = f["properties"]["station"]
+        if station in props:  # the first one wins
+            duplicates.append(station)
+            continue
+        props[station] = f["properties"]
+    if duplicates:
+        logger.warning(f"ignoring later duplicates of stations: {duplicates}")
+
+    has_variable: Dict[str, set] = {}
+    for station, p in props.items():
+        for k, v in p.items():
+            if k.startswith("has_") and v:
+                has_variable.setdefault(k[len("has_") :], set()).add(station)
+
+    return Sites(
+        version=_hash(contents),
+        stations=list(props),
+        props=props,
+        valid=frozenset(props),
+        has_variable={k: frozenset(v) for k, v in has_variable.items()},
+    )
+
+
+class SiteRegistry:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stat: Optional[Tuple[int, int]] = None
+        self._sites: Optional[Sites] = None
+
+    @property
+    def sites(self) -> Sites:
+        """the current sites, reloaded first if the file changed."""
+        st = os.stat(self.path)
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat == self._stat and self._sites is not None:
+            return self._sites
+
+        with self._lock:
+            if stat != self._stat or self._sites is None:
+                contents = self.path.read_bytes()
+                if self._sites is None or self._sites.version != _hash(contents):
+                    try:
+                        self._sites = parse(contents)
+                    except ValueError as e:
+                        if self._sites is None:
+                            raise
+                        # e.g., caught while the file is being rewritten; the
+                        # next lookup tries again.
+                        logger.warning(f"unable to reload {self.path}: {e!r}")
+                        return self._sites
+                    metrics.incr("site_registry", "loads")
+                    logger.info(
+                        f"loaded {len(self._sites.valid)} sites from {self.path}"
+                    )
+                self._stat = stat
+
+        return self._sites
+
+    @property
+    def stations(self) -> List[str]:
+        return self.sites.stations
+
+    def all_props(self) -> List[Dict[str, Any]]:
+        return copy.deepcopy(list(self.sites.props.values()))
+
+    def props(self, station: str) -> Dict[str, Any]:
+        """a copy of the properties of `station`, or {} if it isn't a swn site."""
+        return copy.deepcopy(self.sites.props.get(station, {}))
+
+    def is_valid(self, station: str) -> bool:
+        return station in self.sites.valid
+
+    def has_variable(self, station: str, variable: str) -> bool:
+        return station in self.sites.has_variable.get(variable, frozenset())
+
+
+registry = SiteRegistry(cfg["site_path"])
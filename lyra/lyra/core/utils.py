@@ -1,7 +1,8 @@
 import asyncio
+import concurrent.futures
 import itertools
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Coroutine, Dict, List, Optional, Union
 
 import pandas
 from celery.canvas import Signature
@@ -42,6 +43,23 @@ async def wait_a_sec_and_see_if_we_can_return_some_data(
     return
 
 
+def run_sync(coro: Coroutine) -> Any:
+    """run `coro` to completion from sync code, e.g., a notebook.
+
+    Only for callers that can't await; in a coroutine, await the async api
+    directly. If this thread already runs an event loop (as a jupyter kernel
+    does), the coroutine is run on a new loop in another thread, and this thread
+    is blocked until it's done.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
 def run_task_kwargs(
     request: Request,
     force_foreground: Optional[bool] = Query(
@@ -10,6 +10,7 @@ from fastapi.staticfiles import StaticFiles
 def create_app(settings_override: Optional[Dict[str, Any]] = None) -> FastAPI:
 
     from lyra.api import api_router
+    from lyra.core import async_requests
     from lyra.core.config import settings
     from lyra.site import site_router
 
@@ -43,6 +44,10 @@ def create_app(settings_override: Optional[Dict[str, Any]] = None) -> FastAPI:
             redoc_favicon_url="/static/logo/lyra_logo_icon.ico",
         )
 
+    @app.on_event("shutdown")
+    async def close_http_pool():
+        async_requests.close_pool()
+
     app.include_router(api_router, prefix="/api")
     app.include_router(site_router)
 
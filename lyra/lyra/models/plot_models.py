@@ -1,4 +1,3 @@
-import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Union
 
@@ -8,7 +7,7 @@ from pydantic import BaseModel, Field, root_validator, validator
 
 from lyra.core import utils
 from lyra.core.config import cfg
-from lyra.core.io import load_file
+from lyra.core.sites import registry as site_registry
 from lyra.models.request_models import (
     AggregationMethod,
     Interval,
@@ -44,26 +43,14 @@ class SingleVarSpec(BaseModel):
         variable = values.get("variable")
         source = cfg.get("variables", {}).get(variable, {}).get("source")
 
-        # load_file will cache this so it doesn't happen for frequent requests
-        site_props = [
-            f["properties"] for f in json.loads(load_file(cfg["site_path"]))["features"]
-        ]
-        valid_sites = [d["station"] for d in site_props]
-
         for site in sites:
-            var_info: Dict = next((x for x in site_props if x["station"] == site), {})
-
-            valid_sites = [d["station"] for d in site_props]
-            assert (
-                site in valid_sites
-            ), f"'{site}' is not valid. \n\tOptions are: {valid_sites}"
+            assert site_registry.is_valid(
+                site
+            ), f"'{site}' is not valid. \n\tOptions are: {site_registry.stations}"
 
             if source == "hydstra":
-                assert (
-                    site in valid_sites
-                ), f"'{site}' is not valid. \n\tOptions are: {valid_sites}"
-                assert var_info.get(
-                    f"has_{variable}"
+                assert site_registry.has_variable(
+                    site, variable
                 ), f"'{variable}' not found at site '{site}'"
 
         return values
@@ -153,12 +140,9 @@ class TimeseriesSchema(TimeseriesBaseSchema):
     @validator("site")
     def check_site(cls, v):
 
-        # load_file will cache this so it doesn't happen for frequent requests
-        site_props = [
-            f["properties"] for f in json.loads(load_file(cfg["site_path"]))["features"]
-        ]
-        valid_sites = [d["station"] for d in site_props]
-        assert v in valid_sites, f"'{v}' is not valid. \n\tOptions are: {valid_sites}"
+        assert site_registry.is_valid(
+            v
+        ), f"'{v}' is not valid. \n\tOptions are: {site_registry.stations}"
 
         return v
 
@@ -188,17 +172,8 @@ class TimeseriesSchema(TimeseriesBaseSchema):
         nearest_station = values.get("nearest_rainfall_station")
 
         if nearest_station is not None:
-
-            site_props = [
-                f["properties"]
-                for f in json.loads(load_file(cfg["site_path"]))["features"]
-            ]
-
-            nearest_site_info: Dict = next(
-                (x for x in site_props if x["station"] == nearest_station), {}
-            )
-            assert nearest_site_info.get(
-                f"has_rainfall"
+            assert site_registry.has_variable(
+                nearest_station, "rainfall"
             ), f"'rainfall' not found at site {nearest_station!r}."
 
         return values
@@ -210,17 +185,15 @@ class TimeseriesSchema(TimeseriesBaseSchema):
         source = cfg.get("variables", {}).get(variable, {}).get("source")
         nearest_station = values.get("nearest_rainfall_station")
 
-        # load_file will cache this so it doesn't happen for frequent requests
-        site_props = [
-            f["properties"] for f in json.loads(load_file(cfg["site_path"]))["features"]
-        ]
-        site_info: Dict = next((x for x in site_props if x["station"] == site), {})
+        site_info: Dict = site_registry.props(site)
 
         # we only need to validate that the variable is available for hydstra
         # variables. Dt_metric variables are always available.
         if source == "hydstra":
 
-            if variable == "rainfall" and not site_info.get(f"has_{variable}"):
+            if variable == "rainfall" and not site_registry.has_variable(
+                site, variable
+            ):
                 nearest_station = (
                     values.get("nearest_rainfall_station")
                     or site_info["nearest_rainfall_station"]
@@ -236,8 +209,8 @@ class TimeseriesSchema(TimeseriesBaseSchema):
 
                 return values
 
-            assert site_info.get(
-                f"has_{variable}"
+            assert site_registry.has_variable(
+                site, variable
             ), f"{variable!r} not found at site {site!r}."
 
         return values
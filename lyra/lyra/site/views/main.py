@@ -8,8 +8,7 @@ from fastapi.templating import Jinja2Templates
 
 import lyra
 from lyra.api.requests import LyraRoute
-from lyra.core.config import cfg
-from lyra.core.io import load_file
+from lyra.core.sites import registry as site_registry
 
 router = APIRouter(route_class=LyraRoute)
 
@@ -28,10 +27,7 @@ async def timeseriesfunc(request: Request) -> Response:
     # sitelist_file = Path(lyra.__file__).parent / "static" / "site_list.json"
     # sitelist = json.loads(sitelist_file.read_text())["sites"]
 
-    site_props = [
-        f["properties"] for f in json.loads(load_file(cfg["site_path"]))["features"]
-    ]
-    sitelist = [d["station"] for d in site_props]
+    sitelist = site_registry.stations
 
     plot_function_url = request.url_for("plot_trace")
     return templates.TemplateResponse(
@@ -1,9 +1,12 @@
 import asyncio
+from functools import partial
 from typing import Any, Dict, List, Optional
 
 import pandas
 
-from lyra.src.timeseries import Timeseries, utils
+from lyra.core.utils import run_sync
+from lyra.src.timeseries import Timeseries
+from lyra.src.timeseries.dry_weather import masks as dry_weather_masks
 
 
 def active_system_timeseries(
@@ -128,8 +131,9 @@ async def gather_timeseries(ts: Timeseries) -> None:
     await asyncio.gather(ts.init_ts(), ts.get_nearest_rainfall_ts_async())
 
 
-def simulate_diversion(
-    ts: Dict[str, Any],
+def _simulate(
+    discharge_ts: Timeseries,
+    rg_ts: Timeseries,
     diversion_rate_cfs: float,
     storage_max_depth_ft: float = 0.0,
     storage_initial_depth_ft: float = 0.0,
@@ -151,16 +155,11 @@ def simulate_diversion(
     infiltration_rate_cfs = infiltration_rate_inhr / 12 / 3600 * storage_area_sqft
     inc = 3600  # seconds
 
-    discharge_ts = Timeseries(**ts)
-
-    asyncio.run(gather_timeseries(discharge_ts))
-
-    rg_ts = discharge_ts.get_nearest_rainfall_ts()
-
     precip_depth_ts = pandas.Series(rg_ts.timeseries["value"], name="rainfall_depth")
 
     if rainfall_event_shutdown:
-        dw = utils.identify_dry_weather(
+        dw = dry_weather_masks.get(
+            rg_ts.site,
             rg_ts.timeseries["value"],
             min_event_depth=rainfall_event_depth_threshold,
             event_separation_hrs=event_separation_hrs,
@@ -195,3 +194,32 @@ def simulate_diversion(
     results = results.join(precip_depth_ts)
 
     return results
+
+
+async def simulate_diversion_async(
+    ts: Dict[str, Any], diversion_rate_cfs: float, **kwargs: Any
+) -> pandas.DataFrame:
+    """simulate a diversion of the discharge timeseries `ts`.
+
+    See `_simulate` for the scenario's parameters and their defaults.
+    """
+
+    discharge_ts = Timeseries(**ts)
+
+    await gather_timeseries(discharge_ts)
+
+    rg_ts = await discharge_ts.get_nearest_rainfall_ts_async()
+
+    # the scenario steps through every hour in python, so it runs off the loop.
+    loop = asyncio.get_running_loop()
+    f = partial(_simulate, discharge_ts, rg_ts, diversion_rate_cfs, **kwargs)
+    results: pandas.DataFrame = await loop.run_in_executor(None, f)
+
+    return results
+
+
+def simulate_diversion(
+    ts: Dict[str, Any], diversion_rate_cfs: float, **kwargs: Any
+) -> pandas.DataFrame:
+    """sync version of `simulate_diversion_async`, e.g., for notebooks."""
+    return run_sync(simulate_diversion_async(ts, diversion_rate_cfs, **kwargs))
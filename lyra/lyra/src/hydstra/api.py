@@ -1,11 +1,66 @@
 from typing import Any, Dict, Iterable, Optional
 
 from lyra.core import async_requests
-from lyra.core.async_cache import async_ttl
-from lyra.core.config import settings
+from lyra.core.async_cache import async_redis_ttl
+from lyra.core.breaker import CircuitBreaker
+from lyra.core.config import cfg, settings
+from lyra.core.errors import CircuitOpenError
+from lyra.core.hedging import Hedger
+from lyra.core.limiter import AIMDLimiter
 from lyra.models import hydstra_models
+from lyra.src.hydstra import metadata
+from lyra.src.hydstra.batching import TraceBatcher
+from lyra.src.hydstra.stream import TraceDecoder
+
+# every request to hydstra in this process shares this limit; it backs off when
+# hydstra throttles or fails, and creeps back up while requests succeed.
+hydstra_limiter = AIMDLimiter(
+    "hydstra", is_overload=async_requests.is_transient, **cfg["hydstra"]["limiter"]
+)
+
+
+async def _probe() -> None:
+    # a small request that hydstra answers quickly when it is healthy.
+    await async_requests.send_request(
+        settings.HYDSTRA_BASE_URL,
+        payload={
+            "function": "get_site_list",
+            "version": 1,
+            "params": {"site_list": "GROUP(SITE_TYPE,SWN_ALISO)"},
+        },
+        attempt_timeout=cfg["hydstra"]["retry"]["attempt_timeout_seconds"],
+    )
+
+
+# while hydstra is down, requests fail fast instead of waiting on timeouts.
+hydstra_breaker = CircuitBreaker(
+    "hydstra",
+    probe=_probe,
+    failure_threshold=cfg["hydstra"]["breaker"]["failure_threshold"],
+    probe_interval=cfg["hydstra"]["breaker"]["probe_interval_seconds"],
+)
 
 
+def is_unavailable(e: BaseException) -> bool:
+    """whether a request failed because hydstra is down, rather than a bad request."""
+    return isinstance(e, CircuitOpenError) or async_requests.is_transient(e)
+
+
+async def _send(payload: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+    retry = cfg["hydstra"]["retry"]
+    return await async_requests.send_request(
+        settings.HYDSTRA_BASE_URL,
+        payload=payload,
+        limiter=hydstra_limiter,
+        attempts=retry["attempts"],
+        attempt_timeout=retry["attempt_timeout_seconds"],
+        deadline=retry["deadline_seconds"],
+        breaker=hydstra_breaker,
+        **kwargs,
+    )
+
+
+@metadata.cached("sites")
 async def get_site_list():
     site_list = {
         "function": "get_site_list",
@@ -13,11 +68,10 @@ async def get_site_list():
         "params": {"site_list": "TABLE(SITE)"},
     }
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=site_list
-    )
+    return await _send(site_list)
 
 
+@metadata.cached("sites")
 async def get_swn_site_list() -> Dict[str, Any]:
     site_list = {
         "function": "get_site_list",
@@ -25,11 +79,10 @@ async def get_swn_site_list() -> Dict[str, Any]:
         "params": {"site_list": "GROUP(SITE_TYPE,SWN_ALISO)"},
     }
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=site_list
-    )
+    return await _send(site_list)
 
 
+@metadata.cached("site_info")
 async def get_sites_db_info(
     site: Optional[str] = None,
     field_list: Optional[Iterable[str]] = None,
@@ -59,11 +112,10 @@ async def get_sites_db_info(
     if field_list is not None:  # pragma: no cover
         get_db_info["params"]["field_list"] = field_list  # pass as array
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=get_db_info
-    )
+    return await _send(get_db_info)
 
 
+@metadata.cached("site_info")
 async def get_site_db_info(
     site: str,
     return_type: Optional[hydstra_models.ReturnType] = None,
@@ -87,11 +139,10 @@ async def get_site_db_info(
     if field_list is not None:  # pragma: no cover
         get_db_info["params"]["field_list"] = field_list  # pass as array
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=get_db_info
-    )
+    return await _send(get_db_info)
 
 
+@metadata.cached("sites")
 async def get_site_geojson(
     site_list: Optional[Iterable[str]] = None,
     field_list: Optional[Iterable[str]] = None,
@@ -122,13 +173,44 @@ async def get_site_geojson(
         },
     }
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=get_site_geojson_payload
-    )
+    return await _send(get_site_geojson_payload)
 
 
-@async_ttl(time_to_live=3600, maxsize=128)
-async def get_trace(
+# slow get_trace calls get a duplicate request, if enabled; see lyra.core.hedging
+HEDGE_CFG: Dict[str, Any] = cfg["hydstra"]["hedge"]
+trace_hedger = Hedger(
+    "hydstra_get_trace",
+    percentile=HEDGE_CFG["percentile"],
+    max_rate=HEDGE_CFG["max_rate"],
+    min_samples=HEDGE_CFG["min_samples"],
+)
+
+# streamed traces are usually much longer, so they are timed on their own.
+trace_arrays_hedger = Hedger(
+    "hydstra_get_trace_arrays",
+    percentile=HEDGE_CFG["percentile"],
+    max_rate=HEDGE_CFG["max_rate"],
+    min_samples=HEDGE_CFG["min_samples"],
+)
+
+
+async def _send_trace(
+    payload: Dict[str, Any], hedger: Hedger = trace_hedger, **kwargs: Any
+) -> Dict[str, Any]:
+    if HEDGE_CFG["enabled"]:
+        return await hedger.run(lambda: _send(payload, **kwargs))
+    return await _send(payload, **kwargs)
+
+
+# concurrent single site get_trace calls are merged into multi site requests.
+trace_batcher = TraceBatcher(
+    _send_trace,
+    window=cfg["hydstra"]["trace_batch"]["window_seconds"],
+    max_sites=cfg["hydstra"]["trace_batch"]["max_sites"],
+)
+
+
+def _trace_payload(
     site_list: str,
     start_time: str,
     interval: hydstra_models.Interval,
@@ -172,11 +254,54 @@ async def get_trace(
         ts_trace["params"]["varfrom"] = varfrom
         ts_trace["params"]["varto"] = varto or varfrom
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=ts_trace
+    return ts_trace
+
+
+@async_redis_ttl(time_to_live=3600, maxsize=128, namespace="hydstra:get_trace")
+async def get_trace(
+    site_list: str,
+    start_time: str,
+    interval: hydstra_models.Interval,
+    datasource: str,
+    end_time: str,
+    data_type: hydstra_models.DataType,
+    interval_multiplier: int = 1,
+    recent_points: Optional[int] = None,
+    var_list: Optional[str] = None,
+    varto: Optional[str] = None,
+    varfrom: Optional[str] = None,
+    **kwargs: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+
+    ts_trace = _trace_payload(
+        site_list=site_list,
+        start_time=start_time,
+        interval=interval,
+        datasource=datasource,
+        end_time=end_time,
+        data_type=data_type,
+        interval_multiplier=interval_multiplier,
+        recent_points=recent_points,
+        var_list=var_list,
+        varto=varto,
+        varfrom=varfrom,
+    )
+
+    return await trace_batcher.request(ts_trace)
+
+
+async def get_trace_arrays(**kwargs: Any) -> Dict[str, Any]:
+    """like `get_trace`, but each trace's points are decoded into typed arrays as
+    the response arrives; see `lyra.src.hydstra.stream`. Not cached.
+
+    Every attempt, including a hedge, decodes its response with a new decoder.
+    """
+    return await _send_trace(
+        _trace_payload(**kwargs), hedger=trace_arrays_hedger, decoder=TraceDecoder
     )
 
 
+@metadata.cached("datasources")
 async def get_datasources(
     site_list: Optional[Iterable[str]] = None,
     ts_classes: Optional[Iterable[str]] = None,
@@ -194,11 +319,10 @@ async def get_datasources(
     if ts_classes is not None:
         get_datasources_by_site["params"]["ts_classes"] = ",".join(ts_classes)
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=get_datasources_by_site
-    )
+    return await _send(get_datasources_by_site)
 
 
+@metadata.cached("variables")
 async def get_variables(
     site_list: Optional[Iterable[str]] = None,
     datasource: str = "PUBLISH",
@@ -219,11 +343,10 @@ async def get_variables(
         },
     }
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=get_variable_list
-    )
+    return await _send(get_variable_list)
 
 
+@metadata.cached("variables")
 async def get_site_variables(
     site: str, variable: Optional[str] = None, datasource: str = "PUBLISH",
 ) -> Dict[str, Any]:
@@ -238,11 +361,10 @@ async def get_site_variables(
         },
     }
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=get_variable_list
-    )
+    return await _send(get_variable_list)
 
 
+@metadata.cached("variables")
 async def get_variables_db_info(
     return_type: Optional[hydstra_models.ReturnType] = None,
     filter_values: Optional[Dict] = None,
@@ -265,6 +387,4 @@ async def get_variables_db_info(
         },
     }
 
-    return await async_requests.send_request(
-        settings.HYDSTRA_BASE_URL, payload=get_db_info
-    )
+    return await _send(get_db_info)
@@ -0,0 +1,135 @@
+"""Merge concurrent single site `get_ts_traces` calls into multi site calls.
+
+Calls that arrive within `window` seconds of each other on the same event loop,
+and that only differ by their site, are sent as one request with a comma
+separated `site_list`. Each caller gets the response back with only the traces
+for its own site, so it looks just like the response to its own request.
+"""
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+Sender = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def _site_traces(response: Dict[str, Any], site: str) -> List[Dict[str, Any]]:
+    traces = response.get("return", {}).get("traces", [])
+    site = site.upper()
+    return [t for t in traces if str(t.get("site", "")).strip().upper() == site]
+
+
+def _for_site(response: Dict[str, Any], traces: List[Dict[str, Any]]) -> Dict:
+    result = copy.copy(response)
+    result["return"] = {**response["return"], "traces": traces}
+    return result
+
+
+class TraceBatcher:
+    def __init__(self, send: Sender, window: float = 0.02, max_sites: int = 20):
+        """
+        :param send: coroutine function that posts a payload to hydstra
+        :param window: seconds to wait for more calls to join a batch
+        :param max_sites: send a batch as soon as it has this many sites
+        """
+        self.send = send
+        self.window = window
+        self.max_sites = max_sites
+        self._batches: Dict[Tuple[asyncio.AbstractEventLoop, bytes], Dict] = {}
+        self._tasks: Set[asyncio.Future] = set()  # keep a reference until done
+        self.requests = 0
+        self.batched = 0
+
+    async def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        params = payload["params"]
+        site = str(params["site_list"]).strip()
+        if not site or "," in site or self.window <= 0:
+            return await self.send(payload)
+
+        loop = asyncio.get_running_loop()
+        group = orjson.dumps(
+            {**payload, "params": {**params, "site_list": None}},
+            option=orjson.OPT_SORT_KEYS,
+        )
+        key = (loop, group)
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = {"payload": payload, "callers": []}
+            batch["handle"] = loop.call_later(self.window, self._flush, key)
+
+        future = loop.create_future()
+        batch["callers"].append((site, future))
+
+        if len({s for s, _ in batch["callers"]}) >= self.max_sites:
+            batch["handle"].cancel()
+            self._flush(key)
+
+        return await future
+
+    def _flush(self, key: Tuple[asyncio.AbstractEventLoop, bytes]) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is not None:
+            task = asyncio.ensure_future(self._send_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_one(self, payload: Dict[str, Any], site: str) -> Dict[str, Any]:
+        self.requests += 1
+        return await self.send(
+            {**payload, "params": {**payload["params"], "site_list": site}}
+        )
+
+    async def _send_batch(self, batch: Dict[str, Any]) -> None:
+        callers = [(s, f) for s, f in batch["callers"] if not f.done()]
+        sites = list(dict.fromkeys(s for s, _ in callers))
+        if not sites:
+            return
+
+        payload = batch["payload"]
+        responses: Dict[str, Any] = {}
+
+        try:
+            if len(sites) == 1:
+                responses[sites[0]] = await self._send_one(payload, sites[0])
+            else:
+                response = await self._send_one(payload, ",".join(sites))
+                self.batched += len(sites) - 1
+                logger.debug(f"batched get_ts_traces for {len(sites)} sites")
+
+                for site in sites:
+                    traces = (
+                        _site_traces(response, site) if "return" in response else []
+                    )
+                    if traces:
+                        responses[site] = _for_site(response, traces)
+
+                # errors apply to the whole batch, so ask for the missing sites on
+                # their own to get each site's own response.
+                missing = [s for s in sites if s not in responses]
+                if missing:
+                    logger.debug(f"unbatching get_ts_traces for {missing}")
+                    singles = await asyncio.gather(
+                        *(self._send_one(payload, s) for s in missing),
+                        return_exceptions=True,
+                    )
+                    responses.update(zip(missing, singles))
+
+        except Exception as e:
+            for _, future in callers:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for site, future in callers:
+            if future.done():
+                continue
+            result = responses[site]
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -1,9 +1,14 @@
+import asyncio
 import logging
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy
 import pandas
 
 from lyra.core.config import cfg
 from lyra.src.hydstra import api
+from lyra.src.hydstra.stream import hydstra_trace_to_arrays
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +24,14 @@ def hydstra_trace_to_series(trace):
 
     trace = trace_json['return']['traces'][0]['trace']
 
-    trace[0] = {'v': float, 't': "%Y%m%d%H%M%S"}
+    trace[0] = {'v': float, 't': "%Y%m%d%H%M%S", 'q': int}
 
+    The points are parsed straight into the 'q' and 'value' columns. Traces with
+    other fields keep them all, with the raw 'v' and 't' too.
     """
+    if trace and len(trace[0]) == 3 and all(k in trace[0] for k in "vtq"):
+        return hydstra_arrays_to_frame(hydstra_trace_to_arrays(trace))
+
     df = (
         pandas.DataFrame(trace)
         .assign(date=lambda df: pandas.to_datetime(df["t"], format="%Y%m%d%H%M%S"))
@@ -32,6 +42,75 @@ def hydstra_trace_to_series(trace):
     return df
 
 
+def hydstra_arrays_to_frame(arrays: Dict[str, numpy.ndarray]) -> pandas.DataFrame:
+    """the 'q' and 'value' columns of `hydstra_trace_to_series` from typed arrays."""
+    return pandas.DataFrame(
+        {"q": arrays["q"].astype(numpy.int64), "value": arrays["v"]},
+        index=pandas.DatetimeIndex(arrays["t"].view("datetime64[ns]"), name="date"),
+    )
+
+
+def year_windows(start_time: str, end_time: str) -> List[Tuple[str, str]]:
+    """split a range of hydstra datetimes into calendar years.
+
+    The windows don't overlap, so every point falls in exactly one of them.
+    """
+    windows = []
+    for year in range(int(start_time[:4]), int(end_time[:4]) + 1):
+        window_start = max(start_time, f"{year}0101000000")
+        window_end = min(end_time, f"{year}1231235959")
+        if window_start <= window_end:
+            windows.append((window_start, window_end))
+    return windows
+
+
+def stitch_traces(traces: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """join the traces of consecutive windows into the trace of the whole range.
+
+    Returns None if any window is unavailable, and the first error other than
+    'no data' (126) since those apply to every window.
+    """
+    responses: List[Dict[str, Any]] = [t for t in traces if t is not None]
+    if len(responses) < len(traces):
+        return None
+
+    key = "arrays" if any("arrays" in t for t in responses) else "trace"
+    found = [t for t in responses if key in t]
+    errors = [t for t in responses if key not in t]
+    for error in errors:
+        if error.get("error_num") != 126:
+            return error
+    if not found:
+        return errors[-1]
+
+    stitched = dict(found[0])
+    if key == "arrays":
+        stitched["arrays"] = {
+            k: numpy.concatenate([t["arrays"][k] for t in found])
+            for k in found[0]["arrays"]
+        }
+    else:
+        stitched["trace"] = list(chain.from_iterable(t["trace"] for t in found))
+    return stitched
+
+
+async def _get_site_variable_as_trace(
+    stream: bool = False, **kwargs: Any
+) -> Optional[Dict[str, Any]]:
+    get = api.get_trace_arrays if stream else api.get_trace
+    trace_json = await get(**kwargs)
+
+    if trace_json is None:
+        return trace_json
+
+    if len(trace_json.get("return", {}).get("traces", [])):
+
+        return trace_json["return"]["traces"][0]
+    else:
+        logger.error(trace_json)
+        return trace_json
+
+
 async def get_site_variable_as_trace(
     site,
     varfrom,
@@ -41,7 +120,14 @@ async def get_site_variable_as_trace(
     interval=None,
     agg_method=None,
     datasource=None,
+    stream=False,
 ):
+    """the first trace of a `get_ts_traces` request, or its error.
+
+    With `stream`, the response is decoded as it arrives, and the points are
+    under 'arrays' (see `hydstra_trace_to_arrays`) instead of 'trace'. Streamed
+    traces aren't cached.
+    """
 
     if start_date is None:
         start_date = "0"
@@ -62,23 +148,35 @@ async def get_site_variable_as_trace(
     if datasource is None:
         datasource = "PUBLISH"
 
-    trace_json = await api.get_trace(
+    inputs = dict(
         site_list=site,
-        start_time=start_date,
-        end_time=end_date,
         varfrom=varfrom,
         varto=varto,
         interval=interval,
         data_type=agg_method,
         datasource=datasource,
+        stream=stream,
     )
 
-    if trace_json is None:
-        return trace_json
-
-    if len(trace_json.get("return", {}).get("traces", [])):
-
-        return trace_json["return"]["traces"][0]
-    else:
-        logger.error(trace_json)
-        return trace_json
+    windows = []
+    if interval in cfg["hydstra"]["trace_windows"]["intervals"] and "0" not in (
+        start_date,
+        end_date,
+    ):
+        windows = year_windows(start_date, end_date)
+
+    if len(windows) < 2:
+        return await _get_site_variable_as_trace(
+            start_time=start_date, end_time=end_date, **inputs
+        )
+
+    # each year is fetched on its own, under the hydstra limiter. Unless they are
+    # streamed, the years are cached on their own too, so overlapping requests
+    # share the years they have in common. Streamed years aren't cached.
+    traces = await asyncio.gather(
+        *(
+            _get_site_variable_as_trace(start_time=s, end_time=e, **inputs)
+            for s, e in windows
+        )
+    )
+    return stitch_traces(list(traces))
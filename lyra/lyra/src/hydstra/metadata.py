@@ -0,0 +1,128 @@
+"""In memory cache of hydstra metadata.
+
+Site lists, variable lists, datasources and site info change rarely, so they
+are served from memory. An entry is fresh for its ttl. After that it is still
+served for up to `max_stale_seconds`, while it is refreshed in the background.
+Only entries that are still being asked for are refreshed. Hydstra errors are
+never cached, and a failed refresh keeps serving the entry it would have
+replaced.
+
+Entries are kept as json, and every caller gets its own copy, so changing a
+response never changes what later callers get.
+
+TTLs are configured per kind of metadata under `hydstra.metadata` in
+lyra_config.yml.
+"""
+import functools
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from lyra.core import async_requests
+from lyra.core.async_cache.inflight import InFlight
+from lyra.core.async_cache.key import KEY
+from lyra.core.async_cache.lru import LRU
+from lyra.core.config import cfg
+from lyra.core.metrics import registry as metrics
+
+logger = logging.getLogger(__name__)
+
+METADATA_CFG: Dict[str, Any] = cfg["hydstra"]["metadata"]
+
+_caches: List["MetadataCache"] = []
+
+
+class MetadataCache:
+    def __init__(self, ttl: float, max_stale: float, maxsize: int = 256):
+        """
+        :param ttl: seconds an entry is served without being refreshed
+        :param max_stale: seconds an entry may be served while it is refreshed
+        :param maxsize: entries to keep, least recently used are dropped first
+        """
+        self.ttl = ttl
+        self.max_stale = max_stale
+        # entries are read on the callers' loops and refreshed on the pool's loop.
+        self._lock = threading.Lock()
+        self._entries: LRU = LRU(maxsize=maxsize)
+        self._refreshing: Set[KEY] = set()
+        self.inflight = InFlight()
+        _caches.append(self)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: KEY) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            return self._entries[key] if key in self._entries else None
+
+    def __call__(self, func: Callable[..., Awaitable[Any]]) -> Callable:
+        name = func.__name__
+
+        async def fetch(key: KEY, args: Tuple, kwargs: Dict) -> Any:
+            start = time.perf_counter()
+            result = await func(*args, **kwargs)
+            metrics.observe(name, time.perf_counter() - start)
+            if isinstance(result, dict) and not result.get("error_num"):
+                data = orjson.dumps(result)
+                with self._lock:
+                    self._entries[key] = (data, time.monotonic())
+                return data
+            return result
+
+        async def refresh(key: KEY, args: Tuple, kwargs: Dict) -> None:
+            try:
+                await fetch(key, args, kwargs)
+                metrics.incr(name, "refreshes")
+            except Exception as e:
+                metrics.incr(name, "refresh_errors")
+                logger.warning(f"unable to refresh {name}: {e!r}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = KEY(args, kwargs)
+            entry = self._get(key)
+
+            if entry is not None:
+                value, fetched_at = entry
+                age = time.monotonic() - fetched_at
+                if age < self.ttl:
+                    metrics.incr(name, "hits")
+                    return orjson.loads(value)
+
+                if age < self.max_stale:
+                    metrics.incr(name, "stale_hits")
+                    with self._lock:
+                        start_refresh = key not in self._refreshing
+                        self._refreshing.add(key)
+                    if start_refresh:
+                        async_requests.submit(refresh(key, args, kwargs))
+                    return orjson.loads(value)
+
+            metrics.incr(name, "misses")
+            result = await self.inflight.run(
+                key, lambda: fetch(key, args, kwargs), name=name
+            )
+            return orjson.loads(result) if isinstance(result, bytes) else result
+
+        return wrapper
+
+
+def cached(kind: str) -> MetadataCache:
+    """cache a hydstra metadata request with the ttl configured for its `kind`."""
+    return MetadataCache(
+        ttl=METADATA_CFG["ttl_seconds"][kind],
+        max_stale=METADATA_CFG["max_stale_seconds"],
+    )
+
+
+def clear() -> None:
+    """forget every cached entry in this process."""
+    for cache in _caches:
+        cache.clear()
@@ -0,0 +1,92 @@
+"""Coarser intervals of a hydstra trace, aggregated locally.
+
+Once a site and variable is stored at a fine interval (see
+`lyra.src.hydstra.store`), requests for a coarser interval of the same
+aggregation are rolled up from it instead of being fetched from hydstra again.
+
+A rolled up period is the same as hydstra's own aggregate of it (to the 6
+significant figures that hydstra rounds to) when all of the period's points
+are stored:
+
+- 'tot', 'max' and 'min' are the sum, max and min of the finer points.
+- 'mean' is the mean of the finer points, weighted by the hours in each, since
+  hydstra's means are over time. E.g., a year is the mean of its months weighted
+  by their days.
+
+A period is labeled with its start, like `pandas.DataFrame.resample`, and its
+quality code is the worst (highest) of its points. 'cum' and any other
+aggregation are always fetched from hydstra.
+"""
+from typing import List
+
+import numpy
+import pandas
+
+AGG_REMAP = {
+    # hydstra : pandas
+    "tot": "sum",
+    "cum": "cumsum",
+    "mean": "mean",
+    "max": "max",
+    "min": "min",
+}
+
+INTERVAL_REMAP = {
+    "year": "YS",
+    "month": "MS",
+    "day": "D",
+    "hour": "H",
+}
+
+# finest first
+INTERVALS: List[str] = ["hour", "day", "month", "year"]
+
+ROLLUP_AGGS: List[str] = ["tot", "mean", "max", "min"]
+
+
+def can_rollup(from_interval: str, to_interval: str, agg_method: str) -> bool:
+    return (
+        agg_method in ROLLUP_AGGS
+        and from_interval in INTERVALS
+        and to_interval in INTERVALS
+        and INTERVALS.index(from_interval) < INTERVALS.index(to_interval)
+    )
+
+
+def period_hours(index: pandas.DatetimeIndex, interval: str) -> numpy.ndarray:
+    """the hours in each period of `interval` that starts at `index`."""
+    if interval == "hour":
+        return numpy.ones(len(index))
+    if interval == "day":
+        return numpy.full(len(index), 24.0)
+    if interval == "month":
+        return index.days_in_month.to_numpy(dtype=float) * 24
+    return numpy.where(index.is_leap_year, 366.0, 365.0) * 24
+
+
+def rollup(
+    frame: pandas.DataFrame, from_interval: str, to_interval: str, agg_method: str
+) -> pandas.DataFrame:
+    """aggregate the 'q' and 'value' columns of a `from_interval` trace into
+    `to_interval` periods. Periods without any points are left out.
+    """
+    if not can_rollup(from_interval, to_interval, agg_method):
+        raise ValueError(
+            f"can't roll up {agg_method} from {from_interval} to {to_interval}"
+        )
+
+    rule = INTERVAL_REMAP[to_interval]
+    q = frame["q"].resample(rule).max()
+
+    if agg_method == "mean":
+        hours = pandas.Series(
+            period_hours(frame.index, from_interval), index=frame.index
+        ).where(frame["value"].notna())
+        value = (frame["value"] * hours).resample(rule).sum() / hours.resample(
+            rule
+        ).sum()
+    else:
+        value = frame["value"].resample(rule).aggregate(AGG_REMAP[agg_method])
+
+    result = pandas.DataFrame({"q": q, "value": value}).loc[q.notna()]
+    return result.astype({"q": frame["q"].dtype})
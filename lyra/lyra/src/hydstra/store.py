@@ -0,0 +1,603 @@
+"""Local columnar store for hydstra traces.
+
+Each (datasource, site, varfrom, varto) gets a directory under
+`data/mount/swn/hydstra/store`, with one parquet file per interval and
+aggregation. A file holds every point fetched so far and the contiguous range
+of dates it covers. A request is served from disk, and only the part of the
+range that isn't covered yet, plus a recent tail that hydstra may still
+revise, is fetched from hydstra.
+
+The recent tail of a stored trace is fetched again at most once per
+'sync_interval_seconds', which is how often the sync task runs. The tail is
+fetched through the cached `api.get_trace`, so repeated requests across workers
+share it. A file is only rewritten when its points or covered range change. Its
+modification time is when hydstra was last checked for changes.
+
+Reading, merging, writing and rolling up files runs in the default executor,
+so a cold multi year request never holds up the other requests on the event
+loop.
+
+While hydstra is unavailable, a request is served from whatever the store
+already has for its range, with the time of the last sync under 'stale'.
+
+Requests are widened to whole periods of their interval, so the first and
+last points of a month or year trace are aggregates of the whole period.
+
+Fetched traces are streamed straight into typed arrays (see
+`lyra.src.hydstra.stream`), and the store keeps only their quality codes and
+values, so a bulk fetch never holds the whole trace as python objects.
+
+A request for a 'tot', 'mean', 'max' or 'min' trace is served from the finest
+interval already stored with the same aggregation that covers its range (apart
+from the recent tail), rolled up locally (see `lyra.src.hydstra.pyramid`),
+rather than fetched again at its own interval. A finer interval that covers less
+isn't extended for it, since that could mean fetching 30 years of hours for 30
+yearly points.
+
+Each rollup of a stored file is kept next to it under 'rollups', along with the
+time the file it was rolled up from was synced. A stored file only changes
+before its covered range or from its recent tail on, so when it was synced
+again, only the periods from its recent tail at the time of the last rollup are
+rolled up again.
+"""
+import asyncio
+import contextlib
+import datetime
+import functools
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import orjson
+import pandas
+
+from lyra.core.config import cfg
+from lyra.core.metrics import registry as metrics
+from lyra.core.utils import local_path
+from lyra.src.hydstra import api, helper, pyramid
+from lyra.src.hydstra.stream import hydstra_trace_to_arrays
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STORE_CFG: Dict[str, Any] = cfg["hydstra"]["store"]
+STORE_PATH = local_path(STORE_CFG["path"])
+
+# the start of the period that each point of an interval is an aggregate of.
+_PERIOD_START = {
+    "hour": lambda ts: ts.floor("D"),
+    "day": lambda ts: ts.floor("D"),
+    "month": lambda ts: ts.to_period("M").to_timestamp(),
+    "year": lambda ts: ts.to_period("Y").to_timestamp(),
+}
+
+_PERIOD_LENGTH = {
+    "day": pandas.DateOffset(days=1),
+    "month": pandas.DateOffset(months=1),
+    "year": pandas.DateOffset(years=1),
+}
+
+_METADATA_KEY = b"lyra"
+
+# the columns of a stored trace
+COLUMNS = ["q", "value"]
+
+
+def is_enabled() -> bool:
+    return pyarrow is not None and STORE_CFG.get("enabled", True)
+
+
+def store_path(
+    site: str,
+    varfrom: str,
+    varto: str,
+    datasource: str,
+    interval: str,
+    agg_method: str,
+) -> Path:
+    return (
+        STORE_PATH
+        / datasource
+        / site
+        / f"{varfrom}-{varto}"
+        / f"{interval}_{agg_method}.parquet"
+    )
+
+
+def rollup_path(path: Path, interval: str) -> Path:
+    """where the rollup of the stored file `path` into `interval` is kept."""
+    return path.parent / "rollups" / f"{interval}_from_{path.name}"
+
+
+def rollup_base(
+    start: pandas.Timestamp,
+    end: pandas.Timestamp,
+    site: str,
+    varfrom: str,
+    varto: str,
+    datasource: str,
+    interval: str,
+    agg_method: str,
+) -> str:
+    """the finest stored interval that `interval` can be rolled up from, and
+    that covers [start, end] apart from its recent tail, or `interval` itself if
+    there isn't one."""
+    for finer in pyramid.INTERVALS:
+        if not pyramid.can_rollup(finer, interval, agg_method):
+            continue
+        path = store_path(site, varfrom, varto, datasource, finer, agg_method)
+        meta = read_meta(path)
+        if not meta:
+            continue
+        covered_end = pandas.Timestamp(meta["end"])
+        base_end = _base_end(end, interval, finer)
+        if pandas.Timestamp(meta["start"]) <= start and (
+            base_end <= covered_end or covered_end > _revisable()
+        ):
+            return finer
+    return interval
+
+
+def _base_end(end: pandas.Timestamp, interval: str, base: str) -> pandas.Timestamp:
+    """the last `base` point needed to roll up `interval` periods up to `end`.
+
+    The base must cover the whole of the last period too. Hours are fetched by
+    date, up to midnight of the end date.
+    """
+    base_end = _PERIOD_START[interval](end) + _PERIOD_LENGTH[interval]
+    if base != "hour":
+        base_end -= _PERIOD_LENGTH[base]
+    return min(base_end, _today())
+
+
+def read_meta(path: Path) -> Dict[str, Any]:
+    """the coverage of a stored trace, without reading its points."""
+    if not path.exists():
+        return {}
+    try:
+        meta: Dict[str, Any] = orjson.loads(
+            pq.read_schema(path).metadata[_METADATA_KEY]
+        )
+        return _checked(path, meta)
+    except Exception as e:  # pragma: no cover
+        logger.warning(f"unable to read hydstra store {path}: {e!r}")
+        return {}
+
+
+def _checked(path: Path, meta: Dict[str, Any]) -> Dict[str, Any]:
+    """`meta` with when hydstra was last checked for changes to `path`."""
+    mtime = datetime.datetime.utcfromtimestamp(path.stat().st_mtime)
+    return {**meta, "checked_at": mtime.isoformat()}
+
+
+def read(
+    path: Path, since: Optional[pandas.Timestamp] = None
+) -> Tuple[Optional[pandas.DataFrame], Dict[str, Any]]:
+    """read a stored trace and its coverage, or (None, {}) if there isn't one.
+
+    :param since: only read the points from this time on
+    """
+    if not path.exists():
+        return None, {}
+    try:
+        filters = None if since is None else [("date", ">=", since)]
+        table = pq.read_table(path, filters=filters)
+        meta = orjson.loads(table.schema.metadata[_METADATA_KEY])
+        return table.to_pandas()[COLUMNS], _checked(path, meta)
+    except Exception as e:  # pragma: no cover
+        logger.warning(f"unable to read hydstra store {path}: {e!r}")
+        return None, {}
+
+
+def write(path: Path, df: pandas.DataFrame, meta: Dict[str, Any]) -> None:
+    """write atomically, so readers in other processes never see a partial file."""
+    table = pyarrow.Table.from_pandas(df)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), _METADATA_KEY: orjson.dumps(meta)}
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():  # pragma: no cover
+            tmp.unlink()
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """hold an exclusive lock on the stored trace at `path` across processes,
+    e.g., the api workers and celery."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f".{path.name}.lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield  # the lock is released when the file is closed
+
+
+def merge(
+    path: Path,
+    head: List[pandas.DataFrame],
+    tail: List[pandas.DataFrame],
+    start: pandas.Timestamp,
+    end: pandas.Timestamp,
+) -> Tuple[Optional[pandas.DataFrame], Dict[str, Any]]:
+    """add fetched frames to the stored trace at `path`, which then covers
+    [start, end] too.
+
+    The stored trace is read again under the lock, so merges of the same trace
+    in other processes never drop each other's points.
+    """
+    with _locked(path):
+        stored, meta = read(path)
+        previous = stored
+
+        # where frames overlap, the later frame wins. The stored points win over
+        # the partial last period of a fetch that ends where the store begins,
+        # and a fetch of the recent tail wins over the stored points.
+        frames = head + ([] if stored is None else [stored]) + tail
+
+        if frames:
+            stored = pandas.concat(frames)
+            stored = stored.loc[~stored.index.duplicated(keep="last")].sort_index()
+
+        covered = [start, end]
+        if meta:
+            stored_start = pandas.Timestamp(meta["start"])
+            stored_end = pandas.Timestamp(meta["end"])
+            covered = [stored_start, stored_end]
+            # another process may have stored a range apart from this one, and the
+            # covered range must stay contiguous.
+            if start <= stored_end and end >= stored_start:
+                covered = [min(start, stored_start), max(end, stored_end)]
+
+            if (
+                previous is not None
+                and stored is not None
+                and covered == [stored_start, stored_end]
+                and stored.equals(previous)
+            ):
+                os.utime(path)  # checked, but nothing changed
+                return stored, _checked(path, meta)
+
+        meta = dict(
+            start=covered[0].isoformat(),
+            end=covered[1].isoformat(),
+            synced_at=datetime.datetime.utcnow().isoformat(),
+        )
+        if stored is not None:
+            write(path, stored, meta)
+
+    return stored, meta
+
+
+def missing_ranges(
+    start: pandas.Timestamp, end: pandas.Timestamp, meta: Dict[str, Any], interval: str,
+) -> List[Tuple[pandas.Timestamp, pandas.Timestamp]]:
+    """the date ranges that must be fetched so the store covers [start, end].
+
+    The ranges always leave the covered range contiguous.
+    """
+    if not meta:
+        return [(start, end)]
+
+    covered_start = pandas.Timestamp(meta["start"])
+    covered_end = pandas.Timestamp(meta["end"])
+
+    ranges = []
+    if start < covered_start:
+        ranges.append((start, covered_start))
+
+    # the last stored period may be partial, and hydstra may still revise recent
+    # data, unless it was checked within the sync interval.
+    revisable = _revisable()
+    tail_start = _PERIOD_START[interval](min(covered_end, revisable))
+    checked_at = pandas.Timestamp(meta.get("checked_at", meta["synced_at"]))
+    is_fresh = checked_at > pandas.Timestamp(
+        datetime.datetime.utcnow()
+    ) - pandas.Timedelta(seconds=STORE_CFG["sync_interval_seconds"])
+    if end > covered_end or (
+        covered_end > revisable and end > tail_start and not is_fresh
+    ):
+        ranges.append((tail_start, end))
+
+    return ranges
+
+
+def _today() -> pandas.Timestamp:
+    return pandas.Timestamp(datetime.date.today())
+
+
+def _revisable() -> pandas.Timestamp:
+    """hydstra may still revise the points from this date on."""
+    return _today() - pandas.Timedelta(days=STORE_CFG["refetch_recent_days"])
+
+
+def _last_known_good(
+    stored: Optional[pandas.DataFrame],
+    meta: Dict[str, Any],
+    start: pandas.Timestamp,
+    end: pandas.Timestamp,
+) -> Optional[Dict[str, Any]]:
+    if stored is None:
+        return None
+    frame = stored.loc[(stored.index >= start) & (stored.index <= end)]
+    if frame.empty:
+        return None
+    return {"frame": frame, "stale": meta["synced_at"]}
+
+
+async def _fetch(
+    start: pandas.Timestamp, end: pandas.Timestamp, stream: bool, **inputs: Any
+) -> Optional[Dict[str, Any]]:
+    """the points from `start` to `end` under 'arrays', or the hydstra error."""
+    details = await helper.get_site_variable_as_trace(
+        start_date=start.date().isoformat(),
+        end_date=end.date().isoformat(),
+        stream=stream,
+        **inputs,
+    )
+    if details is not None and "trace" in details:
+        # the cached response is shared, so it's left as it is.
+        arrays = await _run(hydstra_trace_to_arrays, details["trace"])
+        details = {k: v for k, v in details.items() if k != "trace"}
+        details["arrays"] = arrays
+    return details
+
+
+async def _run(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """run blocking file or frame work in the default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def _has_points(details: Dict[str, Any]) -> bool:
+    return "arrays" in details and len(details["arrays"]["t"]) > 0
+
+
+def _within(
+    stored: Optional[pandas.DataFrame],
+    start: pandas.Timestamp,
+    end: pandas.Timestamp,
+    site: str,
+    varfrom: str,
+) -> Dict[str, Any]:
+    if stored is None:
+        frame = pandas.DataFrame([])
+    else:
+        frame = stored.loc[(stored.index >= start) & (stored.index <= end)]
+
+    if frame.empty:
+        return {
+            "error_num": 126,
+            "error_msg": f"No data within requested period for {site} {varfrom}.",
+        }
+
+    return {"frame": frame}
+
+
+def update_rollup(
+    base_path: Path, path: Path, base: str, interval: str, agg_method: str
+) -> Optional[pandas.DataFrame]:
+    """bring the rollup at `path` of the stored trace at `base_path` up to date
+    with it, and return it.
+
+    Only the periods from the recent tail of the stored trace at the time of the
+    last rollup are rolled up again, unless its covered range starts earlier now.
+    """
+    with _locked(path):
+        base_meta = read_meta(base_path)
+        if not base_meta:  # pragma: no cover
+            return None
+
+        rolled, meta = read(path)
+        if rolled is not None and meta.get("synced_at") == base_meta["synced_at"]:
+            metrics.incr("hydstra_store", "rollup_hits")
+            return rolled
+
+        if (
+            rolled is not None
+            and meta.get("base_start") == base_meta["start"]
+            and "final_until" in meta
+        ):
+            since = _PERIOD_START[interval](pandas.Timestamp(meta["final_until"]))
+            stored, _ = read(base_path, since=since)
+            rolled = rolled.loc[rolled.index < since]
+        else:
+            stored, _ = read(base_path)
+            rolled = None
+
+        if stored is not None and not stored.empty:
+            tail = pyramid.rollup(stored, base, interval, agg_method)
+            rolled = tail if rolled is None else pandas.concat([rolled, tail])
+        metrics.incr("hydstra_store", "rollups")
+        metrics.incr(
+            "hydstra_store", "rollup_points", 0 if stored is None else len(stored)
+        )
+
+        # the base points before its tail at this time don't change anymore.
+        final_until = _PERIOD_START[base](
+            min(pandas.Timestamp(base_meta["end"]), _revisable())
+        )
+        meta = dict(
+            synced_at=base_meta["synced_at"],
+            base_start=base_meta["start"],
+            final_until=final_until.isoformat(),
+        )
+        if rolled is not None:
+            write(path, rolled, meta)
+
+    return rolled
+
+
+async def _get_rollup(
+    start: pandas.Timestamp, end: pandas.Timestamp, base: str, **inputs: Any
+) -> Optional[Dict[str, Any]]:
+    """serve `inputs` from the rollup of the stored `base` interval."""
+    interval, agg_method = inputs["interval"], inputs["agg_method"]
+    base_inputs = {**inputs, "interval": base}
+    base_path = store_path(**base_inputs)
+    base_end = _base_end(end, interval, base)
+
+    # e.g., the recent tail of the base is checked again, if it's due.
+    details: Dict[str, Any] = {}
+    base_meta = await _run(read_meta, base_path)
+    if missing_ranges(start, base_end, base_meta, base):
+        fetched = await get_site_variable_as_frame(
+            start_date=start.date().isoformat(),
+            end_date=base_end.date().isoformat(),
+            **base_inputs,
+        )
+        if fetched is None or "frame" not in fetched:
+            return fetched
+        details = fetched
+
+    rolled = await _run(
+        update_rollup,
+        base_path,
+        rollup_path(base_path, interval),
+        base,
+        interval,
+        agg_method,
+    )
+
+    result = _within(rolled, start, end, inputs["site"], inputs["varfrom"])
+    if "stale" in details and "frame" in result:
+        result["stale"] = details["stale"]
+    return result
+
+
+async def get_site_variable_as_frame(
+    site: str,
+    varfrom: str,
+    varto: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    interval: Optional[str] = None,
+    agg_method: Optional[str] = None,
+    datasource: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """like `helper.get_site_variable_as_trace`, but served from the local store.
+
+    Returns the hydstra error details (or None if hydstra is unavailable) just
+    like `helper.get_site_variable_as_trace`, otherwise a dict with the
+    requested points under 'frame', with (at least) the `COLUMNS` of
+    `helper.hydstra_trace_to_series`, and under 'stale' the time they were
+    synced if hydstra is unavailable.
+    """
+    varto = varto or varfrom
+    interval = interval or "hour"
+    agg_method = agg_method or "mean"
+    datasource = datasource or "PUBLISH"
+
+    inputs = dict(
+        site=site,
+        varfrom=varfrom,
+        varto=varto,
+        interval=interval,
+        agg_method=agg_method,
+        datasource=datasource,
+    )
+
+    if not is_enabled() or start_date is None or interval not in _PERIOD_START:
+        try:
+            details = await helper.get_site_variable_as_trace(
+                start_date=start_date, end_date=end_date, **inputs
+            )
+        except Exception as e:
+            if not api.is_unavailable(e):
+                raise
+            logger.warning(f"hydstra unavailable: {e!r}")
+            return None
+        if details is None or "error_msg" in details or not details.get("trace"):
+            return details
+        return {"frame": await _run(helper.hydstra_trace_to_series, details["trace"])}
+
+    start = _PERIOD_START[interval](pandas.Timestamp(start_date))
+    end = pandas.Timestamp(end_date) if end_date else _today()
+
+    base = await _run(rollup_base, start, end, **inputs)
+    if base != interval:
+        return await _get_rollup(start, end, base, **inputs)
+
+    path = store_path(**inputs)
+    stored, meta = await _run(read, path)
+    ranges = missing_ranges(start, end, meta, interval)
+
+    if ranges:
+        logger.info(f"hydstra store fetching {ranges} for {path}")
+        # new and earlier ranges may be long, so they are streamed. The recent
+        # tail goes through the cached and batched `api.get_trace`.
+        is_head = [
+            bool(meta) and e <= pandas.Timestamp(meta["start"]) for _, e in ranges
+        ]
+        try:
+            results = await asyncio.gather(
+                *(
+                    _fetch(s, e, stream=not meta or head, **inputs)
+                    for (s, e), head in zip(ranges, is_head)
+                )
+            )
+        except Exception as e:
+            if not api.is_unavailable(e):
+                raise
+            logger.warning(f"hydstra unavailable, serving {path} as stored: {e!r}")
+            return _last_known_good(stored, meta, start, end)
+
+        heads: List[pandas.DataFrame] = []
+        tails: List[pandas.DataFrame] = []
+        for head, details in zip(is_head, results):
+            if details is None:
+                return _last_known_good(stored, meta, start, end)
+            if details.get("error_num") == 126:  # no data in this range
+                continue
+            if "error_msg" in details or not _has_points(details):
+                return details
+            frame = helper.hydstra_arrays_to_frame(details["arrays"])
+            (heads if head else tails).append(frame)
+
+        stored, meta = await _run(merge, path, heads, tails, start, end)
+
+    return _within(stored, start, end, site, varfrom)
+
+
+def stored_paths() -> List[Path]:
+    return sorted(STORE_PATH.glob("*/*/*/*.parquet"))
+
+
+async def sync_path(path: Path) -> Optional[Dict[str, Any]]:
+    """fetch the missing tail of an existing store file up to today."""
+    meta = await _run(read_meta, path)
+    if not meta:  # pragma: no cover
+        return None
+
+    datasource, site, variables = path.parts[-4:-1]
+    varfrom, varto = variables.split("-", 1)
+    interval, agg_method = path.stem.split("_", 1)
+
+    return await get_site_variable_as_frame(
+        site=site,
+        varfrom=varfrom,
+        varto=varto,
+        start_date=pandas.Timestamp(meta["end"]).date().isoformat(),
+        end_date=_today().date().isoformat(),
+        interval=interval,
+        agg_method=agg_method,
+        datasource=datasource,
+    )
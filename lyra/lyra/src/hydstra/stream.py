@@ -0,0 +1,167 @@
+"""Incremental decoding of `get_ts_traces` responses.
+
+A multi year hourly trace is a json array of millions of small objects, which
+take several times more memory as python dicts than as the typed arrays we
+want in the end. `TraceDecoder` is fed the response body as it arrives, and
+parses each `trace` array a chunk at a time into growing numpy arrays, so only
+one chunk of points is ever held as python objects.
+
+The rest of the response is decoded as usual, with each trace's points under
+'arrays' (see `hydstra_trace_to_arrays`) instead of 'trace'.
+"""
+import re
+from operator import itemgetter
+from typing import Any, Dict, List, Optional
+
+import numpy
+import orjson
+import pandas
+
+# the points of a trace are flat objects of numbers and strings of digits, so
+# neither braces nor brackets appear inside them.
+_TRACE_KEY = re.compile(rb'"trace"\s*:\s*\[')
+_KEY_OVERLAP = 64  # longer than any match of _TRACE_KEY
+_BYTES_PER_POINT = 40  # about; used to guess how many points a response holds
+
+
+_v, _t, _q = itemgetter("v"), itemgetter("t"), itemgetter("q")
+
+
+def parse_hydstra_times(t: numpy.ndarray) -> numpy.ndarray:
+    """parse "%Y%m%d%H%M%S" byte strings (dtype S14) into int64 epoch nanoseconds.
+
+    Each digit is read straight from the bytes, so no python objects are made.
+    """
+    digits = t.view(numpy.uint8).reshape(-1, 14) - ord("0")
+    if (digits > 9).any():  # not all digits; let pandas parse it or raise
+        return pandas.to_datetime(t.astype(str), format="%Y%m%d%H%M%S").values.view(
+            "int64"
+        )
+
+    d = digits.astype(numpy.int64)
+    year = d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3]
+    month = d[:, 4] * 10 + d[:, 5]
+    day = d[:, 6] * 10 + d[:, 7]
+    hour = d[:, 8] * 10 + d[:, 9]
+    minute = d[:, 10] * 10 + d[:, 11]
+    second = d[:, 12] * 10 + d[:, 13]
+
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    days = months.astype("datetime64[D]").astype(numpy.int64) + day - 1
+    seconds = ((days * 24 + hour) * 60 + minute) * 60 + second
+    return seconds * 1_000_000_000
+
+
+def hydstra_trace_to_arrays(trace: List[Dict[str, Any]]) -> Dict[str, numpy.ndarray]:
+    """typed arrays of a hydstra trace: 't' as int64 epoch nanoseconds, 'v' as
+    float64 and 'q' as int16 quality codes.
+
+    The values and quality codes are filled straight from the points, without
+    intermediate lists. Times may be strings or json numbers of digits.
+    """
+    n = len(trace)
+    ts = list(map(str, map(_t, trace)))
+    # every time must be 14 ascii characters, or the fixed width parse would
+    # misread the times after a shorter or longer one.
+    lengths = numpy.fromiter(map(len, ts), dtype=numpy.int64, count=n)
+    t = "".join(ts).encode()
+    if (lengths == 14).all() and len(t) == 14 * n:
+        times = parse_hydstra_times(numpy.frombuffer(t, dtype="S14"))
+    else:
+        times = pandas.to_datetime(ts, format="%Y%m%d%H%M%S").values.view("int64")
+
+    return {
+        "t": times,
+        "v": numpy.fromiter(map(float, map(_v, trace)), dtype=numpy.float64, count=n),
+        "q": numpy.fromiter(map(_q, trace), dtype=numpy.int16, count=n),
+    }
+
+
+class _Columns:
+    def __init__(self, capacity: int):
+        self.n = 0
+        self.arrays: Dict[str, numpy.ndarray] = {
+            "t": numpy.empty(capacity, dtype=numpy.int64),
+            "v": numpy.empty(capacity, dtype=numpy.float64),
+            "q": numpy.empty(capacity, dtype=numpy.int16),
+        }
+
+    def extend(self, points: List[Dict[str, Any]]) -> None:
+        if not points:
+            return
+        chunk = hydstra_trace_to_arrays(points)
+        n = self.n + len(points)
+        capacity = len(self.arrays["t"])
+        if n > capacity:
+            capacity = max(n, capacity * 2)
+            for arr in self.arrays.values():
+                arr.resize(capacity, refcheck=False)
+        for k, arr in self.arrays.items():
+            arr[self.n : n] = chunk[k]
+        self.n = n
+
+    def result(self) -> Dict[str, numpy.ndarray]:
+        for arr in self.arrays.values():
+            arr.resize(self.n, refcheck=False)
+        return self.arrays
+
+
+class TraceDecoder:
+    def __init__(self, content_length: Optional[int] = None):
+        """
+        :param content_length: size of the response body, if known, to size the
+            arrays up front
+        """
+        self.capacity = max(1024, (content_length or 0) // _BYTES_PER_POINT)
+        self._skeleton = bytearray()  # the response without the trace points
+        self._buffer = b""
+        self._columns: Optional[_Columns] = None
+        self._traces: List[Dict[str, numpy.ndarray]] = []
+
+    def feed(self, chunk: bytes) -> None:
+        self._buffer += chunk
+
+        while True:
+            if self._columns is None:
+                match = _TRACE_KEY.search(self._buffer)
+                if match is None:
+                    # keep the end, in case a key is split across chunks
+                    keep = max(0, len(self._buffer) - _KEY_OVERLAP)
+                    self._skeleton += self._buffer[:keep]
+                    self._buffer = self._buffer[keep:]
+                    return
+
+                self._skeleton += self._buffer[: match.end()]
+                self._buffer = self._buffer[match.end() :]
+                self._columns = _Columns(self.capacity)
+                # the content length was a guess for the whole response, so any
+                # later traces (of a multi site request) start small and grow.
+                self.capacity = 1024
+
+            else:
+                end = self._buffer.find(b"]")
+                stop = end if end >= 0 else self._buffer.rfind(b"}") + 1
+                points = self._buffer[:stop].strip(b" \t\r\n,")
+                if points:
+                    self._columns.extend(orjson.loads(b"[" + points + b"]"))
+                self._buffer = self._buffer[stop:]
+
+                if end < 0:
+                    return
+
+                self._traces.append(self._columns.result())
+                self._columns = None
+
+    def close(self) -> Dict[str, Any]:
+        if self._columns is not None:
+            raise ValueError("response ended inside a trace")
+
+        self._skeleton += self._buffer
+        response: Dict[str, Any] = orjson.loads(bytes(self._skeleton))
+
+        traces = response.get("return", {}).get("traces", [])
+        for trace, arrays in zip(traces, self._traces):
+            del trace["trace"]
+            trace["arrays"] = arrays
+
+        return response
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import io
 import json
@@ -11,8 +12,10 @@ import pytz
 from shapely.ops import nearest_points
 
 from lyra.connections import azure_fs
+from lyra.core.cache import bump_version
 from lyra.core.config import cfg
-from lyra.src.hydstra import api, helper
+from lyra.core.sites import registry as site_registry
+from lyra.src.hydstra import api, helper, store
 from lyra.src.mnwd import spatial
 from lyra.src.mnwd.dt_metrics import dt_metrics
 from lyra.src.rsb import graph
@@ -303,3 +306,59 @@ async def save_site_geojson_info():  # pragma: no cover
     file_obj.write(json.dumps(geo_info_dct).encode())
 
     azure_fs.put_file_object(file_obj, "swn/hydstra/swn_sites.json")
+
+    bump_version("hydstra_sites")
+
+
+async def sync_hydstra_store(concurrency: int = 4) -> Dict[str, int]:
+    """bring the local hydstra store up to date.
+
+    Every stored trace is extended to today, and the hourly trace of each
+    hydstra variable at each swn site is seeded if it isn't stored yet.
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    async def _limited(coro):
+        async with limit:
+            return await coro
+
+    jobs = [store.sync_path(path) for path in store.stored_paths()]
+
+    start_date = store.STORE_CFG["sync_start_date"]
+    end_date = datetime.date.today().isoformat()
+    hydstra_variables = [
+        k for k, v in cfg["variables"].items() if v["source"] == "hydstra"
+    ]
+
+    for props in site_registry.all_props():
+        for variable in hydstra_variables:
+            info = props.get(f"{variable}_info")
+            if not props.get(f"has_{variable}") or not info:
+                continue
+            inputs = dict(
+                site=props["station"],
+                varfrom=info["varfrom"],
+                varto=info["varto"],
+                datasource="PUBLISH",
+                interval="hour",
+                agg_method=cfg["variables"][variable]["allowed_aggregations"][0],
+            )
+            if store.store_path(**inputs).exists():
+                continue
+            jobs.append(
+                store.get_site_variable_as_frame(
+                    start_date=start_date, end_date=end_date, **inputs
+                )
+            )
+
+    results = await asyncio.gather(
+        *(_limited(job) for job in jobs), return_exceptions=True
+    )
+
+    failed = 0
+    for result in results:
+        if isinstance(result, Exception) or result is None:
+            logger.warning(f"hydstra store sync failed: {result!r}")
+            failed += 1
+
+    return {"synced": len(results) - failed, "failed": failed}
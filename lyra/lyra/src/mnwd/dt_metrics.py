@@ -26,7 +26,9 @@ def _fetch_categories_df(engine):
     return cat
 
 
-@cache_decorator(ex=None)  # expires only when cache is flushed.
+@cache_decorator(
+    ex=None, depends_on=["drooltool"]
+)  # expires only when the drooltool data changes.
 def _fetch_categories_as_json(
     engine: Optional[Engine] = None,
 ) -> bytes:  # pragma: no cover
@@ -133,7 +135,7 @@ def _fetch_dt_metrics_records(
     return records
 
 
-@cache_decorator(ex=3600 * 6)  # expires in 6 hours
+@cache_decorator(ex=3600 * 6, depends_on=["drooltool"])  # expires in 6 hours
 def fetch_dt_metrics_as_json(
     qry: str,
     user_catch: List[int],
@@ -165,7 +167,12 @@ def agg_dt_metrics_df(
     return agg_records
 
 
-@cache_decorator(ex=3600 * 6)  # expires in 6 hours
+@cache_decorator(
+    ex=3600 * 6,
+    stale_after=3600 * 3,
+    unordered=["catchidns", "variables", "years", "months"],
+    depends_on=["drooltool"],
+)  # refresh after 3 hours
 def dt_metrics(
     catchidns: Optional[List[int]] = None,
     variables: Optional[List[str]] = None,
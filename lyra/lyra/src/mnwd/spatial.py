@@ -29,7 +29,9 @@ def _filter_rsb_df(
     return df
 
 
-@cache_decorator(ex=3600 * 24)  # expires in 24 hours
+@cache_decorator(
+    ex=3600 * 24, unordered=["watersheds", "catchidns"], depends_on=["rsb"]
+)  # expires in 24 hours
 def _rsb_data_bytestring(
     watersheds: Optional[List[str]] = None, catchidns: Optional[List[str]] = None,
 ) -> bytes:
@@ -47,7 +49,9 @@ def rsb_data(**kwargs):
     return orjson.loads(_rsb_data_bytestring(**kwargs))
 
 
-@cache_decorator(ex=3600 * 24)  # expires in 24 hours
+@cache_decorator(
+    ex=3600 * 24, unordered=["watersheds", "catchidns"], depends_on=["rsb"]
+)  # expires in 24 hours
 def _rsb_geojson_bytestring(
     bbox: Optional[Tuple[float, float, float, float]] = None,
     watersheds: Optional[List[str]] = None,
@@ -75,7 +79,12 @@ def rsb_geojson(**kwargs: Any) -> dict:
     return rsp
 
 
-@cache_decorator(ex=3600 * 24)  # expires in 24 hours
+@cache_decorator(
+    ex=3600 * 24,
+    stale_after=3600 * 6,
+    unordered=["watersheds", "catchidns"],
+    depends_on=["rsb"],
+)  # refresh after 6 hours
 def _rsb_topojson_bytestring(
     bbox: Optional[Tuple[float, float, float, float]] = None,
     watersheds: Optional[List[str]] = None,
@@ -104,7 +113,7 @@ def rsb_topojson(**kwargs):
     return rsp
 
 
-@cache_decorator(ex=3600 * 6)  # expires in 6 hours
+@cache_decorator(ex=3600 * 6, depends_on=["rsb"])  # expires in 6 hours
 def rsb_spatial(
     f: Optional[str] = None,
     xmin: Optional[float] = None,
@@ -5,7 +5,7 @@ from sqlalchemy.engine import Engine
 
 from lyra.connections.azure_fs import ShareClient
 from lyra.connections.database import engine, reconnect_engine
-from lyra.core.cache import cache_decorator
+from lyra.core.cache import bump_version, cache_decorator
 from lyra.core.config import config
 from lyra.src.mnwd import dt_metrics, spatial
 from lyra.src.mnwd.helper import (
@@ -51,6 +51,9 @@ def update_drooltool_database(
         ),
     )
 
+    if response["succeeded"]:
+        bump_version("drooltool")
+
     return response
 
 
@@ -58,6 +61,8 @@ def update_rsb_geojson(
     file: Optional[Union[str, Path]] = None, share: Optional[ShareClient] = None,
 ) -> Dict:
     succeeded = fetch_and_refresh_oc_rsb_geojson_file(file=file, share=share)
+    if succeeded:
+        bump_version("rsb")
     response = dict(taskname="update_rsb_geojson", succeeded=succeeded)
 
     return response
@@ -67,19 +72,29 @@ def update_rsb_geojson(
 ## -----------
 
 
-@cache_decorator(ex=3600 * 6, as_response=True)  # expires in 6 hours
+@cache_decorator(
+    ex=3600 * 6, stale_after=3600 * 3, as_response=True, depends_on=["rsb"]
+)  # refresh after 3 hours
 def rsb_spatial_response(**kwargs: Any) -> bytes:
     result: bytes = spatial.rsb_spatial(**kwargs)
     return result
 
 
-@cache_decorator(ex=3600 * 6, as_response=True)  # expires in 6 hours
+@cache_decorator(
+    ex=3600 * 6, as_response=True, depends_on=["rsb"]
+)  # expires in 6 hours
 def rsb_data_response(**kwargs: Any) -> bytes:
     result: bytes = spatial._rsb_data_bytestring(**kwargs)
     return result
 
 
-@cache_decorator(ex=3600 * 6, as_response=True)  # expires in 6 hours
+@cache_decorator(
+    ex=3600 * 6,
+    stale_after=3600 * 3,
+    as_response=True,
+    unordered=["catchidns", "variables", "years", "months"],
+    depends_on=["drooltool"],
+)  # refresh after 3 hours
 def dt_metrics_response(
     catchidns: Optional[List[int]] = None,
     variables: Optional[List[str]] = None,
@@ -39,7 +39,7 @@ def construct_rsb_graph_from_mnwd_geojson(
     return g
 
 
-@cache_decorator(ex=None)  #
+@cache_decorator(ex=None, depends_on=["rsb"])  # expires when the rsb data changes
 def construct_rsb_graph_from_mnwd_geojson_bytestring(
     file_contents: Optional[str] = None,
     share: Optional[str] = None,
@@ -54,7 +54,7 @@ def construct_rsb_graph_from_mnwd_geojson_bytestring(
     return orjson.dumps(g, default=networkx.node_link_data)
 
 
-@cache_decorator(ex=3600 * 6)  # expires in 6 hours
+@cache_decorator(ex=3600 * 6, depends_on=["rsb"])  # expires in 6 hours
 def rsb_upstream_trace(
     catchidn: int,
     file_contents: Optional[str] = None,
@@ -71,7 +71,7 @@ def rsb_upstream_trace(
     return orjson.dumps(upstream)
 
 
-@cache_decorator(ex=3600 * 6)  # expires in 6 hours
+@cache_decorator(ex=3600 * 6, depends_on=["rsb"])  # expires in 6 hours
 def rsb_downstream_trace(
     catchidn: int,
     file_contents: Optional[str] = None,
@@ -4,7 +4,7 @@ from lyra.core.cache import cache_decorator
 from lyra.src.rsb.graph import rsb_downstream_trace, rsb_upstream_trace
 
 
-@cache_decorator(ex=3600, as_response=True)  # expires in 6 hours
+@cache_decorator(ex=3600, as_response=True, depends_on=["rsb"])  # expires in 1 hour
 def rsb_upstream_trace_response(
     catchidn: int,
     file_contents: Optional[str] = None,
@@ -22,7 +22,7 @@ def rsb_upstream_trace_response(
     return result
 
 
-@cache_decorator(ex=3600, as_response=True)  # expires in 6 hours
+@cache_decorator(ex=3600, as_response=True, depends_on=["rsb"])  # expires in 1 hour
 def rsb_downstream_trace_response(
     catchidn: int,
     file_contents: Optional[str] = None,
@@ -0,0 +1,217 @@
+"""Process-wide cache of the dry weather masks of each rain gauge.
+
+Every wet or dry weather request and every diversion scenario needs the dry
+hours of its nearest rain gauge, which is usually shared by many sites. Each
+gauge and first hour keeps one copy of its cleaned rainfall, the version (a hash)
+of the record it was cleaned from, and the masks of each set of parameters as
+bitsets over the hours. Requests for the same version are served without
+cleaning or comparing the rainfall again.
+
+When a gauge's rainfall changes, e.g., new hours arrive or hydstra revises the
+recent ones, only the hours from the start of the storm that contains the first
+changed hour are computed again. The hours before it can't change.
+
+Unlike `utils.identify_dry_weather`, the hours outside of storms never count as
+a qualifying event, however much rain they add up to.
+"""
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy
+import pandas
+
+from lyra.core.async_cache.lru import LRU
+from lyra.core.config import cfg
+from lyra.core.metrics import registry as metrics
+from lyra.src.timeseries import utils
+
+logger = logging.getLogger(__name__)
+
+DRY_WEATHER_CFG: Dict[str, Any] = cfg["dry_weather"]
+
+
+class Masks(NamedTuple):
+    hours: int  # the first hours that are still valid for the gauge's rainfall
+    is_storm: numpy.ndarray  # packed bits, like the rest
+    is_qualifying_event: numpy.ndarray
+    is_dry: numpy.ndarray
+
+
+class Rainfall(NamedTuple):
+    version: str
+    series: pandas.Series  # cleaned, and shared by all of the masks
+    masks: Dict[Tuple, Masks]  # by parameters
+
+
+def version(rainfall_record: pandas.Series) -> str:
+    """a hash of the points (and their times) of `rainfall_record`."""
+    hashed = pandas.util.hash_pandas_object(rainfall_record, index=True)
+    return hashlib.blake2b(hashed.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+
+def _pack(bits: numpy.ndarray) -> numpy.ndarray:
+    return numpy.packbits(bits)
+
+
+def _unpack(packed: numpy.ndarray, n: int) -> numpy.ndarray:
+    return numpy.unpackbits(packed, count=n).astype(bool)
+
+
+def first_change(old: numpy.ndarray, new: numpy.ndarray) -> int:
+    """the first hour at which `new` differs from `old`, or the shorter length."""
+    n = min(len(old), len(new))
+    a, b = old[:n], new[:n]
+    changed = numpy.flatnonzero((a != b) & ~(numpy.isnan(a) & numpy.isnan(b)))
+    return int(changed[0]) if changed.size else n
+
+
+def compute_masks(
+    values: numpy.ndarray,
+    min_event_depth: float,
+    separation: int,
+    delay: int,
+    masks: Optional[Masks] = None,
+) -> Masks:
+    """the masks of `values`, reusing the hours of `masks` that can't have changed.
+
+    :param separation: hours without rain that separate storms
+    :param delay: hours after a qualifying event that are still wet
+    :param masks: computed earlier from the same gauge with the same parameters,
+        of which the first `masks.hours` are still valid for `values`
+    """
+    n = len(values)
+    changed = 0 if masks is None else min(masks.hours, n)
+
+    def head(packed: str, hours: int) -> numpy.ndarray:
+        if not hours:
+            return numpy.zeros(0, dtype=bool)
+        return _unpack(getattr(masks, packed), hours)
+
+    # the hours from the start of the storm that contains the last unchanged
+    # hour (or from the first changed hour, if it's dry) are computed again.
+    is_storm = head("is_storm", changed)
+    start = changed
+    if changed and is_storm[-1]:
+        dry = numpy.flatnonzero(~is_storm)
+        start = int(dry[-1]) + 1 if dry.size else 0
+
+    lookback = max(0, changed - separation + 1)
+    is_storm = numpy.concatenate(
+        [
+            is_storm,
+            utils.is_storm_hour(values[lookback:], separation)[changed - lookback :],
+        ]
+    )
+
+    storm = utils.number_storms(is_storm[start:])
+    depth = utils.storm_depths(values[start:], storm, min_event_depth)
+    is_qualifying_event = numpy.concatenate(
+        [
+            head("is_qualifying_event", start),
+            (depth > min_event_depth)[storm] & (storm > 0),
+        ]
+    )
+
+    lookback = max(0, start - delay + 1)
+    is_dry = numpy.concatenate(
+        [
+            head("is_dry", start),
+            utils.is_dry_hour(is_qualifying_event[lookback:], delay)[
+                start - lookback :
+            ],
+        ]
+    )
+
+    metrics.incr("dry_weather_masks", "hours_computed", n - start)
+
+    return Masks(
+        hours=n,
+        is_storm=_pack(is_storm),
+        is_qualifying_event=_pack(is_qualifying_event),
+        is_dry=_pack(is_dry),
+    )
+
+
+class DryWeatherMasks:
+    def __init__(self, maxsize: int = 64):
+        """
+        :param maxsize: gauges (per first hour) to keep, least recently used are
+            dropped first
+        """
+        self._lock = threading.Lock()
+        self._entries: LRU = LRU(maxsize=maxsize)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _rainfall(self, key: Tuple, rainfall_record: pandas.Series) -> Rainfall:
+        """the entry of `key` for `rainfall_record`, with the masks that are still
+        valid for it. Call with the lock held.
+        """
+        record_version = version(rainfall_record)
+        entry = self._entries[key] if key in self._entries else None
+        if entry is not None and entry.version == record_version:
+            return entry
+
+        series = utils.clean_series(rainfall_record).copy()
+        assert utils.infer_freq(series.index) == "H", "must be hourly data."
+
+        masks: Dict[Tuple, Masks] = {}
+        if entry is not None:
+            values = series.to_numpy(dtype=float)
+            changed = first_change(entry.series.to_numpy(dtype=float), values)
+            masks = {
+                params: m._replace(hours=min(m.hours, changed))
+                for params, m in entry.masks.items()
+            }
+
+        entry = Rainfall(version=record_version, series=series, masks=masks)
+        self._entries[key] = entry
+        return entry
+
+    def get(
+        self,
+        gauge: str,
+        rainfall_record: pandas.Series,
+        min_event_depth: Optional[float] = None,
+        event_separation_hrs: Optional[float] = None,
+        after_rain_delay_hrs: Optional[float] = None,
+    ) -> pandas.DataFrame:
+        """like `utils.identify_dry_weather`, but only with the 'is_dry' column.
+
+        :param gauge: the rain gauge of `rainfall_record`
+        """
+        if min_event_depth is None:
+            min_event_depth = 0.1
+        if event_separation_hrs is None:
+            event_separation_hrs = 6
+        if after_rain_delay_hrs is None:
+            after_rain_delay_hrs = 72
+
+        separation = utils.window_points(pandas.Timedelta(f"{event_separation_hrs}H"))
+        delay = utils.window_points(pandas.Timedelta(f"{after_rain_delay_hrs}H"))
+        params: Tuple = (float(min_event_depth), separation, delay)
+
+        with self._lock:
+            entry = self._rainfall((gauge, rainfall_record.index[0]), rainfall_record)
+            n = len(entry.series)
+            masks = entry.masks.get(params)
+            if masks is not None and masks.hours == n:
+                metrics.incr("dry_weather_masks", "hits")
+            else:
+                metrics.incr(
+                    "dry_weather_masks", "misses" if masks is None else "extends"
+                )
+                values = entry.series.to_numpy(dtype=float)
+                masks = compute_masks(values, min_event_depth, separation, delay, masks)
+                entry.masks[params] = masks
+
+        is_dry = _unpack(masks.is_dry, n)
+
+        return entry.series.to_frame().assign(is_dry=is_dry)
+
+
+masks = DryWeatherMasks(maxsize=DRY_WEATHER_CFG["maxsize"])
@@ -1,6 +1,5 @@
 import asyncio
 import datetime
-import json
 from functools import partial
 from typing import Any, Dict, List, Optional, Union
 
@@ -9,27 +8,12 @@ import pytz
 
 from lyra.core.config import cfg
 from lyra.core.errors import HydstraIOError
-from lyra.core.io import load_file
-from lyra.core.utils import local_path
-from lyra.src.hydstra import helper
+from lyra.core.sites import registry as site_registry
+from lyra.core.utils import local_path, run_sync
+from lyra.src.hydstra import store
+from lyra.src.hydstra.pyramid import AGG_REMAP, INTERVAL_REMAP
 from lyra.src.mnwd.helper import get_timeseries_from_dt_metrics
-from lyra.src.timeseries import utils
-
-AGG_REMAP = {
-    # hydstra : pandas
-    "tot": "sum",
-    "cum": "cumsum",
-    "mean": "mean",
-    "max": "max",
-    "min": "min",
-}
-
-INTERVAL_REMAP = {
-    "year": "YS",
-    "month": "MS",
-    "day": "D",
-    "hour": "H",
-}
+from lyra.src.timeseries.dry_weather import masks as dry_weather_masks
 
 SWN_SITES_PATH = local_path("data/mount/swn/hydstra").resolve() / "swn_sites.json"
 
@@ -72,18 +56,12 @@ class Timeseries(object):
         )
         self.warnings = warnings or []
 
-        # load_file will cache this so it doesn't happen for frequent requests
-        self.all_props: List[Any] = [
-            f["properties"]
-            for f in json.loads(load_file(self.cfg["site_path"]))["features"]
-        ]
+        self.site_props: Dict[str, Any] = site_registry.props(site)
 
-        self.site_props: Dict[str, Any] = next(
-            (x for x in self.all_props if x["station"] == site), {}
-        )
-
-        self.nearest_rainfall_station = nearest_rainfall_station or self.site_props.get(
-            "nearest_rainfall_station", "not_set"
+        self.nearest_rainfall_station: str = (
+            nearest_rainfall_station
+            or self.site_props.get("nearest_rainfall_station")
+            or "not_set"
         )
 
         self.hydstra_kwargs: Dict[str, Any] = hydstra_kwargs or {}
@@ -120,13 +98,19 @@ class Timeseries(object):
     @property
     def timeseries(self) -> pandas.Series:
         if self._timeseries is None:  # pragma: no branch
-            asyncio.run(self.init_ts())
+            run_sync(self.init_ts())
         return self._timeseries
 
     @timeseries.setter
     def timeseries(self, timeseries):  # pragma: no cover
         self._timeseries = timeseries
 
+    async def get_timeseries_async(self) -> pandas.Series:
+        """like `timeseries`, for callers that are already in an event loop."""
+        if self._timeseries is None:
+            await self.init_ts()
+        return self._timeseries
+
     @property
     def timeseries_src(self) -> pandas.DataFrame:
         if self._timeseries_src is None:  # pragma: no branch
@@ -138,19 +122,14 @@ class Timeseries(object):
     @property
     def nearest_rainfall_station_props(self):  # pragma: no cover
         if self._nearest_rainfall_station_props is None:
-            self._nearest_rainfall_station_props = next(
-                (
-                    x
-                    for x in self.all_props
-                    if x["station"] == self.nearest_rainfall_station
-                ),
-                {},
+            self._nearest_rainfall_station_props = site_registry.props(
+                self.nearest_rainfall_station
             )
         return self._nearest_rainfall_station_props
 
     def get_nearest_rainfall_ts(self):
         if self._nearest_rainfall_ts is None:
-            _ = asyncio.run(self.get_nearest_rainfall_ts_async())
+            _ = run_sync(self.get_nearest_rainfall_ts_async())
 
         return self._nearest_rainfall_ts
 
@@ -180,8 +159,8 @@ class Timeseries(object):
                 self._weather_condition_series is None,
             ]
         ):
-            self._weather_condition_series = utils.identify_dry_weather(
-                self.timeseries.value
+            self._weather_condition_series = dry_weather_masks.get(
+                self.site, self.timeseries.value
             )
 
         return self._weather_condition_series
@@ -207,14 +186,14 @@ class Timeseries(object):
             **self.hydstra_kwargs,
         )
 
-        async def process_hydstra_errors(**inputs: Dict) -> Any:
+        async def process_hydstra_errors(**inputs: Any) -> Any:
             """recursive helper function to try to get hydstra data and 
             handle errors when they occur
 
             uses globals: self
             
             """
-            timeseries_details = await helper.get_site_variable_as_trace(**inputs)
+            timeseries_details = await store.get_site_variable_as_frame(**inputs)
 
             if timeseries_details is None:
                 self.warnings.append(
@@ -262,12 +241,18 @@ class Timeseries(object):
         if timeseries_details == "empty":
             return pandas.DataFrame([])
 
-        trace = timeseries_details.get("trace")
+        hydstra_result = timeseries_details.get("frame")
 
-        if not trace:  # pragma: no cover
+        if hydstra_result is None:  # pragma: no cover
             raise ValueError(f"inputs failed: {inputs}, {timeseries_details}")
 
-        hydstra_result = helper.hydstra_trace_to_series(trace)
+        stale = timeseries_details.get("stale")
+        if stale is not None:
+            self.warnings.append(
+                f"Warning: Hydstra Database is temporarily unavailable. Showing "
+                f'"{self.variable}" at site "{self.site}" as last retrieved at '
+                f"{stale[:16].replace('T', ' ')} UTC, which may not be up to date."
+            )
 
         quality = self.cfg["hydstra"]["max_quality_flag"]
         questionable_data = hydstra_result.query("q > @quality")
@@ -284,7 +269,6 @@ class Timeseries(object):
                 f"Quality flags include: {', '.join((str(i) for i in flags))}."
             )
 
-        # this will block the async await... but so it goes.
         return await self.process_weather_condition(hydstra_result)
 
     async def process_weather_condition(self, df):
@@ -297,9 +281,10 @@ class Timeseries(object):
             q = "~is_dry"
 
         nearest_rain_ts = await self.get_nearest_rainfall_ts_async()
+        rain = await nearest_rain_ts.get_timeseries_async()
 
-        rain_start_date = nearest_rain_ts.timeseries.index.min()
-        rain_end_date = nearest_rain_ts.timeseries.index.max()
+        rain_start_date = rain.index.min()
+        rain_end_date = rain.index.max()
 
         if rain_start_date > df.index.min() or rain_end_date > df.index.max():
             df = df.loc[(df.index >= rain_start_date) & (df.index <= rain_end_date)]
@@ -309,13 +294,19 @@ class Timeseries(object):
                 f'at site "{self.site}" to support determination of weather_condition = {self.weather_condition}.'
             )
 
-        result = (
-            df.join(nearest_rain_ts.weather_condition_series["is_dry"], how="left")
-            .fillna({"is_dry": True})
-            .query(q)[["value"]]
-            .resample(INTERVAL_REMAP[self.interval])
-            .aggregate(AGG_REMAP[self.aggregation_method])
-        )
+        def _filter() -> pandas.DataFrame:
+            return (
+                df.join(nearest_rain_ts.weather_condition_series["is_dry"], how="left")
+                .fillna({"is_dry": True})
+                .query(q)[["value"]]
+                .resample(INTERVAL_REMAP[self.interval])
+                .aggregate(AGG_REMAP[self.aggregation_method])
+            )
+
+        # identifying dry weather takes long enough that it shouldn't hold up the
+        # other requests on this loop.
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, _filter)
 
         return result
 
@@ -345,16 +336,11 @@ class Timeseries(object):
 
         return timeseries
 
-    async def init_ts(self, delay: Optional[float] = None) -> pandas.Series:
+    async def init_ts(self) -> pandas.Series:
         source = self.variable_info.get("source")
 
         if source == "hydstra":
-            if delay:
-                # need to rate limit hydstra to 1 request per second, unfortunately.
-                # this issue was reported to Hydstra support on 2021-07-12.
-                # per communication 20201-07-19 this issue has been resolved.
-                await asyncio.sleep(delay)
-
+            # requests to hydstra are paced by `lyra.src.hydstra.api.hydstra_limiter`
             self._timeseries = await self._init_hydstra()
 
         elif source == "dt_metrics":
@@ -368,4 +354,4 @@ class Timeseries(object):
 
 async def gather_timeseries(ts):
 
-    await asyncio.gather(*(t.init_ts(delay=0) for i, t in enumerate(ts)))
+    await asyncio.gather(*(t.init_ts() for t in ts))
@@ -97,6 +97,52 @@ def get_storm_events(series, event_separation_hrs=None):
     return res
 
 
+def window_points(window):
+    """number of hourly points in a time based rolling window, which always
+    includes the current point."""
+    return max(1, int(numpy.ceil(window / pandas.Timedelta("1H"))))
+
+
+def rolling_sum(values, points):
+    """rolling sum of the last `points` values, like `rolling(...).sum().fillna(0)`
+    of a regular series with nans as zeros."""
+    csum = numpy.cumsum(values)
+    result = csum.copy()
+    result[points:] -= csum[:-points]
+    return result
+
+
+def is_storm_hour(values, points):
+    """whether any rain fell in the `points` hours up to each hour."""
+    return rolling_sum(numpy.nan_to_num(values), points) > 1e-6
+
+
+def number_storms(is_storm):
+    """number each run of storm hours from 1, and other hours 0."""
+    starts = is_storm & ~numpy.concatenate([[False], is_storm[:-1]])
+    return numpy.where(is_storm, numpy.cumsum(starts), 0)
+
+
+def storm_depths(values, storm, min_event_depth):
+    """the total rainfall of each storm number, summed like a pandas groupby."""
+    depth = numpy.bincount(storm, weights=numpy.nan_to_num(values))
+
+    # for depths this close to the threshold the order of summation matters, so
+    # these few are summed exactly as pandas would.
+    near = numpy.flatnonzero(numpy.isclose(depth, min_event_depth, rtol=1e-9, atol=0))
+    if near.size:
+        rows = numpy.isin(storm, near)
+        exact = pandas.Series(values[rows]).groupby(storm[rows]).sum()
+        depth[near] = exact.reindex(near, fill_value=0)
+
+    return depth
+
+
+def is_dry_hour(is_qualifying_event, points):
+    """whether no qualifying event fell in the `points` hours up to each hour."""
+    return rolling_sum(is_qualifying_event.astype(numpy.int64), points) == 0
+
+
 def identify_dry_weather(
     rainfall_record,
     min_event_depth=None,
@@ -105,6 +151,9 @@ def identify_dry_weather(
 ):
     """
     rainfall record must be hourly
+
+    Same as combining `get_storm_events` with a groupby of the storm depths, but
+    computed on the arrays of hourly values in a few linear passes.
     """
 
     if min_event_depth is None:
@@ -114,32 +163,23 @@ def identify_dry_weather(
     if after_rain_delay_hrs is None:
         after_rain_delay_hrs = 72
 
-    events = get_storm_events(
-        rainfall_record, event_separation_hrs=event_separation_hrs
-    )
+    series = clean_series(rainfall_record)
+    assert infer_freq(series.index) == "H", "must be hourly data."
 
-    events_over_threshold = (
-        events.groupby("storm")["value"]
-        .sum()
-        .transform(lambda x: x > min_event_depth)
-        .reset_index()
-        .assign(is_qualifying_event=lambda df: df["value"])
-        .set_index("storm")
-    )
+    values = series.to_numpy(dtype=float)
 
-    events = events.merge(
-        events_over_threshold["is_qualifying_event"],
-        how="left",
-        left_on="storm",
-        right_index=True,
-    ).assign(
-        is_dry=lambda df: (
-            df["is_qualifying_event"]
-            .rolling(f"{after_rain_delay_hrs}H")
-            .sum()
-            .fillna(0)
-            == 0
-        )
+    separation = window_points(pandas.Timedelta(f"{event_separation_hrs}H"))
+    storm = number_storms(is_storm_hour(values, separation))
+
+    # storm 0 is every hour that isn't in a storm
+    depth = storm_depths(values, storm, min_event_depth)
+    is_qualifying_event = (depth > min_event_depth)[storm]
+
+    delay = window_points(pandas.Timedelta(f"{after_rain_delay_hrs}H"))
+    is_dry = is_dry_hour(is_qualifying_event, delay)
+
+    events = series.to_frame().assign(
+        storm=storm, is_qualifying_event=is_qualifying_event, is_dry=is_dry,
     )
 
     return events
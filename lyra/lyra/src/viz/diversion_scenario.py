@@ -3,7 +3,7 @@ from typing import Any, Dict, List
 import altair as alt
 import pandas
 
-from lyra.src.diversion import simulate_diversion
+from lyra.src.diversion import simulate_diversion, simulate_diversion_async
 
 
 def make_source_json(source: pandas.DataFrame) -> List[Dict[str, Any]]:
@@ -23,16 +23,19 @@ def make_source_csv(source: pandas.DataFrame) -> str:
     return csv
 
 
-def make_source(**kwargs: Dict) -> pandas.DataFrame:
-    df = (
-        simulate_diversion(**kwargs)  # type: ignore
-        .reset_index()
-        .melt(id_vars="date")
-        .round(4)
-    )
+def _to_source(results: pandas.DataFrame) -> pandas.DataFrame:
+    df = results.reset_index().melt(id_vars="date").round(4)
     return df
 
 
+async def make_source_async(**kwargs: Dict) -> pandas.DataFrame:
+    return _to_source(await simulate_diversion_async(**kwargs))  # type: ignore
+
+
+def make_source(**kwargs: Dict) -> pandas.DataFrame:
+    return _to_source(simulate_diversion(**kwargs))  # type: ignore
+
+
 def make_summary_table(df):
     table: dict = {
         "column_names": None,
@@ -1,10 +1,10 @@
-import asyncio
 from typing import Any, Dict, List
 
 import altair as alt
 import pandas
 
 from lyra.core.config import cfg
+from lyra.core.utils import run_sync
 from lyra.src.timeseries import Timeseries, gather_timeseries, utils
 
 
@@ -43,18 +43,25 @@ def multi_var_ts_label(t: Timeseries) -> str:
     return f"{_method} 1 {_interval} {_weather_condition}{_var_name} ({_var_units}) {_us} {_site}"
 
 
-def make_timeseries(timeseries: List[Dict[str, Any]], **kwargs: Any,) -> List[Any]:
+async def make_timeseries_async(
+    timeseries: List[Dict[str, Any]], **kwargs: Any,
+) -> List[Any]:
 
     ts = []
     for dct in timeseries:
         t = Timeseries(**dct)
         ts.append(t)
 
-    asyncio.run(gather_timeseries(ts))
+    await gather_timeseries(ts)
 
     return ts
 
 
+def make_timeseries(timeseries: List[Dict[str, Any]], **kwargs: Any,) -> List[Any]:
+    """sync version of `make_timeseries_async`, e.g., for notebooks."""
+    return run_sync(make_timeseries_async(timeseries, **kwargs))
+
+
 def make_source(ts: List[Timeseries]) -> pandas.DataFrame:
     for t in ts:
         t.label = multi_var_ts_label(t)
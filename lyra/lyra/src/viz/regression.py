@@ -1,9 +1,9 @@
-import asyncio
 from typing import Any, Dict, List, Optional
 
 import altair as alt
 import pandas
 
+from lyra.core.utils import run_sync
 from lyra.src.timeseries import Timeseries, gather_timeseries
 
 HOWS = {
@@ -107,18 +107,25 @@ def regression_ts_label(t: Timeseries) -> str:
     return f"{_method} 1 {_interval} {_weather_condition}{_var_name} ({_var_units}) {_us} {_site}"
 
 
-def make_timeseries(timeseries: List[Dict[str, Any]], **kwargs: Any,) -> List[Any]:
+async def make_timeseries_async(
+    timeseries: List[Dict[str, Any]], **kwargs: Any,
+) -> List[Any]:
 
     ts = []
     for dct in timeseries:
         t = Timeseries(**dct)
         ts.append(t)
 
-    asyncio.run(gather_timeseries(ts))
+    await gather_timeseries(ts)
 
     return ts
 
 
+def make_timeseries(timeseries: List[Dict[str, Any]], **kwargs: Any,) -> List[Any]:
+    """sync version of `make_timeseries_async`, e.g., for notebooks."""
+    return run_sync(make_timeseries_async(timeseries, **kwargs))
+
+
 def make_source(ts: List[Timeseries], method: Optional[str] = None) -> pandas.DataFrame:
 
     tx, ty, *_ = ts
@@ -8,10 +8,29 @@ from lyra.src.mnwd import helper
 from lyra.tests import utils as tutils
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark", action="store_true", help="run the benchmark tests too"
+    )
+
+
 def pytest_configure(config):
     config.addinivalue_line(
         "markers", "integration: mark test as requireing a data connection"
     )
+    config.addinivalue_line(
+        "markers",
+        "benchmark: mark test as a performance comparison; run with --benchmark",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
 
 
 @pytest.fixture
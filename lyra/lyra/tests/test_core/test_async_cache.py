@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from lyra.core.async_cache import async_lru, async_redis_ttl, async_ttl
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("decorator", [async_lru(), async_ttl()])
+async def test_async_cache_coalesces_concurrent_misses(decorator):
+    calls = []
+
+    @decorator
+    async def fetch(site):
+        calls.append(site)
+        await asyncio.sleep(0.1)
+        return {"site": site}
+
+    results = await asyncio.gather(*(fetch("ELTORO") for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(r == {"site": "ELTORO"} for r in results)
+    assert decorator.inflight.coalesced == 4
+    assert len(decorator.inflight) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("decorator", [async_lru(), async_ttl()])
+async def test_async_cache_does_not_cache_failures(decorator):
+    calls = []
+
+    @decorator
+    async def fetch(site):
+        calls.append(site)
+        await asyncio.sleep(0.1)
+        if len(calls) == 1:
+            raise ValueError("hydstra is down")
+        return {"site": site}
+
+    results = await asyncio.gather(
+        *(fetch("ELTORO") for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+
+    assert await fetch("ELTORO") == {"site": "ELTORO"}
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_redis_ttl_skips_unavailable_redis(monkeypatch):
+    decorator = async_redis_ttl(retry_seconds=60)
+    attempts = []
+
+    def _client():
+        attempts.append(1)
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(decorator, "_client", _client)
+
+    @decorator
+    async def fetch(site):
+        return {"site": site}
+
+    assert await fetch("ELTORO") == {"site": "ELTORO"}
+    assert len(attempts) == 1, "the set after the failed get skips redis"
+
+    # later misses don't wait on redis either, until it's tried again
+    assert await fetch("ALISO") == {"site": "ALISO"}
+    assert len(attempts) == 1
+
+    decorator._skip_until = 0.0
+    await fetch("OSO")
+    assert len(attempts) == 2
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+import aiohttp
+import orjson
+import pytest
+from aiohttp import web
+
+from lyra.core import async_requests
+from lyra.core.limiter import AIMDLimiter
+from lyra.src.hydstra.stream import TraceDecoder
+from lyra.tests import utils as tutils
+
+
+@pytest.fixture
+def echo_server():
+    """a local http server on its own loop that echoes the posted json."""
+
+    connections = set()
+    calls = []
+
+    async def echo(request):
+        connections.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        calls.append(payload)
+        if len(calls) <= payload.get("fail_first", 0):
+            return web.json_response({}, status=503)
+        await asyncio.sleep(payload.get("sleep", 0))
+        return web.json_response(payload)
+
+    app = web.Application()
+    app.router.add_post("/", echo)
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{port}/", connections, calls
+
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    async_requests.close_pool()
+
+
+def test_send_request_reuses_connections(echo_server):
+    url, connections, _ = echo_server
+
+    for i in range(5):  # each run is a new loop, like the sync routes
+        result = asyncio.run(async_requests.send_request(url, {"i": i}))
+        assert result == {"i": i}
+
+    assert len(connections) == 1
+
+
+def test_send_request_retries_transient_errors(echo_server):
+    url, _, calls = echo_server
+    limiter = AIMDLimiter("test_retry", initial=4)
+
+    payload = {"fail_first": 2}
+    result = asyncio.run(
+        async_requests.send_request(url, payload, limiter=limiter, attempts=3)
+    )
+
+    assert result == payload
+    assert len(calls) == 3
+    assert limiter.limit < 4  # backed off for the 503s
+    assert limiter.in_flight == 0
+
+
+def test_send_request_gives_up(echo_server):
+    url, _, calls = echo_server
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(async_requests.send_request(url, {"fail_first": 5}, attempts=2))
+    assert len(calls) == 2
+
+
+def test_send_request_streams(echo_server):
+    url, *_ = echo_server
+    trace = [{"v": "1.5", "t": "20200101000000", "q": 1}] * 1000
+    payload = {"return": {"traces": [{"site": "ELTORO", "trace": trace}]}}
+
+    result = asyncio.run(
+        async_requests.send_request(url, payload, decoder=TraceDecoder)
+    )
+
+    arrays = result["return"]["traces"][0]["arrays"]
+    assert arrays["v"].sum() == 1500
+
+
+def test_send_request_deadline(echo_server):
+    url, *_ = echo_server
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(async_requests.send_request(url, {"sleep": 1}, deadline=0.1))
+
+
+async def _new_session_per_call(url, payload):
+    # how send_request used to work
+    async with aiohttp.ClientSession(
+        json_serialize=lambda x: orjson.dumps(x).decode()
+    ) as session:
+        async with session.post(url, json=payload) as response:
+            return await response.json(loads=orjson.loads, content_type=None)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("concurrent", [1, 10])
+def test_benchmark_pooled_session(echo_server, concurrent):
+    url, *_ = echo_server
+    n = 50
+
+    async def _run(send):
+        for _ in range(n // concurrent):
+            await asyncio.gather(*(send(url, {"a": 1}) for _ in range(concurrent)))
+
+    # the first of the calls warms up
+    timings = tutils._timings(
+        {
+            "new session": lambda: asyncio.run(_run(_new_session_per_call)),
+            "pooled": lambda: asyncio.run(_run(async_requests.send_request)),
+        },
+        repeat=3,
+    )
+    assert timings["pooled"] < timings["new session"]
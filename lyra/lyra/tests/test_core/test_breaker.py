@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from lyra.core.breaker import CircuitBreaker
+from lyra.core.errors import CircuitOpenError
+from lyra.core.metrics import registry
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_probes_until_closed():
+    healthy = False
+    probes = []
+
+    async def probe():
+        probes.append(healthy)
+        if not healthy:
+            raise ConnectionError
+
+    breaker = CircuitBreaker("test", probe, failure_threshold=2, probe_interval=0.01)
+
+    breaker.record_failure()
+    breaker.check()  # still closed
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    await asyncio.sleep(0.05)
+    assert breaker.state == "open"
+    assert probes and not any(probes)
+
+    healthy = True
+    await asyncio.sleep(0.05)
+    assert breaker.state == "closed"
+    breaker.check()
+
+    stats = registry.to_dict()["functions"]["test_breaker"]
+    assert stats["opened"] == stats["rejected"] == 1
+    assert stats["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_breaker_success_resets_failures():
+    async def probe():  # pragma: no cover
+        pass
+
+    breaker = CircuitBreaker("test_reset", probe, failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
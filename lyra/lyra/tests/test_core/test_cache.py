@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+
+import orjson
+
+from lyra.core import cache
+from lyra.core.local_cache import LocalCache
+
+
+def test_rcache_single_flight(clearcache):
+    calls = []
+
+    @cache.rcache(ex=60)
+    def slow_func(x):
+        calls.append(x)
+        time.sleep(0.5)
+        return orjson.dumps(x)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(slow_func(1))) for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1, "only the lock holder should compute the result"
+    assert all(r == b"1" for r in results)
+    assert cache.get_stats()["slow_func"]["single_flight_coalesced"] == 4
+
+
+def test_rcache_stale_while_revalidate(clearcache):
+    calls = []
+
+    @cache.rcache(ex=60, stale_after=1)
+    def versioned_func():
+        calls.append(1)
+        return orjson.dumps(len(calls))
+
+    assert versioned_func() == b"1"
+    time.sleep(1.1)
+
+    assert versioned_func() == b"1", "stale entries are served immediately"
+    time.sleep(0.5)  # let the background refresh land
+
+    assert versioned_func() == b"2"
+    assert len(calls) == 2
+
+
+def test_inspect_keys(clearcache):
+    @cache.rcache(ex=60)
+    def sized_func(n):
+        return b"x" * n
+
+    for n in [10, 100, 1000]:
+        sized_func(n)
+
+    namespaces = cache.inspect_keys(top=2)["namespaces"]
+    summary = next(v for k, v in namespaces.items() if k.endswith("sized_func"))
+
+    assert summary["keys"] == 3
+    assert [e["bytes"] for e in summary["top"]] == [1001, 101]
+    assert all(0 < e["ttl"] <= 60 for e in summary["top"])
+
+
+def test_bump_version_only_invalidates_dependents(clearcache):
+    calls = []
+
+    @cache.rcache(ex=60, depends_on=["rsb"])
+    def rsb_func():
+        calls.append("rsb")
+        return b"rsb"
+
+    @cache.rcache(ex=60, depends_on=["drooltool"])
+    def drooltool_func():
+        calls.append("drooltool")
+        return b"drooltool"
+
+    rsb_func(), drooltool_func()
+    cache.bump_version("rsb")
+    rsb_func(), drooltool_func()
+
+    assert calls == ["rsb", "drooltool", "rsb"]
+
+
+def test_mem_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(cache, "_mem_cache", cache.LocalCache(maxbytes=100))
+    calls = []
+
+    @cache.mem_cache(ex=60)
+    def payload(n):
+        calls.append(n)
+        return b"x" * n
+
+    payload(60), payload(60), payload(50)
+
+    assert calls == [60, 50]
+    assert cache.get_stats()["mem_cache"]["bytes"] == 50
+
+
+def test_invalidation_reaches_forked_siblings(monkeypatch):
+    l1 = LocalCache(maxsize=None)
+    monkeypatch.setattr(cache, "_l1_caches", [l1])
+    published = []
+    monkeypatch.setattr(
+        cache.redis_cache, "publish", lambda channel, data: published.append(data)
+    )
+
+    def _deleted_by(message):
+        l1.set("key", 1)
+        cache._on_invalidate({"data": message})
+        return l1.get("key") is None
+
+    cache._publish(op="delete", key="key")
+    assert not _deleted_by(published[-1]), "a process ignores its own deletes"
+
+    # e.g., a celery prefork child, forked after the cache was imported
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        cache._publish(op="delete", key="key")
+        os.write(write, published[-1])
+        os._exit(0)
+    os.waitpid(pid, 0)
+    os.close(write)
+    message = os.read(read, 4096)
+    os.close(read)
+
+    assert _deleted_by(message)
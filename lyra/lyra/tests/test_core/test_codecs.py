@@ -0,0 +1,24 @@
+import orjson
+import pytest
+
+from lyra.core import codecs
+
+
+@pytest.mark.parametrize("codec", list(codecs.CODECS))
+def test_codec_roundtrip(codec):
+    data = orjson.dumps([{"t": "20200101000000", "v": "1.5", "q": 10}] * 1000)
+
+    encoded = codecs.encode(data, codec=codec)
+    assert codecs.decode(encoded) == data
+    if codec != "identity":
+        assert len(encoded) < len(data)
+
+
+def test_codec_min_size():
+    encoded = codecs.encode(b"[1,2,3]", min_size=1024)
+    assert encoded == b"\x00[1,2,3]"
+
+
+@pytest.mark.parametrize("legacy", [b"[1,2,3]", b'{"a":1}', b"null", b""])
+def test_codec_reads_values_without_header(legacy):
+    assert codecs.decode(legacy) == legacy
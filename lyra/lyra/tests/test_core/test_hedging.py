@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from lyra.core.hedging import Hedger
+from lyra.core.metrics import registry
+
+
+def _hedger(name, **kwargs):
+    hedger = Hedger(name, min_samples=10, **kwargs)
+    for _ in range(10):
+        hedger._observe(0.01)
+    return hedger
+
+
+@pytest.mark.asyncio
+async def test_hedger_duplicates_slow_calls():
+    hedger = _hedger("test_hedge", max_rate=1)
+    delays = [0.5, 0.01]
+    started = []
+
+    async def call():
+        delay = delays[len(started)]
+        started.append(delay)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert hedger.delay() == 0.01
+    assert await hedger.run(call) == 0.01, "the duplicate answers first"
+    assert started == [0.5, 0.01]
+    assert hedger.hedged == 1
+
+    stats = registry.to_dict()["functions"]["test_hedge_hedge"]
+    assert stats["hedge_wins"] == 1
+    assert stats["hedge_rate"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedger_caps_hedges():
+    hedger = _hedger("test_hedge_cap", max_rate=0.25)
+
+    async def call():
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    results = await asyncio.gather(*(hedger.run(call) for _ in range(20)))
+
+    assert results == ["ok"] * 20
+    assert hedger.hedged == 5
+
+
+@pytest.mark.asyncio
+async def test_hedger_failure_loses_to_success():
+    hedger = _hedger("test_hedge_fail", max_rate=1)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise ConnectionError
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    assert await hedger.run(call) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_hedger_waits_for_samples():
+    hedger = Hedger("test_hedge_samples", min_samples=10)
+
+    async def call():
+        return "ok"
+
+    assert hedger.delay() is None
+    assert await hedger.run(call) == "ok"
+    assert hedger.hedged == 0
@@ -0,0 +1,101 @@
+import datetime
+import hashlib
+
+import numpy
+import pandas
+import pytest
+
+from lyra.core import keys
+from lyra.core.async_cache.key import KEY
+from lyra.tests import utils as tutils
+
+
+def _str_key(name, args, kwargs):
+    """the key builder that `rcache` used before `lyra.core.keys`"""
+    sorted_kwargs = {k: kwargs[k] for k in sorted(kwargs.keys())}
+    return hashlib.sha256(
+        (name + str(args) + str(sorted_kwargs)).encode("utf-8")
+    ).hexdigest()
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ((1, 2), (1, 2)),
+        ({"a": 1, "b": 2}, {"b": 2, "a": 1}),
+        ([1, 2], (1, 2)),
+        (datetime.date(2020, 1, 1), datetime.date(2020, 1, 1)),
+        (numpy.int64(5), 5),
+        (pandas.DataFrame({"a": [1, 2]}), pandas.DataFrame({"a": [1, 2]})),
+    ],
+)
+def test_canonical_equal(a, b):
+    assert keys.canonical(a) == keys.canonical(b)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        (1, 1.0),
+        (1, True),
+        (1, "1"),
+        (None, "None"),
+        ([1, 2], [2, 1]),
+        (pandas.DataFrame({"a": [1, 2]}), pandas.DataFrame({"a": [2, 1]})),
+        (pandas.DataFrame({"a": [1, 2]}), pandas.DataFrame({"b": [1, 2]})),
+    ],
+)
+def test_canonical_not_equal(a, b):
+    assert keys.canonical(a) != keys.canonical(b)
+
+
+def test_make_key_unordered():
+    k1 = keys.make_key("f", (), {"catchidns": [1, 2], "bbox": (1, 2)}, ["catchidns"])
+    k2 = keys.make_key("f", (), {"bbox": (1, 2), "catchidns": [2, 1]}, ["catchidns"])
+    k3 = keys.make_key("f", (), {"bbox": (2, 1), "catchidns": [2, 1]}, ["catchidns"])
+
+    assert k1 == k2
+    assert k1 != k3
+
+
+def test_make_key_blob_is_digested():
+    blob = "CatchIDN,DSCatchID\n" + "1,2\n" * 10000
+    canonical = keys.canonical_bytes((), {"file_contents": blob})
+
+    assert len(canonical) < 200
+    assert keys.make_key("f", (), {"file_contents": blob}) != keys.make_key(
+        "f", (), {"file_contents": blob + "3,4\n"}
+    )
+
+
+def test_KEY_equality_is_not_just_hash():
+    class Collides:
+        def __hash__(self):
+            return 1
+
+    assert hash(KEY(("a",), {})) == hash(KEY(("a",), {}))
+    assert KEY(("a",), {}) == KEY(("a",), {})
+    assert KEY(("a",), {}) != KEY(("b",), {})
+    assert KEY(("a",), {}) != Collides()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "label, args, kwargs",
+    [
+        ("small", (23,), {"variables": ["overall_MeterID_count"], "agg": "sum"}),
+        ("catchidns", (), {"catchidns": list(range(2000)), "years": [2019, 2020]}),
+        ("file_contents", (0,), {"file_contents": "1,2,3\n" * 200_000}),
+    ],
+)
+def test_benchmark_make_key(label, args, kwargs):
+    timings = tutils._timings(
+        {
+            "str key": lambda: _str_key("f", args, kwargs),
+            "canonical key": lambda: keys.make_key("f", args, kwargs),
+        },
+        repeat=50,
+    )
+    # canonical keys of small arguments cost more than their strings, but stay well
+    # under a millisecond, and large blobs are digested faster than stringified.
+    assert timings["canonical key"] < max(timings["str key"], 1e-3)
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from lyra.core.limiter import AIMDLimiter
+from lyra.core.metrics import registry
+
+
+class Overloaded(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_concurrency():
+    limiter = AIMDLimiter("test_cap", initial=2, maximum=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    tasks = [asyncio.ensure_future(call()) for _ in range(6)]
+    await asyncio.sleep(0)
+    assert limiter.queued == 4
+    assert registry.to_dict()["functions"]["test_cap"]["queued"] == 4
+
+    await asyncio.gather(*tasks)
+    assert peak == 2
+    assert limiter.in_flight == limiter.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_aimd():
+    limiter = AIMDLimiter(
+        "test_aimd", initial=8, is_overload=lambda e: isinstance(e, Overloaded),
+    )
+
+    with pytest.raises(Overloaded):
+        async with limiter.slot():
+            raise Overloaded
+    assert limiter.limit == 4
+
+    with pytest.raises(ValueError):
+        async with limiter.slot():
+            raise ValueError  # not an overload, so the limit stays put
+    assert limiter.limit == 4
+
+    for _ in range(4):
+        async with limiter.slot():
+            pass
+    assert 4.8 < limiter.limit < 5
+
+    stats = registry.to_dict()["functions"]["test_aimd"]
+    assert stats["throttled"] == 1
+    assert stats["limit"] == round(limiter.limit, 2)
+
+
+@pytest.mark.asyncio
+async def test_limiter_cancelled_waiter():
+    limiter = AIMDLimiter("test_cancel", initial=1, maximum=1)
+    await limiter.acquire()
+
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.in_flight == 0
@@ -0,0 +1,39 @@
+import time
+
+from lyra.core.local_cache import LocalCache
+
+
+def test_local_cache_lru():
+    c = LocalCache(maxsize=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # 'b' is now the least recently used
+    c.set("c", 3)
+
+    assert "b" not in c
+    assert c.get("a") == 1 and c.get("c") == 3
+
+
+def test_local_cache_ttl():
+    c = LocalCache(ttl=0.1)
+    c.set("a", 1)
+    c.set("b", 2, ex=10)
+    time.sleep(0.2)
+
+    assert c.get("a") is None
+    assert c.get("b") == 2
+
+
+def test_local_cache_maxbytes():
+    c = LocalCache(maxsize=None, maxbytes=10)
+    c.set("a", b"1234")
+    c.set("b", b"1234")
+    assert c.get("a") == b"1234"  # 'b' is now the least recently used
+    c.set("c", b"1234")
+
+    assert "b" not in c
+    assert c.stats()["bytes"] == 8
+    assert c.stats()["evictions"] == 1
+
+    c.set("d", b"x" * 11)  # larger than the whole cache
+    assert "d" not in c and len(c) == 2
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from lyra.core.async_cache import async_ttl
+from lyra.core.metrics import Histogram, Registry, registry
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram(buckets=(0.1, 1))
+    for v in [0.05, 0.1, 0.5, 2]:
+        h.observe(v)
+
+    d = h.to_dict()
+    assert d["buckets"] == {"le_0.1": 2, "le_1": 3, "le_inf": 4}
+    assert d["count"] == 4
+    assert d["mean"] == pytest.approx(2.65 / 4)
+
+
+def test_registry_to_dict():
+    r = Registry()
+    r.incr("f", "hits")
+    r.incr("f", "hits")
+    r.incr("g", "misses")
+    r.observe("g", 0.2)
+
+    functions = r.to_dict()["functions"]
+    assert functions["f"] == {"hits": 2, "compute_seconds": None}
+    assert functions["g"]["misses"] == 1
+    assert functions["g"]["compute_seconds"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cache_records_metrics():
+    @async_ttl()
+    async def metered_fetch(site):
+        await asyncio.sleep(0.05)
+        return site
+
+    await asyncio.gather(*(metered_fetch("ELTORO") for _ in range(3)))
+    await metered_fetch("ELTORO")
+
+    stats = registry.to_dict()["functions"]["metered_fetch"]
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 2
+    assert stats["hits"] == 1
+    assert stats["compute_seconds"]["count"] == 1
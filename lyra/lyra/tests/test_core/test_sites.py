@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+from lyra.core.config import cfg
+from lyra.core.sites import SiteRegistry, registry
+
+
+def _write(path, sites, mtime=None):
+    features = [{"type": "Feature", "properties": props} for props in sites]
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def sites_file(tmp_path):
+    path = tmp_path / "swn_sites.json"
+    _write(
+        path,
+        [
+            {"station": "ELTORO", "has_rainfall": True, "has_discharge": False},
+            {"station": "ALISO", "has_rainfall": False, "has_discharge": True},
+        ],
+        mtime=1,
+    )
+    return path
+
+
+def test_site_registry_indexes(sites_file):
+    sites = SiteRegistry(sites_file)
+
+    assert sites.stations == ["ELTORO", "ALISO"]
+    assert sites.props("ALISO")["has_discharge"]
+    assert sites.props("NOPE") == {}
+    assert sites.is_valid("ELTORO") and not sites.is_valid("NOPE")
+    assert sites.has_variable("ELTORO", "rainfall")
+    assert not sites.has_variable("ELTORO", "discharge")
+    assert not sites.has_variable("ELTORO", "nope")
+
+
+def test_site_registry_reloads(sites_file):
+    sites = SiteRegistry(sites_file)
+    first = sites.sites
+    assert sites.sites is first, "an unchanged file isn't read again"
+
+    os.utime(sites_file, (2, 2))
+    assert sites.sites is first, "the same contents aren't parsed again"
+
+    _write(sites_file, [{"station": "OSO", "has_rainfall": True}], mtime=3)
+    assert sites.stations == ["OSO"]
+    assert sites.has_variable("OSO", "rainfall")
+
+    sites_file.write_text('{"features": [')  # caught mid write
+    assert sites.stations == ["OSO"]
+
+
+def test_site_registry_duplicates_and_copies(sites_file):
+    _write(
+        sites_file,
+        [
+            {"station": "ELTORO", "has_rainfall": True, "info": {"varfrom": "11"}},
+            {"station": "ELTORO", "has_rainfall": False},
+        ],
+    )
+    sites = SiteRegistry(sites_file)
+    assert sites.stations == ["ELTORO"]
+    assert sites.has_variable("ELTORO", "rainfall")
+
+    props = sites.props("ELTORO")
+    props["info"]["varfrom"] = "changed"
+    sites.all_props()[0]["has_rainfall"] = False
+    assert sites.props("ELTORO") == {
+        "station": "ELTORO",
+        "has_rainfall": True,
+        "info": {"varfrom": "11"},
+    }
+
+
+def test_site_registry_swn_sites():
+    assert registry.path == cfg["site_path"]
+    assert len(registry.stations) == len(registry.sites.valid) > 20
+    for station in registry.sites.has_variable["rainfall"]:
+        assert registry.props(station)["has_rainfall"]
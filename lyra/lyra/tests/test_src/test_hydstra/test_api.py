@@ -1,7 +1,16 @@
+import asyncio
+
 import pytest
 
 from lyra.core import async_requests
-from lyra.src.hydstra import api
+from lyra.core.hedging import Hedger
+from lyra.src.hydstra import api, metadata
+from lyra.src.hydstra.stream import TraceDecoder
+
+
+@pytest.fixture(autouse=True)
+def clear_metadata():
+    metadata.clear()
 
 
 @pytest.fixture
@@ -139,3 +148,35 @@ async def test_hydstra_get_trace(mock_get_trace):
     )
 
     assert len(rsp["return"]["traces"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_trace_arrays_is_hedged(monkeypatch):
+    hedger = Hedger("test_trace_arrays", max_rate=1, min_samples=10)
+    for _ in range(10):
+        hedger._observe(0.01)
+    monkeypatch.setitem(api.HEDGE_CFG, "enabled", True)
+    monkeypatch.setattr(api, "trace_arrays_hedger", hedger)
+
+    delays = [0.5, 0.01]
+    decoders = []
+
+    async def _send(payload, decoder=None):
+        delay = delays[len(decoders)]
+        decoders.append(decoder)
+        await asyncio.sleep(delay)
+        return {"delay": delay}
+
+    monkeypatch.setattr(api, "_send", _send)
+
+    rsp = await api.get_trace_arrays(
+        site_list="ELTORO",
+        start_time="20200101000000",
+        end_time="20200201000000",
+        interval="hour",
+        datasource="PUBLISH",
+        data_type="mean",
+        varfrom="11.00",
+    )
+    assert rsp == {"delay": 0.01}, "the duplicate answers first"
+    assert decoders == [TraceDecoder, TraceDecoder]
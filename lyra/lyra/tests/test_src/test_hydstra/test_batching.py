@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from lyra.src.hydstra.batching import TraceBatcher
+
+
+def _payload(site, varfrom="11.00"):
+    return {
+        "function": "get_ts_traces",
+        "version": 2,
+        "params": {"site_list": site, "varfrom": varfrom, "varto": varfrom},
+    }
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def batcher(sent):
+    async def send(payload):
+        sent.append(payload["params"]["site_list"])
+        sites = payload["params"]["site_list"].split(",")
+        if "BAD" in sites:
+            return {"error_num": 126, "error_msg": "no data"}
+        traces = [
+            {"site": s, "trace": [{"v": "1", "t": "20200101000000"}]} for s in sites
+        ]
+        return {"error_num": 0, "return": {"traces": traces}}
+
+    return TraceBatcher(send, window=0.01)
+
+
+@pytest.mark.asyncio
+async def test_batcher_merges_concurrent_sites(batcher, sent):
+    sites = ["ELTORO", "ALISO", "OSO"]
+    responses = await asyncio.gather(*(batcher.request(_payload(s)) for s in sites))
+
+    assert sent == ["ELTORO,ALISO,OSO"]
+    for site, rsp in zip(sites, responses):
+        assert [t["site"] for t in rsp["return"]["traces"]] == [site]
+
+
+@pytest.mark.asyncio
+async def test_batcher_only_merges_identical_params(batcher, sent):
+    await asyncio.gather(
+        batcher.request(_payload("ELTORO")), batcher.request(_payload("ALISO", "262"))
+    )
+
+    assert sorted(sent) == ["ALISO", "ELTORO"]
+
+
+@pytest.mark.asyncio
+async def test_batcher_unbatches_errors(batcher, sent):
+    good, bad = await asyncio.gather(
+        batcher.request(_payload("ELTORO")), batcher.request(_payload("BAD"))
+    )
+
+    assert sent[0] == "ELTORO,BAD"
+    assert sorted(sent[1:]) == ["BAD", "ELTORO"]
+    assert good["return"]["traces"][0]["site"] == "ELTORO"
+    assert bad["error_num"] == 126
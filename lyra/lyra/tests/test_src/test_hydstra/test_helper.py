@@ -0,0 +1,120 @@
+import numpy
+import pandas
+import pytest
+
+from lyra.src.hydstra import helper, stream
+from lyra.tests import utils as tutils
+
+
+def _trace(n, start="2011-01-01"):
+    index = pandas.date_range(start, periods=n, freq="H")
+    values = numpy.random.default_rng(42).gamma(1, 10, n).round(3)
+    return [
+        {"v": str(v), "t": t.strftime("%Y%m%d%H%M%S"), "q": 10 if i % 97 else 150}
+        for i, (t, v) in enumerate(zip(index, values))
+    ]
+
+
+def _reference(trace):
+    # how hydstra_trace_to_series used to parse every trace
+    return (
+        pandas.DataFrame(trace)
+        .assign(date=lambda df: pandas.to_datetime(df["t"], format="%Y%m%d%H%M%S"))
+        .assign(value=lambda df: df.v.astype(float))
+        .set_index("date")
+    )
+
+
+@pytest.mark.parametrize("start", ["1899-12-31", "1970-01-01", "2020-02-28"])
+def test_hydstra_trace_to_series(start):
+    trace = _trace(1000, start)
+    pandas.testing.assert_frame_equal(
+        helper.hydstra_trace_to_series(trace), _reference(trace)[["q", "value"]]
+    )
+
+
+def test_hydstra_trace_to_series_numeric_times():
+    # hydstra may send the times as json numbers
+    trace = [dict(p, t=int(p["t"])) for p in _trace(100)]
+    pandas.testing.assert_frame_equal(
+        helper.hydstra_trace_to_series(trace), _reference(trace)[["q", "value"]]
+    )
+
+
+def test_hydstra_trace_to_series_other_fields():
+    trace = [dict(p, extra=1) for p in _trace(10)]
+    pandas.testing.assert_frame_equal(
+        helper.hydstra_trace_to_series(trace), _reference(trace)
+    )
+
+
+def test_year_windows():
+    assert helper.year_windows("20180601000000", "20200301000000") == [
+        ("20180601000000", "20181231235959"),
+        ("20190101000000", "20191231235959"),
+        ("20200101000000", "20200301000000"),
+    ]
+    assert helper.year_windows("20180601000000", "20180701000000") == [
+        ("20180601000000", "20180701000000")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_site_variable_as_trace_by_year(monkeypatch):
+    calls = []
+
+    async def _get_trace(start_time, end_time, **kwargs):
+        calls.append((start_time, end_time))
+        if start_time.startswith("2019"):
+            return {"error_num": 126, "error_msg": "no data"}
+        trace = [{"v": "1", "t": start_time, "q": 1}, {"v": "2", "t": end_time, "q": 1}]
+        return {"return": {"traces": [{"site": "ELTORO", "trace": trace}]}}
+
+    monkeypatch.setattr(helper.api, "get_trace", _get_trace)
+
+    rsp = await helper.get_site_variable_as_trace(
+        "ELTORO", "11.00", start_date="2018-06-01", end_date="2020-03-01"
+    )
+    assert len(calls) == 3
+    assert rsp["site"] == "ELTORO"
+    assert [p["t"] for p in rsp["trace"]] == [
+        "20180601000000",
+        "20181231235959",
+        "20200101000000",
+        "20200301000000",
+    ]
+
+    calls.clear()
+    rsp = await helper.get_site_variable_as_trace(
+        "ELTORO",
+        "11.00",
+        start_date="2018-06-01",
+        end_date="2020-03-01",
+        interval="month",
+    )
+    assert len(calls) == 1, "only long hourly and daily traces are split"
+
+
+def test_stitch_traces_errors():
+    no_data = {"error_num": 126, "error_msg": "no data"}
+    no_variable = {"error_num": 125, "error_msg": "no variable"}
+    trace = {"trace": [{"v": "1", "t": "20200101000000", "q": 1}]}
+
+    assert helper.stitch_traces([trace, None]) is None
+    assert helper.stitch_traces([no_data, no_variable, trace]) == no_variable
+    assert helper.stitch_traces([no_data, no_data]) == no_data
+    assert helper.stitch_traces([no_data, trace]) == trace
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("n", [10_000, 100_000, 1_000_000])
+def test_benchmark_hydstra_trace_to_series(n):
+    trace = _trace(n)
+
+    timings = tutils._timings(
+        {
+            "reference": lambda: _reference(trace),
+            "vectorized": lambda: helper.hydstra_trace_to_series(trace),
+        }
+    )
+    assert timings["vectorized"] < timings["reference"]
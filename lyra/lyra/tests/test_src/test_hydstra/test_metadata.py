@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from lyra.core import async_requests
+from lyra.core.metrics import registry
+from lyra.src.hydstra import metadata
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def get_sites(calls):
+    @metadata.MetadataCache(ttl=0.05, max_stale=0.2)
+    async def get_sites(group="SWN"):
+        calls.append(group)
+        if group == "BAD":
+            return {"error_num": 220, "error_msg": "bad group"}
+        return {"error_num": 0, "return": {"sites": [f"{group}{len(calls)}"]}}
+
+    yield get_sites
+    async_requests.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_metadata_cache_serves_fresh_entries(get_sites, calls):
+    first = await get_sites()
+    assert await get_sites() == first
+    assert await get_sites(group="ALISO") != first
+    assert calls == ["SWN", "ALISO"]
+
+
+@pytest.mark.asyncio
+async def test_metadata_cache_returns_copies(get_sites, calls):
+    first, concurrent = await asyncio.gather(get_sites(), get_sites())
+    first["return"]["sites"].append("CHANGED")
+    assert concurrent["return"]["sites"] == ["SWN1"]
+
+    hit = await get_sites()
+    assert hit["return"]["sites"] == ["SWN1"]
+    hit["return"]["sites"].clear()
+    assert (await get_sites())["return"]["sites"] == ["SWN1"]
+    assert calls == ["SWN"]
+
+
+@pytest.mark.asyncio
+async def test_metadata_cache_refreshes_in_background(get_sites, calls):
+    first = await get_sites()
+    await asyncio.sleep(0.06)
+
+    # expired, so it's served while it refreshes, and refreshed only once.
+    assert await get_sites() == first
+    assert await get_sites() == first
+    await asyncio.sleep(0.02)
+    assert calls == ["SWN", "SWN"]
+
+    refreshed = await get_sites()
+    assert refreshed != first
+    assert registry.to_dict()["functions"]["get_sites"]["refreshes"] >= 1
+
+    await asyncio.sleep(0.25)  # too old to serve at all
+    assert await get_sites() != refreshed
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_metadata_cache_skips_errors(get_sites, calls):
+    await get_sites(group="BAD")
+    await get_sites(group="BAD")
+    assert calls == ["BAD", "BAD"]
+
+    metadata.clear()
+    await get_sites()
+    await get_sites()
+    assert calls == ["BAD", "BAD", "SWN"]
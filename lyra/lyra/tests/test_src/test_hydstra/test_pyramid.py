@@ -0,0 +1,144 @@
+import numpy
+import pandas
+import pytest
+
+from lyra.src.hydstra import helper, pyramid
+
+
+def _frame(start, end, freq, seed=42):
+    index = pandas.date_range(start, end, freq=freq, name="date")
+    rng = numpy.random.default_rng(seed)
+    return pandas.DataFrame(
+        {
+            "q": rng.choice([1, 10, 150], len(index)).astype("int32"),
+            "value": rng.gamma(1, 10, len(index)).round(3),
+        },
+        index=index,
+    )
+
+
+@pytest.mark.parametrize("agg_method", ["tot", "max", "min"])
+def test_rollup(agg_method):
+    hours = _frame("2019-12-30", "2020-03-02 23:00", "H")
+    days = pyramid.rollup(hours, "hour", "day", agg_method)
+    months = pyramid.rollup(days, "day", "month", agg_method)
+
+    method = pyramid.AGG_REMAP[agg_method]
+    for result, freq in [(days, "D"), (months, "MS")]:
+        expected = hours["value"].groupby(hours.index.to_period(freq[0])).agg(method)
+        numpy.testing.assert_allclose(result["value"], expected)
+        pandas.testing.assert_series_equal(
+            result["q"], hours["q"].resample(freq).max().rename("q"), check_freq=False,
+        )
+
+    assert (
+        months.index.tolist()
+        == pandas.to_datetime(
+            ["2019-12-01", "2020-01-01", "2020-02-01", "2020-03-01"]
+        ).tolist()
+    )
+
+
+def test_rollup_mean_is_weighted_by_hours():
+    # 2020 is a leap year, and its months aren't all as long
+    hours = _frame("2019-01-01", "2020-12-31 23:00", "H")
+    months = pyramid.rollup(hours, "hour", "month", "mean")
+    years = pyramid.rollup(months, "month", "year", "mean")
+
+    expected = hours["value"].groupby(hours.index.year).mean()
+    numpy.testing.assert_allclose(years["value"], expected)
+    numpy.testing.assert_allclose(
+        pyramid.rollup(hours, "hour", "year", "mean")["value"], expected
+    )
+    assert not numpy.allclose(
+        years["value"], months["value"].groupby(months.index.year).mean()
+    )
+
+
+def test_rollup_gaps():
+    days = _frame("2020-01-01", "2020-06-30", "D")
+    days.loc["2020-02-10", "value"] = numpy.nan
+    days = days.drop(days.loc["2020-03-01":"2020-04-30"].index)
+
+    tot = pyramid.rollup(days, "day", "month", "tot")
+    mean = pyramid.rollup(days, "day", "month", "mean")
+
+    # months without any points are left out, and missing values are skipped
+    assert tot.index.month.tolist() == [1, 2, 5, 6]
+    feb = days.loc["2020-02", "value"]
+    assert tot.loc["2020-02-01", "value"] == pytest.approx(feb.sum())
+    assert mean.loc["2020-02-01", "value"] == pytest.approx(feb.mean())
+
+
+@pytest.mark.parametrize(
+    "from_interval, to_interval, agg_method",
+    [("day", "hour", "tot"), ("day", "day", "tot"), ("hour", "day", "cum")],
+)
+def test_rollup_invalid(from_interval, to_interval, agg_method):
+    assert not pyramid.can_rollup(from_interval, to_interval, agg_method)
+    with pytest.raises(ValueError):
+        pyramid.rollup(
+            _frame("2020-01-01", "2020-01-02", "H"),
+            from_interval,
+            to_interval,
+            agg_method,
+        )
+
+
+async def _hydstra(site, varfrom, varto, interval, agg_method, start, end):
+    rsp = await helper.get_site_variable_as_trace(
+        site=site,
+        varfrom=varfrom,
+        varto=varto,
+        start_date=start,
+        end_date=end,
+        interval=interval,
+        agg_method=agg_method,
+    )
+    return helper.hydstra_trace_to_series(rsp["trace"])
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "site, varfrom, varto, agg_method",
+    [
+        ("ELTORO", "11.50", "11", "tot"),
+        ("ALISO_JERONIMO", "232.37", "262", "mean"),
+        ("ALISO_JERONIMO", "232.37", "262", "max"),
+        ("ALISO_JERONIMO", "232.37", "262", "min"),
+    ],
+)
+@pytest.mark.parametrize(
+    "from_interval, to_interval, start, end",
+    [
+        ("hour", "day", "2019-01-01", "2019-03-01"),
+        ("day", "month", "2018-01-01", "2019-01-01"),
+        ("month", "year", "2015-01-01", "2019-01-01"),
+    ],
+)
+async def test_rollup_matches_hydstra_integration(
+    site, varfrom, varto, agg_method, from_interval, to_interval, start, end
+):
+    args = site, varfrom, varto
+    finer = await _hydstra(*args, from_interval, agg_method, start, end)
+    expected = await _hydstra(*args, to_interval, agg_method, start, end)
+
+    result = pyramid.rollup(
+        finer[["q", "value"]], from_interval, to_interval, agg_method
+    )
+
+    # only the periods that all of their finer points were stored for, and that
+    # hydstra has good data for, are the same.
+    rule = pyramid.INTERVAL_REMAP[to_interval]
+    full = pandas.date_range(start, end, freq=pyramid.INTERVAL_REMAP[from_interval])
+    full = pandas.Series(1, index=full[full < pandas.Timestamp(end)])
+    counts = finer["value"].resample(rule).count()
+    complete = counts.index[counts == full.resample(rule).count().reindex(counts.index)]
+    good = expected.index[expected["q"] < 150]
+    periods = complete.intersection(good)
+
+    assert len(periods)
+    numpy.testing.assert_allclose(
+        result.loc[periods, "value"], expected.loc[periods, "value"], rtol=1e-5
+    )
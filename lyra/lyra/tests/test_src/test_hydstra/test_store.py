@@ -0,0 +1,257 @@
+import asyncio
+import os
+import threading
+
+import pandas
+import pytest
+
+from lyra.core.errors import CircuitOpenError
+from lyra.core.metrics import registry as metrics
+from lyra.src.hydstra import helper, pyramid, store, stream
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def fake_hydstra(monkeypatch, tmp_path):
+    """serve a daily trace from a fixed series and record each requested range."""
+    calls = []
+    index = pandas.date_range("2015-01-01", "2019-12-31", freq="D")
+    series = pandas.Series(range(len(index)), index=index, dtype=float)
+
+    async def _get_site_variable_as_trace(start_date, end_date, **kwargs):
+        calls.append((start_date, end_date))
+        s = series.loc[start_date:end_date]
+        if s.empty:
+            return {"error_num": 126, "error_msg": "no data"}
+        trace = [
+            {"t": t.strftime("%Y%m%d%H%M%S"), "v": str(v), "q": 1} for t, v in s.items()
+        ]
+        if kwargs.get("stream"):
+            return {"arrays": stream.hydstra_trace_to_arrays(trace)}
+        return {"trace": trace}
+
+    metrics.clear()
+    monkeypatch.setattr(store, "STORE_PATH", tmp_path)
+    monkeypatch.setattr(
+        helper, "get_site_variable_as_trace", _get_site_variable_as_trace
+    )
+
+    return calls
+
+
+def _stats():
+    return metrics.to_dict()["functions"]["hydstra_store"]
+
+
+async def _get(start_date, end_date):
+    return await store.get_site_variable_as_frame(
+        site="ELTORO",
+        varfrom="11.00",
+        start_date=start_date,
+        end_date=end_date,
+        interval="day",
+        agg_method="mean",
+    )
+
+
+async def _months(start_date, end_date):
+    return await store.get_site_variable_as_frame(
+        site="ELTORO",
+        varfrom="11.00",
+        start_date=start_date,
+        end_date=end_date,
+        interval="month",
+        agg_method="mean",
+    )
+
+
+@pytest.mark.asyncio
+async def test_store_fetches_only_missing_ranges(fake_hydstra):
+    first = await _get("2017-01-01", "2017-12-31")
+    assert fake_hydstra == [("2017-01-01", "2017-12-31")]
+
+    again = await _get("2017-03-01", "2017-06-30")
+    assert len(fake_hydstra) == 1, "a covered range is served from disk"
+    pandas.testing.assert_frame_equal(
+        again["frame"], first["frame"].loc["2017-03-01":"2017-06-30"]
+    )
+
+    wider = await _get("2016-07-01", "2018-06-30")
+    assert fake_hydstra[1:] == [
+        ("2016-07-01", "2017-01-01"),
+        ("2017-12-31", "2018-06-30"),
+    ]
+
+    expected = helper.hydstra_trace_to_series(
+        [
+            {"t": t.strftime("%Y%m%d%H%M%S"), "v": str(float(v)), "q": 1}
+            for t, v in zip(
+                pandas.date_range("2016-07-01", "2018-06-30"), range(547, 1277)
+            )
+        ]
+    )
+    pandas.testing.assert_frame_equal(
+        wider["frame"], expected[store.COLUMNS], check_freq=False
+    )
+
+
+@pytest.mark.asyncio
+async def test_store_passes_hydstra_errors_through(fake_hydstra):
+    rsp = await _get("2021-01-01", "2021-02-01")
+    assert rsp["error_num"] == 126
+    assert not store.stored_paths()
+
+
+@pytest.mark.asyncio
+async def test_store_serves_last_known_good(fake_hydstra, monkeypatch):
+    first = await _get("2017-01-01", "2017-12-31")
+
+    async def _unavailable(**kwargs):
+        raise CircuitOpenError("hydstra is unavailable", data={})
+
+    monkeypatch.setattr(helper, "get_site_variable_as_trace", _unavailable)
+
+    rsp = await _get("2017-06-01", "2018-06-30")
+    assert rsp["stale"]
+    pandas.testing.assert_frame_equal(rsp["frame"], first["frame"].loc["2017-06-01":])
+
+    assert await _get("2019-01-01", "2019-02-01") is None
+
+
+@pytest.mark.asyncio
+async def test_store_rolls_up_finer_intervals(fake_hydstra):
+    days = await _get("2016-01-01", "2017-12-31")
+
+    rsp = await _months("2016-03-15", "2017-06-30")
+    assert len(fake_hydstra) == 1, "months are rolled up from the stored days"
+
+    expected = pyramid.rollup(days["frame"], "day", "month", "mean")
+    pandas.testing.assert_frame_equal(
+        rsp["frame"], expected.loc["2016-03-01":"2017-06-30"], check_freq=False
+    )
+
+    again = await _months("2016-01-01", "2017-12-31")
+    pandas.testing.assert_frame_equal(again["frame"], expected, check_freq=False)
+    assert _stats()["rollup_hits"] == 1
+    assert [p.name for p in store.stored_paths()] == ["day_mean.parquet"]
+
+
+@pytest.mark.asyncio
+async def test_store_rollup_needs_a_covering_base(fake_hydstra):
+    await _get("2017-01-01", "2017-12-31")
+    await _months("2017-06-01", "2018-03-01")
+
+    # the months from hydstra, rather than the missing days to roll them up from
+    assert fake_hydstra[1:] == [("2017-06-01", "2018-03-01")]
+    assert [p.name for p in store.stored_paths()] == [
+        "day_mean.parquet",
+        "month_mean.parquet",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_store_rolls_up_only_the_recent_tail(fake_hydstra, monkeypatch):
+    monkeypatch.setattr(store, "_today", lambda: pandas.Timestamp("2018-03-10"))
+    await _get("2017-01-01", "2018-03-10")
+    await _months("2017-01-01", "2018-03-10")
+    assert len(fake_hydstra) == 1
+    assert _stats()["rollup_points"] == 434
+
+    # a few days later, the new days are fetched with the tail of the stored ones
+    monkeypatch.setattr(store, "_today", lambda: pandas.Timestamp("2018-03-15"))
+    path = store.stored_paths()[0]
+    hour_ago = path.stat().st_mtime - 3601
+    os.utime(path, (hour_ago, hour_ago))
+    rsp = await _months("2017-01-01", "2018-03-15")
+
+    assert fake_hydstra[1:] == [("2018-03-08", "2018-03-15")]
+    # only the month of the tail at the last rollup is rolled up again
+    assert _stats()["rollup_points"] == 434 + 15
+    days, _ = store.read(path)
+    expected = pyramid.rollup(days, "day", "month", "mean")
+    pandas.testing.assert_frame_equal(rsp["frame"], expected, check_freq=False)
+
+
+@pytest.mark.asyncio
+async def test_store_concurrent_merges(fake_hydstra, monkeypatch):
+    fetch = helper.get_site_variable_as_trace
+
+    async def _slow(**kwargs):
+        await asyncio.sleep(0)  # let the other request read the store first
+        return await fetch(**kwargs)
+
+    monkeypatch.setattr(helper, "get_site_variable_as_trace", _slow)
+
+    first, second = await asyncio.gather(
+        _get("2016-01-01", "2016-06-30"), _get("2017-01-01", "2017-06-30")
+    )
+    stored, meta = store.read(store.stored_paths()[0])
+
+    # neither request drops the other's points, but only one range is covered.
+    assert len(stored) == len(first["frame"]) + len(second["frame"])
+    assert (meta["start"], meta["end"]) in [
+        ("2016-01-01T00:00:00", "2016-06-30T00:00:00"),
+        ("2017-01-01T00:00:00", "2017-06-30T00:00:00"),
+    ]
+
+    spanning = await _get("2016-01-01", "2017-06-30")
+    assert len(spanning["frame"]) == 547
+
+
+@pytest.mark.asyncio
+async def test_store_refetches_recent_tail_once_per_sync(fake_hydstra, monkeypatch):
+    monkeypatch.setattr(store, "_today", lambda: pandas.Timestamp("2019-06-30"))
+    fetch = helper.get_site_variable_as_trace
+    streamed = []
+
+    async def _recording(**kwargs):
+        streamed.append(kwargs["stream"])
+        return await fetch(**kwargs)
+
+    monkeypatch.setattr(helper, "get_site_variable_as_trace", _recording)
+
+    first = await _get("2019-01-01", "2019-06-30")
+    path = store.stored_paths()[0]
+    _, meta = store.read(path)
+
+    again = await _get("2019-01-01", "2019-06-30")
+    assert len(fake_hydstra) == 1, "the tail was checked within the sync interval"
+    pandas.testing.assert_frame_equal(again["frame"], first["frame"])
+
+    # an hour later the tail is checked again, through the cached get_trace, and
+    # the file is only touched since its points didn't change.
+    hour_ago = path.stat().st_mtime - 3601
+    os.utime(path, (hour_ago, hour_ago))
+    _, stale = store.read(path)
+    await _get("2019-01-01", "2019-06-30")
+
+    assert fake_hydstra[1:] == [("2019-06-23", "2019-06-30")]
+    assert streamed == [True, False]
+    _, touched = store.read(path)
+    assert touched["synced_at"] == meta["synced_at"]
+    assert touched["checked_at"] > stale["checked_at"]
+
+
+@pytest.mark.asyncio
+async def test_store_reads_and_writes_off_the_event_loop(fake_hydstra, monkeypatch):
+    threads = []
+    for name in ["read", "read_meta", "merge", "write"]:
+
+        def _recording(*args, _func=getattr(store, name), **kwargs):
+            threads.append(threading.current_thread())
+            return _func(*args, **kwargs)
+
+        monkeypatch.setattr(store, name, _recording)
+
+    await _get("2017-01-01", "2017-12-31")
+    await store.get_site_variable_as_frame(
+        site="ELTORO",
+        varfrom="11.00",
+        start_date="2017-01-01",
+        end_date="2017-12-31",
+        interval="month",
+        agg_method="mean",
+    )
+    assert len(threads) > 4
+    assert threading.main_thread() not in threads
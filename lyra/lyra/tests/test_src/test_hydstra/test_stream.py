@@ -0,0 +1,120 @@
+import tracemalloc
+
+import numpy
+import orjson
+import pandas
+import pytest
+
+from lyra.src.hydstra import stream
+from lyra.tests.test_src.test_hydstra.test_helper import _trace
+
+
+def _response(*traces):
+    return orjson.dumps(
+        {
+            "error_num": 0,
+            "return": {
+                "traces": [
+                    {"site": f"SITE{i}", "trace": t, "varfrom_details": {"name": "x"}}
+                    for i, t in enumerate(traces)
+                ]
+            },
+        }
+    )
+
+
+def _decode(body, chunk_size):
+    decoder = stream.TraceDecoder(len(body))
+    for i in range(0, len(body), chunk_size):
+        decoder.feed(body[i : i + chunk_size])
+    return decoder.close()
+
+
+def test_hydstra_trace_to_arrays():
+    trace = [
+        {"v": "1.5", "t": "20200229233000", "q": 1},
+        {"v": 2, "t": "20210101000000", "q": 255},
+    ]
+    arrays = stream.hydstra_trace_to_arrays(trace)
+
+    assert arrays["t"].dtype == numpy.int64
+    assert list(pandas.to_datetime(arrays["t"])) == [
+        pandas.Timestamp("2020-02-29 23:30"),
+        pandas.Timestamp("2021-01-01"),
+    ]
+    assert arrays["v"].tolist() == [1.5, 2.0]
+    assert arrays["q"].dtype == numpy.int16
+    assert arrays["q"].tolist() == [1, 255]
+
+    assert len(stream.hydstra_trace_to_arrays([])["t"]) == 0
+
+
+def test_hydstra_trace_to_arrays_uneven_times():
+    # 13 + 15 characters, which would parse as two (wrong) fixed width times
+    trace = [
+        {"v": "1", "t": "2020010100000", "q": 1},
+        {"v": "2", "t": "202001010000000", "q": 1},
+    ]
+    with pytest.raises(ValueError):
+        stream.hydstra_trace_to_arrays(trace)
+
+
+def test_parse_hydstra_times_rejects_bad_times():
+    with pytest.raises(ValueError):
+        stream.parse_hydstra_times(numpy.array(["2020013100000a"], dtype="S14"))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 2 ** 16])
+def test_trace_decoder(chunk_size):
+    traces = [_trace(500), [], _trace(3, "2020-01-01")]
+    rsp = _decode(_response(*traces), chunk_size)
+
+    assert [t["site"] for t in rsp["return"]["traces"]] == ["SITE0", "SITE1", "SITE2"]
+    for trace, decoded in zip(traces, rsp["return"]["traces"]):
+        assert "trace" not in decoded
+        assert decoded["varfrom_details"] == {"name": "x"}
+        expected = stream.hydstra_trace_to_arrays(trace)
+        for k, arr in decoded["arrays"].items():
+            numpy.testing.assert_array_equal(arr, expected[k])
+            assert arr.dtype == expected[k].dtype
+
+
+def test_trace_decoder_numeric_times():
+    trace = _trace(500)
+    numeric = [dict(p, t=int(p["t"])) for p in trace]
+    rsp = _decode(_response(numeric), 100)
+
+    expected = stream.hydstra_trace_to_arrays(trace)
+    for k, arr in rsp["return"]["traces"][0]["arrays"].items():
+        numpy.testing.assert_array_equal(arr, expected[k])
+
+
+def test_trace_decoder_errors():
+    error = {"error_num": 126, "error_msg": 'no "trace" data'}
+    assert _decode(orjson.dumps(error), 5) == error
+
+    with pytest.raises(ValueError):
+        _decode(_response(_trace(10))[:-50], 5)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("n", [100_000, 1_000_000])
+def test_benchmark_trace_decoder_memory(n):
+    body = _response(_trace(n))
+
+    def buffered():
+        rsp = orjson.loads(body)
+        return stream.hydstra_trace_to_arrays(rsp["return"]["traces"][0]["trace"])
+
+    def streamed():
+        return _decode(body, 2 ** 16)["return"]["traces"][0]["arrays"]
+
+    peaks = {}
+    for label, decode in [("buffered", buffered), ("streamed", streamed)]:
+        tracemalloc.start()
+        arrays = decode()
+        peaks[label] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    assert len(arrays["t"]) == n
+    assert peaks["streamed"] < peaks["buffered"] / 2
@@ -0,0 +1,101 @@
+import numpy
+import pandas
+import pytest
+
+from lyra.core.metrics import registry as metrics
+from lyra.src.timeseries import dry_weather, utils
+from lyra.tests import utils as tutils
+
+
+@pytest.fixture
+def masks():
+    metrics.clear()
+    return dry_weather.DryWeatherMasks()
+
+
+def _stats():
+    return metrics.to_dict()["functions"]["dry_weather_masks"]
+
+
+KWARGS = [
+    {},
+    dict(min_event_depth=0.2, event_separation_hrs=12, after_rain_delay_hrs=24),
+    dict(min_event_depth=0.05, event_separation_hrs=2.5, after_rain_delay_hrs=0),
+]
+
+
+@pytest.mark.parametrize("kwargs", KWARGS)
+def test_masks(masks, kwargs):
+    rainfall = tutils._rainfall(24 * 365)
+    result = masks.get("gauge", rainfall, **kwargs)
+    expected = utils.identify_dry_weather(rainfall, **kwargs)
+
+    pandas.testing.assert_series_equal(result["is_dry"], expected["is_dry"])
+    pandas.testing.assert_frame_equal(masks.get("gauge", rainfall, **kwargs), result)
+    assert _stats()["misses"] == 1 and _stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("kwargs", KWARGS)
+@pytest.mark.parametrize("seed", range(5))
+def test_masks_extend(masks, kwargs, seed):
+    rng = numpy.random.default_rng(seed)
+    rainfall = tutils._rainfall(24 * 365, seed)
+
+    # new hours arrive, and hydstra revises some of the recent ones
+    end = int(rng.integers(24 * 300, 24 * 360))
+    masks.get("gauge", rainfall.iloc[:end], **kwargs)
+    revised = rainfall.copy()
+    revised.iloc[end - 48 : end] = rng.integers(0, 5, 48) / 100
+
+    computed = _stats()["hours_computed"]
+    result = masks.get("gauge", revised, **kwargs)
+    expected = utils.identify_dry_weather(revised, **kwargs)
+
+    pandas.testing.assert_series_equal(result["is_dry"], expected["is_dry"])
+    assert _stats()["extends"] == 1
+    # only from the start of the storm at the first revised hour
+    assert _stats()["hours_computed"] - computed < len(revised) - end + 48 + 24 * 7
+
+
+def test_masks_shorter(masks):
+    rainfall = tutils._rainfall(24 * 365)
+    masks.get("gauge", rainfall)
+
+    # e.g., a later end date is trimmed to a storm
+    for end in (24 * 100, 24 * 200 + 7, 24 * 300 + 13):
+        result = masks.get("gauge", rainfall.iloc[:end])
+        expected = utils.identify_dry_weather(rainfall.iloc[:end])
+        pandas.testing.assert_series_equal(result["is_dry"], expected["is_dry"])
+
+
+def test_masks_keys(masks):
+    rainfall = tutils._rainfall(24 * 30)
+    masks.get("gauge", rainfall)
+    masks.get("gauge", rainfall, event_separation_hrs=6.0)  # the same window
+    masks.get("other_gauge", rainfall)
+    masks.get("gauge", rainfall.iloc[24:])  # a later first hour
+
+    assert _stats()["hits"] == 1 and _stats()["misses"] == 3
+
+
+def test_masks_share_rainfall(masks, monkeypatch):
+    rainfall = tutils._rainfall(24 * 365)
+    revised = rainfall.copy()
+    revised.iloc[-24:] = 0.5
+    expected = [utils.identify_dry_weather(revised, **kwargs) for kwargs in KWARGS]
+    cleaned = []
+    clean_series = utils.clean_series
+    monkeypatch.setattr(
+        utils, "clean_series", lambda s: cleaned.append(1) or clean_series(s)
+    )
+
+    for kwargs in KWARGS * 2:
+        masks.get("gauge", rainfall, **kwargs)
+    assert len(cleaned) == 1 and len(masks._entries) == 1
+    assert _stats()["misses"] == len(KWARGS) and _stats()["hits"] == len(KWARGS)
+
+    # every set of parameters is extended from the hours that didn't change
+    for kwargs, dry in zip(KWARGS, expected):
+        result = masks.get("gauge", revised, **kwargs)
+        pandas.testing.assert_series_equal(result["is_dry"], dry["is_dry"])
+    assert len(cleaned) == 2 and _stats()["extends"] == len(KWARGS)
@@ -0,0 +1,97 @@
+import pandas
+import pytest
+
+from lyra.src.timeseries import utils
+from lyra.tests import utils as tutils
+
+
+def _reference(
+    rainfall_record,
+    min_event_depth=None,
+    event_separation_hrs=None,
+    after_rain_delay_hrs=None,
+):
+    # how identify_dry_weather used to find the dry hours
+    if min_event_depth is None:
+        min_event_depth = 0.1
+    if event_separation_hrs is None:
+        event_separation_hrs = 6
+    if after_rain_delay_hrs is None:
+        after_rain_delay_hrs = 72
+
+    events = utils.get_storm_events(
+        rainfall_record, event_separation_hrs=event_separation_hrs
+    )
+
+    events_over_threshold = (
+        events.groupby("storm")["value"]
+        .sum()
+        .transform(lambda x: x > min_event_depth)
+        .reset_index()
+        .assign(is_qualifying_event=lambda df: df["value"])
+        .set_index("storm")
+    )
+
+    return events.merge(
+        events_over_threshold["is_qualifying_event"],
+        how="left",
+        left_on="storm",
+        right_index=True,
+    ).assign(
+        is_dry=lambda df: (
+            df["is_qualifying_event"]
+            .rolling(f"{after_rain_delay_hrs}H")
+            .sum()
+            .fillna(0)
+            == 0
+        )
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        dict(min_event_depth=0.2, event_separation_hrs=12, after_rain_delay_hrs=24),
+        dict(min_event_depth=0.05, event_separation_hrs=2.5, after_rain_delay_hrs=0),
+        dict(min_event_depth=0.0, event_separation_hrs=0.5, after_rain_delay_hrs=7.5),
+    ],
+)
+def test_identify_dry_weather(seed, kwargs):
+    rainfall = tutils._rainfall(24 * 365, seed, drop=0.01)  # missing hours are dry
+    result = utils.identify_dry_weather(rainfall, **kwargs)
+
+    pandas.testing.assert_frame_equal(result, _reference(rainfall, **kwargs))
+    assert result["is_dry"].any() and not result["is_dry"].all()
+
+
+def test_identify_dry_weather_depth_at_threshold():
+    # summed in order, this storm is 0.21000000000000002 deep, but pandas sums it
+    # to exactly 0.21, which isn't over the threshold.
+    storm = [0.03, 0.04, 0.02, 0.02, 0.04, 0.05, 0.01]
+    rainfall = pandas.Series(
+        [0.0] * 10 + storm + [0.0] * 100,
+        index=pandas.date_range("2020-01-01", periods=117, freq="H", name="date"),
+        name="value",
+    )
+    result = utils.identify_dry_weather(rainfall, min_event_depth=0.21)
+
+    pandas.testing.assert_frame_equal(
+        result, _reference(rainfall, min_event_depth=0.21)
+    )
+    assert result["is_dry"].all()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("years", [1, 10, 30])
+def test_benchmark_identify_dry_weather(years):
+    rainfall = tutils._rainfall(24 * 365 * years, drop=0.01)
+
+    timings = tutils._timings(
+        {
+            "reference": lambda: _reference(rainfall),
+            "vectorized": lambda: utils.identify_dry_weather(rainfall),
+        }
+    )
+    assert timings["vectorized"] < timings["reference"]
@@ -0,0 +1,77 @@
+import threading
+
+import numpy
+import pandas
+import pytest
+
+from lyra.src.timeseries import Timeseries
+from lyra.src.viz import diversion_scenario, multi_variable
+
+
+def mock_timeseries(periods, freq):
+    return pandas.Series(
+        data=numpy.random.RandomState(42).random_sample(periods),
+        index=pandas.date_range(
+            start="2021-01-01", periods=periods, freq=freq, name="date"
+        ),
+        name="value",
+    ).to_frame()
+
+
+@pytest.fixture
+def offline_init_ts(monkeypatch):
+    threads = []
+
+    async def init_ts(self):
+        threads.append(threading.get_ident())
+        self._timeseries = mock_timeseries(24 * 30, "H")
+        return self._timeseries
+
+    monkeypatch.setattr(Timeseries, "init_ts", init_ts)
+    return threads
+
+
+TIMESERIES = [
+    {"site": "test1", "variable": "discharge", "aggregation_method": "mean"},
+    {"site": "test2", "variable": "rainfall", "aggregation_method": "tot"},
+]
+
+
+@pytest.mark.asyncio
+async def test_make_timeseries_async(offline_init_ts):
+    ts = await multi_variable.make_timeseries_async(TIMESERIES)
+
+    assert [t.site for t in ts] == ["test1", "test2"]
+    assert all(len(t.timeseries) == 24 * 30 for t in ts)
+    # loaded on the caller's loop rather than on a new one in another thread
+    assert set(offline_init_ts) == {threading.get_ident()}
+
+
+def test_make_timeseries(offline_init_ts):
+    ts = multi_variable.make_timeseries(TIMESERIES)
+    assert all(len(t.timeseries) == 24 * 30 for t in ts)
+
+
+@pytest.mark.asyncio
+async def test_make_timeseries_from_running_loop(offline_init_ts):
+    # e.g., a notebook, whose kernel is already running a loop
+    ts = multi_variable.make_timeseries(TIMESERIES)
+    assert all(len(t.timeseries) == 24 * 30 for t in ts)
+    assert threading.get_ident() not in offline_init_ts
+
+
+@pytest.mark.asyncio
+async def test_diversion_make_source_async(offline_init_ts):
+    kwargs = dict(
+        ts={"site": "test1", "variable": "discharge", "aggregation_method": "mean"},
+        diversion_rate_cfs=0.5,
+        storage_max_depth_ft=1,
+        storage_area_sqft=100,
+    )
+    source = await diversion_scenario.make_source_async(**kwargs)
+
+    assert not source.empty
+    assert {"inflow_volume", "diverted_volume", "rainfall_depth"} <= set(
+        source["variable"]
+    )
+    pandas.testing.assert_frame_equal(source, diversion_scenario.make_source(**kwargs))
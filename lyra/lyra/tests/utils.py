@@ -1,4 +1,8 @@
 import importlib
+import timeit
+
+import numpy
+import pandas
 
 
 def _rsb_geo_file(*args, **kwargs):
@@ -44,3 +48,31 @@ def _dt_metrics_file(*args, **kwargs):
 def _dt_metrics_file_path(*args, **kwargs):
     with importlib.resources.path("lyra.tests.data", "test_dt_metrics.csv") as p:
         return p
+
+
+def _rainfall(n, seed=42, drop=0.0):
+    """hourly rainfall in hundredths of an inch, mostly dry, with a few gaps.
+
+    :param drop: about this fraction of the hours are missing from the index
+    """
+    rng = numpy.random.default_rng(seed)
+    index = pandas.date_range("2000-01-01", periods=n, freq="H", name="date")
+    values = numpy.where(
+        rng.random(n) < 0.03, rng.integers(1, 30, n) / 100, 0.0
+    ) * rng.integers(0, 2, n)
+    values[rng.random(n) < 0.001] = numpy.nan
+    series = pandas.Series(values, index=index, name="value")
+    if drop:
+        series = series.loc[rng.random(n) > drop]
+    return series
+
+
+def _timings(funcs, repeat=1):
+    """the fastest of `repeat` calls of each of `funcs`, in seconds.
+
+    :param funcs: callables without arguments, by label
+    """
+    return {
+        label: min(timeit.repeat(func, number=1, repeat=repeat))
+        for label, func in funcs.items()
+    }